@@ -61,6 +61,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "tracker.middleware.RequestMetricsMiddleware",  # Per-endpoint query/latency metrics
+    "tracker.middleware.ReplicaPinMiddleware",  # Read-your-writes guard for the read replica
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -111,6 +113,27 @@ DATABASES = {
         'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '300')),
     }
 }
+
+# Optional read replica for analytics/reporting views (see tracker/db_router.py). Set
+# DB_REPLICA_HOST (MySQL replica; other settings default to the primary's), or for a
+# local test DB_REPLICA_ENGINE=django.db.backends.sqlite3 and DB_REPLICA_NAME=<file>.
+# Browsers that just wrote keep reading the primary for REPLICA_PIN_SECONDS.
+if os.environ.get('DB_REPLICA_HOST') or os.environ.get('DB_REPLICA_NAME'):
+    _replica_engine = os.environ.get('DB_REPLICA_ENGINE', DATABASES['default']['ENGINE'])
+    _replica_base = DATABASES['default'] if _replica_engine == DATABASES['default']['ENGINE'] else {}
+    DATABASES['replica'] = {
+        **_replica_base,
+        'ENGINE': _replica_engine,
+        'NAME': os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': os.environ.get('DB_REPLICA_HOST', DATABASES['default']['HOST']),
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['tracker.db_router.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', '10'))
+
 # DATABASES = {
 #     'default': {
 #         'ENGINE': 'django.db.backends.sqlite3',
@@ -158,6 +181,13 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Media files are stored once per distinct content and hard-linked under their names
+# (tracker/utils/media_store.py); run gc_media_blobs nightly to drop unreferenced blobs.
+STORAGES = {
+    'default': {'BACKEND': os.environ.get('MEDIA_STORAGE_BACKEND', 'tracker.utils.media_store.ContentAddressedStorage')},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
 # Allow same-origin embedding (needed to preview PDFs in iframes)
 X_FRAME_OPTIONS = 'SAMEORIGIN'
 
@@ -181,6 +211,52 @@ if not DEBUG:
     CSRF_COOKIE_SECURE = True
     SECURE_SSL_REDIRECT = True
 
+# Request instrumentation (see tracker/utils/request_metrics.py)
+# Set REQUEST_METRICS_DB_PATH to share samples across gunicorn workers via a local SQLite file.
+REQUEST_METRICS_ENABLED = str(os.environ.get('REQUEST_METRICS_ENABLED', 'True')).lower() in ('1', 'true', 'yes')
+REQUEST_METRICS_SAMPLE_RATE = float(os.environ.get('REQUEST_METRICS_SAMPLE_RATE', '1.0'))
+REQUEST_METRICS_WINDOW = int(os.environ.get('REQUEST_METRICS_WINDOW', '500'))
+REQUEST_METRICS_DB_PATH = os.environ.get('REQUEST_METRICS_DB_PATH') or None
+
+# Cache shared by all workers on this box (see tracker/utils/shared_cache.py).
+# File-based by default so inventory lists, settings and audit logs are not duplicated
+# per gunicorn worker and survive restarts; override CACHE_BACKEND/CACHE_LOCATION to
+# point at memcached or redis when available (atomic incr/add across workers).
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', '10000'))},
+    }
+}
+
+# How long dashboard metrics are shared between page loads of the same branch scope
+DASHBOARD_CACHE_SECONDS = int(os.environ.get('DASHBOARD_CACHE_SECONDS', '30'))
+
+# Uploads above this size are streamed to a temporary file instead of being held in
+# memory; tracker/utils/upload_spool.py then hashes, parses and stores them in place.
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.environ.get('FILE_UPLOAD_MAX_MEMORY_SIZE', str(256 * 1024)))
+FILE_UPLOAD_TEMP_DIR = os.environ.get('FILE_UPLOAD_TEMP_DIR') or None
+
+# OCR for scanned invoice PDFs and photos (see tracker/utils/ocr_engine.py).
+# INVOICE_OCR_WORKERS sizes the OCR process pool each web worker shares between its
+# request threads; 0 uses one process per CPU, up to 4.
+INVOICE_OCR_DPI = int(os.environ.get('INVOICE_OCR_DPI', '300'))
+INVOICE_OCR_WORKERS = int(os.environ.get('INVOICE_OCR_WORKERS', '0'))
+INVOICE_OCR_CACHE_SECONDS = int(os.environ.get('INVOICE_OCR_CACHE_SECONDS', str(7 * 24 * 3600)))
+
+# Batch invoice upload (see tracker/services/invoice_batch.py). Extraction threads per
+# batch, largest batch accepted, and how long an unconfirmed batch stays reviewable.
+INVOICE_BATCH_WORKERS = int(os.environ.get('INVOICE_BATCH_WORKERS', '4'))
+INVOICE_BATCH_MAX_FILES = int(os.environ.get('INVOICE_BATCH_MAX_FILES', '100'))
+INVOICE_BATCH_SECONDS = int(os.environ.get('INVOICE_BATCH_SECONDS', str(4 * 3600)))
+
+# Server-side chart images (see tracker/utils/chart_utils.py): rendered charts kept in
+# each worker's LRU, and how long they stay in the shared cache.
+CHART_CACHE_ENTRIES = int(os.environ.get('CHART_CACHE_ENTRIES', '64'))
+CHART_CACHE_SECONDS = int(os.environ.get('CHART_CACHE_SECONDS', str(24 * 3600)))
+
 # APScheduler configuration
 APSCHEDULER_DATETIME_FORMAT = "N j, Y, f:s a"
 APSCHEDULER_RUN_NOW_TIMEOUT = 25  # Seconds
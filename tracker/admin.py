@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Customer, Vehicle, Order, InventoryItem, Branch, ServiceType, ServiceAddon, LabourCode, DelayReasonCategory, DelayReason, Salesperson, Invoice, InvoiceLineItem
+from .models import Customer, Vehicle, Order, InventoryItem, Branch, ServiceType, ServiceAddon, LabourCode, DelayReasonCategory, DelayReason, Salesperson, Invoice, InvoiceLineItem, SystemSetting
 
 @admin.register(Customer)
 class CustomerAdmin(admin.ModelAdmin):
@@ -256,3 +256,10 @@ class DelayReasonAdmin(admin.ModelAdmin):
             'classes': ('wide', 'extrapretty'),
         }),
     )
+
+
+@admin.register(SystemSetting)
+class SystemSettingAdmin(admin.ModelAdmin):
+    list_display = ("key", "value", "updated_at", "updated_by")
+    search_fields = ("key",)
+    readonly_fields = ("updated_at", "updated_by")
@@ -2,6 +2,7 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.http import JsonResponse, HttpRequest
 from django.utils import timezone
 from .models import Branch, Order, Customer
+from .db_compat import in_date_range
 
 @login_required
 @user_passes_test(lambda u: u.is_superuser or u.is_staff)
@@ -29,8 +30,8 @@ def api_branch_metrics(request: HttpRequest):
 
     data = []
     for b in branches:
-        oqs = Order.objects.filter(branch=b, created_at__date__gte=start_date, created_at__date__lte=end_date)
-        cqs = Customer.objects.filter(branch=b, registration_date__date__gte=start_date, registration_date__date__lte=end_date)
+        oqs = Order.objects.filter(in_date_range('created_at', start_date, end_date), branch=b)
+        cqs = Customer.objects.filter(in_date_range('registration_date', start_date, end_date), branch=b)
         total = oqs.count()
         completed = oqs.filter(status='completed').count()
         in_progress = oqs.filter(status__in=['created','in_progress']).count()
@@ -1,6 +1,21 @@
 """
 Database Compatibility Layer
-Handles differences between SQLite and MySQL for date operations
+Date filters on DateTimeFields as half-open datetime ranges.
+
+A ``created_at__date=day`` lookup compiles to ``DATE(CONVERT_TZ(created_at, ...)) = ...``
+on MySQL (``django_datetime_cast_date(...)`` on SQLite): a function of the column, so
+the index on created_at cannot be used and every row in scope is converted. The
+helpers below express the same local-date filter as
+
+    created_at >= <start of day, local time> AND created_at < <start of the next day>
+
+which is an index range scan on every backend and gives identical results (dates are
+interpreted in the current time zone, exactly as ``__date`` does).
+
+Usage:
+    orders.filter(on_date('created_at', today))
+    orders.filter(in_date_range('created_at', start_date, end_date))   # end inclusive
+    Count('id', filter=Q(status='completed') & on_date('completed_at', today))
 """
 
 from django.db import connection
@@ -12,45 +27,53 @@ def is_mysql():
     """Check if we're using MySQL"""
     return 'mysql' in connection.settings_dict['ENGINE']
 
+def as_local_date(value):
+    """Date of ``value`` in the current time zone (dates are returned as they are)."""
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.date()
+    return value
+
+def day_start(value):
+    """Aware datetime at local midnight starting the day of ``value``."""
+    return timezone.make_aware(datetime.combine(as_local_date(value), time.min))
+
+def day_bounds(value):
+    """Half-open ``(start, end)`` aware datetimes covering the local day of ``value``."""
+    day = as_local_date(value)
+    return day_start(day), day_start(day + timedelta(days=1))
+
+def in_date_range(field_name, start_date=None, end_date=None):
+    """
+    Q for local dates from ``start_date`` to ``end_date``, both inclusive.
+
+    Equivalent to ``field__date__gte=start_date, field__date__lte=end_date``; either
+    bound may be None.
+    """
+    lookups = {}
+    if start_date is not None:
+        lookups[f'{field_name}__gte'] = day_start(start_date)
+    if end_date is not None:
+        lookups[f'{field_name}__lt'] = day_start(as_local_date(end_date) + timedelta(days=1))
+    return Q(**lookups)
+
+def on_date(field_name, target_date):
+    """Q for one local date; equivalent to ``field__date=target_date``."""
+    return in_date_range(field_name, target_date, target_date)
+
 def date_filter(field_name, target_date):
     """Create date filter that works with both SQLite and MySQL"""
-    if is_mysql():
-        # MySQL: use datetime range
-        if isinstance(target_date, datetime):
-            target_date = target_date.date()
-        
-        start_dt = timezone.make_aware(datetime.combine(target_date, time.min))
-        end_dt = timezone.make_aware(datetime.combine(target_date, time.max))
-        
-        return Q(**{f'{field_name}__gte': start_dt, f'{field_name}__lte': end_dt})
-    else:
-        # SQLite: use __date lookup
-        return Q(**{f'{field_name}__date': target_date})
+    return on_date(field_name, target_date)
 
 def today_filter(field_name='created_at'):
     """Get today's date filter"""
-    today = timezone.now().date()
-    return date_filter(field_name, today)
+    return on_date(field_name, timezone.localdate())
 
 def period_filter(field_name, days):
     """Get filter for last N days"""
-    if is_mysql():
-        # MySQL: use datetime range
-        start_date = timezone.now().date() - timedelta(days=days)
-        start_dt = timezone.make_aware(datetime.combine(start_date, time.min))
-        return Q(**{f'{field_name}__gte': start_dt})
-    else:
-        # SQLite: use __date lookup
-        start_date = timezone.now().date() - timedelta(days=days)
-        return Q(**{f'{field_name}__date__gte': start_date})
+    return in_date_range(field_name, timezone.localdate() - timedelta(days=days))
 
 def month_start_filter(field_name='created_at'):
     """Get filter for current month start"""
-    today = timezone.now().date()
-    month_start = today.replace(day=1)
-    
-    if is_mysql():
-        start_dt = timezone.make_aware(datetime.combine(month_start, time.min))
-        return Q(**{f'{field_name}__gte': start_dt})
-    else:
-        return Q(**{f'{field_name}__date__gte': month_start})
\ No newline at end of file
+    return in_date_range(field_name, timezone.localdate().replace(day=1))
@@ -0,0 +1,108 @@
+"""
+Read-replica routing for analytics and reporting views.
+
+When a ``replica`` database is configured (DB_REPLICA_* in settings), views decorated
+with ``@read_replica`` send their reads there, so dashboards, analytics APIs and CSV
+exports no longer compete with order and invoice writes on the primary. Everything
+else, and every write, stays on ``default``.
+
+Staleness guard: a replica may lag the primary by a few seconds, so reads go back to
+the primary
+  - for the rest of a request once it has written anything;
+  - inside a transaction on the primary;
+  - for REPLICA_PIN_SECONDS after any request of that browser wrote
+    (ReplicaPinMiddleware sets a short-lived cookie), so users see their own changes.
+
+Usage:
+    @login_required
+    @read_replica
+    def api_delay_trends(request): ...
+
+    with use_replica():
+        rows = list(Order.objects.values('status').annotate(c=Count('id')))
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA = 'replica'
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_use_replica = ContextVar('use_replica', default=False)
+_wrote = ContextVar('wrote', default=False)
+
+
+def replica_configured() -> bool:
+    return REPLICA in connections.databases
+
+
+def mark_write() -> None:
+    """Pin the rest of this request (and, via the middleware, this browser) to the primary."""
+    _wrote.set(True)
+
+
+def wrote() -> bool:
+    return _wrote.get()
+
+
+@contextmanager
+def use_replica():
+    """Route reads in this block to the replica (when configured and not pinned)."""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def read_replica(view):
+    """View decorator: read from the replica unless this browser just wrote."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS or request.COOKIES.get(PIN_COOKIE):
+            return view(request, *args, **kwargs)
+        with use_replica():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Send reads to the replica inside use_replica(); writes always go to the primary."""
+
+    def db_for_read(self, model, **hints):
+        if (
+            _use_replica.get()
+            and not _wrote.get()
+            and replica_configured()
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return REPLICA
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db == REPLICA:
+            # Related lookups from a replica row made outside use_replica()
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        mark_write()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA:
+            return False
+        return None
+
+
+def pin_seconds() -> int:
+    return int(getattr(settings, 'REPLICA_PIN_SECONDS', 10))
@@ -3,6 +3,7 @@ from django.utils import timezone
 from django.db import transaction
 
 from tracker.models import Order
+from tracker.services import OrderKpiService
 
 
 class Command(BaseCommand):
@@ -66,6 +67,9 @@ class Command(BaseCommand):
                 )
                 updated += rows
 
+        if updated and not dry_run:
+            OrderKpiService.invalidate()
+
         msg = f"Auto-progressed {updated} order(s) to in_progress."
         if dry_run:
             msg = "[DRY RUN] " + msg
@@ -97,4 +101,6 @@ class Command(BaseCommand):
                 with transaction.atomic():
                     rows = Order.objects.filter(id=oid, status='in_progress').update(status='completed', completed_at=now2, actual_duration=dur)
                     updated2 += rows
+        if updated2:
+            OrderKpiService.invalidate()
         self.stdout.write(self.style.SUCCESS(f"Auto-completed {updated2} inquiry order(s)."))
@@ -0,0 +1,37 @@
+"""
+Management command to populate Order.invoice_count / invoice_net / invoice_vat / invoice_gross.
+
+Signals keep the columns current for new links, invoices and line items; run this once
+after deploying the columns, and after bulk imports that bypass signals (safe to re-run):
+    python manage.py backfill_order_invoice_totals
+    python manage.py backfill_order_invoice_totals --batch-size 5000
+"""
+
+from django.core.management.base import BaseCommand
+
+from tracker.models import Order
+from tracker.services import OrderInvoiceTotalsService
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized invoice totals (count, net, VAT, gross) on every order"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Orders per batch (default: 2000)')
+
+    def handle(self, *args, **options):
+        batch_size = max(100, options['batch_size'])
+        last_id = 0
+        total = 0
+
+        while True:
+            ids = list(
+                Order.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            total += OrderInvoiceTotalsService.refresh(ids)
+            self.stdout.write(f"  {total} orders...")
+
+        self.stdout.write(self.style.SUCCESS(f"✓ Backfilled invoice totals for {total} orders."))
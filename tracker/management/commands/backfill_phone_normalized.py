@@ -0,0 +1,52 @@
+"""
+Management command to populate Customer.phone_normalized for existing rows.
+
+Customer.save() keeps the column current for new and edited customers; run this once
+after deploying the column (it is safe to re-run):
+    python manage.py backfill_phone_normalized
+    python manage.py backfill_phone_normalized --batch-size 5000 --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tracker.models import Customer
+from tracker.utils import normalize_phone
+
+
+class Command(BaseCommand):
+    help = "Backfill Customer.phone_normalized (digits-only phone) in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per batch (default: 2000)')
+        parser.add_argument('--dry-run', action='store_true', help='Count rows that would change without saving')
+
+    def handle(self, *args, **options):
+        batch_size = max(100, options['batch_size'])
+        dry_run = options['dry_run']
+        last_id = 0
+        scanned = changed = 0
+
+        while True:
+            rows = list(
+                Customer.objects.filter(id__gt=last_id).order_by('id')
+                .only('id', 'phone', 'phone_normalized')[:batch_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1].id
+            scanned += len(rows)
+
+            stale = []
+            for c in rows:
+                value = normalize_phone(c.phone)[:20]
+                if c.phone_normalized != value:
+                    c.phone_normalized = value
+                    stale.append(c)
+            changed += len(stale)
+            if stale and not dry_run:
+                with transaction.atomic():
+                    Customer.objects.bulk_update(stale, ['phone_normalized'], batch_size=batch_size)
+
+        verb = 'would be updated' if dry_run else 'updated'
+        self.stdout.write(self.style.SUCCESS(f"✓ Scanned {scanned} customers; {changed} {verb}."))
@@ -0,0 +1,55 @@
+"""
+Management command to populate Vehicle.plate_key and Vehicle.branch for existing rows.
+
+Vehicle.save() keeps both columns current for new and edited vehicles; run this once
+after deploying the columns (it is safe to re-run):
+    python manage.py backfill_plate_keys
+    python manage.py backfill_plate_keys --batch-size 5000 --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tracker.models import Vehicle
+from tracker.utils import normalize_plate
+
+
+class Command(BaseCommand):
+    help = "Backfill Vehicle.plate_key (canonical plate) and Vehicle.branch (owner's branch) in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per batch (default: 2000)')
+        parser.add_argument('--dry-run', action='store_true', help='Count rows that would change without saving')
+
+    def handle(self, *args, **options):
+        batch_size = max(100, options['batch_size'])
+        dry_run = options['dry_run']
+        last_id = 0
+        scanned = changed = 0
+
+        while True:
+            rows = list(
+                Vehicle.objects.filter(id__gt=last_id).order_by('id')
+                .only('id', 'plate_number', 'plate_key', 'branch_id', 'customer__branch_id')
+                .select_related('customer')[:batch_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1].id
+            scanned += len(rows)
+
+            stale = []
+            for v in rows:
+                key = normalize_plate(v.plate_number)[:32]
+                branch_id = v.customer.branch_id
+                if v.plate_key != key or v.branch_id != branch_id:
+                    v.plate_key = key
+                    v.branch_id = branch_id
+                    stale.append(v)
+            changed += len(stale)
+            if stale and not dry_run:
+                with transaction.atomic():
+                    Vehicle.objects.bulk_update(stale, ['plate_key', 'branch'], batch_size=batch_size)
+
+        verb = 'would be updated' if dry_run else 'updated'
+        self.stdout.write(self.style.SUCCESS(f"✓ Scanned {scanned} vehicles; {changed} {verb}."))
@@ -0,0 +1,128 @@
+"""
+Management command to benchmark invoice PDF extraction on the synthetic corpus.
+
+Times each stage of tracker.utils.pdf_text_extractor separately (text extraction,
+parsing, and the full extract_from_bytes pipeline), reports pages/sec, items/sec and
+peak Python memory, and compares results with the golden outputs so parser
+optimizations can be shown not to change what is extracted.
+
+Run with:
+    python manage.py benchmark_extraction --repeat 5
+    python manage.py benchmark_extraction --doc pi_1p_5items --doc pi_5p
+    python manage.py benchmark_extraction --update-golden     # after an intended change
+"""
+
+import json
+import logging
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.utils import pdf_text_extractor
+from tracker.utils.invoice_corpus import CORPUS_SPECS, CORPUS_VERSION, GOLDEN_PATH, golden_view, iter_corpus
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = "Benchmark invoice PDF extraction stages on the synthetic corpus and check golden outputs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per document; the median is reported (default: 3)')
+        parser.add_argument('--doc', action='append', dest='docs', choices=[s[0] for s in CORPUS_SPECS],
+                            help='Only benchmark this document; repeat for several')
+        parser.add_argument('--no-golden', action='store_true', help='Skip the golden-output comparison')
+        parser.add_argument('--update-golden', action='store_true', help='Rewrite the golden file from the current parser')
+        parser.add_argument('--json', dest='json_path', help='Also write results to this JSON file')
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+        # Per-item INFO logging would dominate the timings with console I/O
+        extractor_logger = logging.getLogger(pdf_text_extractor.__name__)
+        previous_level = extractor_logger.level
+        extractor_logger.setLevel(logging.WARNING)
+        try:
+            rows, outputs = self._run(options['docs'], repeat)
+        finally:
+            extractor_logger.setLevel(previous_level)
+
+        self._print(rows, repeat)
+
+        if options['update_golden']:
+            golden = json.loads(GOLDEN_PATH.read_text()) if GOLDEN_PATH.exists() else {}
+            golden.update(outputs)
+            GOLDEN_PATH.parent.mkdir(parents=True, exist_ok=True)
+            GOLDEN_PATH.write_text(json.dumps(golden, indent=1, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'✓ Golden outputs written to {GOLDEN_PATH}'))
+        elif not options['no_golden']:
+            self._check_golden(outputs)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump({'corpus_version': CORPUS_VERSION, 'repeat': repeat, 'documents': rows}, fh, indent=2)
+            self.stdout.write(f"Results written to {options['json_path']}")
+
+    def _run(self, docs, repeat):
+        rows, outputs = [], {}
+        for name, pages, items, pdf_bytes in iter_corpus(docs):
+            text_s, parse_s, total_s = [], [], []
+            for _ in range(repeat):
+                pages_data, elapsed = _timed(pdf_text_extractor.extract_text_from_pdf, pdf_bytes)
+                text_s.append(elapsed)
+                _, elapsed = _timed(pdf_text_extractor.parse_invoice_data, pages_data)
+                parse_s.append(elapsed)
+                result, elapsed = _timed(pdf_text_extractor.extract_from_bytes, pdf_bytes, f'{name}.pdf')
+                total_s.append(elapsed)
+
+            # Peak memory is measured on a separate run so tracing overhead stays out of the timings
+            tracemalloc.start()
+            pdf_text_extractor.extract_from_bytes(pdf_bytes, f'{name}.pdf')
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            total = statistics.median(total_s)
+            rows.append({
+                'document': name,
+                'pages': pages,
+                'items': items,
+                'items_extracted': len(result.get('items') or []),
+                'text_ms': round(statistics.median(text_s) * 1000, 2),
+                'parse_ms': round(statistics.median(parse_s) * 1000, 2),
+                'total_ms': round(total * 1000, 2),
+                'pages_per_s': round(pages / total, 1) if total else 0.0,
+                'items_per_s': round(items / total, 1) if total else 0.0,
+                'peak_mem_kb': round(peak / 1024, 1),
+            })
+            outputs[name] = golden_view(result)
+        return rows, outputs
+
+    def _print(self, rows, repeat):
+        self.stdout.write(f'Corpus v{CORPUS_VERSION}, median of {repeat} run(s)\n')
+        self.stdout.write(
+            f"{'Document':<16}{'Pages':>6}{'Items':>7}{'Text ms':>10}{'Parse ms':>10}{'Total ms':>10}"
+            f"{'pages/s':>9}{'items/s':>10}{'Peak KB':>10}"
+        )
+        for r in rows:
+            self.stdout.write(
+                f"{r['document']:<16}{r['pages']:>6}{r['items']:>7}{r['text_ms']:>10}{r['parse_ms']:>10}"
+                f"{r['total_ms']:>10}{r['pages_per_s']:>9}{r['items_per_s']:>10}{r['peak_mem_kb']:>10}"
+            )
+
+    def _check_golden(self, outputs):
+        if not GOLDEN_PATH.exists():
+            raise CommandError(f'Golden file {GOLDEN_PATH} not found; run with --update-golden to create it')
+        golden = json.loads(GOLDEN_PATH.read_text())
+        # Round-trip through JSON so Decimal/float/tuple differences don't count as changes
+        mismatched = [
+            name for name, out in outputs.items()
+            if json.loads(json.dumps(out)) != golden.get(name)
+        ]
+        if mismatched:
+            raise CommandError(f"Extraction output differs from golden for: {', '.join(mismatched)}")
+        self.stdout.write(self.style.SUCCESS(f'✓ {len(outputs)} document(s) match golden outputs'))
@@ -0,0 +1,61 @@
+"""
+Management command to benchmark the working-hours duration calculators.
+
+Times the day-by-day reference implementation, the closed-form
+calculate_estimated_duration and the NumPy calculate_working_minutes_batch on the same
+random intervals, and checks that all three agree.
+
+Run with:
+    python manage.py benchmark_working_hours
+    python manage.py benchmark_working_hours --count 20000 --max-days 180 --seed 7
+"""
+
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tracker.utils.time_utils import (
+    _calculate_duration_by_day, calculate_estimated_duration, calculate_working_minutes_batch,
+)
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = "Benchmark day-by-day vs closed-form vs NumPy batch working-hours durations"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=5000, help='Number of intervals (default: 5000)')
+        parser.add_argument('--max-days', type=int, default=90, help='Longest interval in days (default: 90)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+
+    def handle(self, *args, **options):
+        count = max(1, options['count'])
+        rng = random.Random(options['seed'])
+        base = timezone.now() - timedelta(days=365)
+        max_seconds = max(1, options['max_days']) * 86400
+        starts = [base + timedelta(seconds=rng.randrange(365 * 86400)) for _ in range(count)]
+        ends = [s + timedelta(seconds=rng.randrange(max_seconds)) for s in starts]
+
+        # Warm up, so the timing excludes the first-call numpy/pandas imports
+        calculate_working_minutes_batch(starts[:1], ends[:1])
+        reference, t_ref = _timed(lambda: [_calculate_duration_by_day(s, e) for s, e in zip(starts, ends)])
+        closed, t_closed = _timed(lambda: [calculate_estimated_duration(s, e) for s, e in zip(starts, ends)])
+        batch, t_batch = _timed(lambda: calculate_working_minutes_batch(starts, ends).tolist())
+
+        self.stdout.write(f"{count} intervals up to {options['max_days']} days")
+        for label, seconds in (('day-by-day', t_ref), ('closed form', t_closed), ('numpy batch', t_batch)):
+            self.stdout.write(f"  {label:<12} {seconds * 1000:9.1f} ms  {count / seconds:12,.0f} intervals/s  "
+                              f"x{t_ref / seconds:6.1f}")
+
+        if reference != closed or reference != batch:
+            mismatches = sum(1 for r, c, b in zip(reference, closed, batch) if not r == c == b)
+            raise CommandError(f"{mismatches} intervals disagree with the day-by-day reference")
+        self.stdout.write(self.style.SUCCESS("✓ All implementations agree."))
@@ -0,0 +1,101 @@
+"""
+Management command to maintain the content-addressed media store (tracker/utils/media_store.py).
+
+Removes staged documents of expired, never-confirmed invoice batches
+(tracker/services/invoice_batch.py), then blobs no longer linked from any media file
+(deleted attachments, replaced documents) and, with --adopt, folds media files saved
+before the store was enabled into blobs so duplicates share one copy on disk. Safe to
+re-run; schedule it nightly:
+    python manage.py gc_media_blobs
+    python manage.py gc_media_blobs --adopt
+    python manage.py gc_media_blobs --dry-run
+"""
+
+import os
+import time
+
+from django.apps import apps
+from django.core.files.storage import storages
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+
+from tracker.services.invoice_batch import InvoiceBatchService
+from tracker.utils.media_store import ContentAddressedStorage, file_sha256
+
+
+class Command(BaseCommand):
+    help = "Garbage-collect unreferenced media blobs and optionally deduplicate existing media files"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--adopt', action='store_true', help='Link existing media files to blobs first')
+        parser.add_argument('--min-age', type=int, default=60,
+                            help='Only collect blobs older than this many minutes (default: 60)')
+        parser.add_argument('--dry-run', action='store_true', help='Report without changing anything')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        staged = InvoiceBatchService.purge_staging(dry_run=dry_run)
+        self.stdout.write(f"  {'Would remove' if dry_run else 'Removed'} {staged} expired invoice batch documents")
+
+        storage = storages['default']
+        if not isinstance(storage, ContentAddressedStorage):
+            raise CommandError('The default storage is not ContentAddressedStorage; nothing to do.')
+
+        if options['adopt']:
+            self._adopt(storage, dry_run)
+
+        cutoff = time.time() - options['min_age'] * 60
+        kept = removed = freed = 0
+        for path, links, size, mtime in storage.iter_blobs():
+            if links > 1 or mtime > cutoff:
+                kept += 1
+                continue
+            if not dry_run:
+                os.remove(path)
+            removed += 1
+            freed += size
+
+        verb = 'Would remove' if dry_run else 'Removed'
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {verb} {removed} unreferenced blobs ({freed / 1024 / 1024:.1f} MB); {kept} kept."
+        ))
+
+    def _adopt(self, storage, dry_run):
+        """Turn every stored FileField value into a link to its blob."""
+        names = set()
+        for model in apps.get_models():
+            for field in model._meta.get_fields():
+                if isinstance(field, models.FileField) and field.concrete:
+                    names.update(
+                        model._default_manager.exclude(**{field.name: ''}).exclude(**{f'{field.name}__isnull': True})
+                        .values_list(field.name, flat=True).distinct()
+                    )
+
+        adopted = saved = missing = 0
+        for name in sorted(names):
+            path = storage.path(name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                missing += 1
+                continue
+            if st.st_nlink > 1:
+                # Already linked to its blob
+                continue
+            blob = storage.blob_path(file_sha256(path))
+            adopted += 1
+            if os.path.exists(blob):
+                saved += st.st_size
+                if not dry_run:
+                    tmp = f'{path}.adopt'
+                    os.link(blob, tmp)
+                    os.replace(tmp, path)
+            elif not dry_run:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                os.link(path, blob)
+
+        verb = 'Would adopt' if dry_run else 'Adopted'
+        self.stdout.write(
+            f"  {verb} {adopted} media files; {saved / 1024 / 1024:.1f} MB of duplicates shared"
+            + (f"; {missing} referenced files missing" if missing else '')
+        )
@@ -0,0 +1,312 @@
+"""
+Management command to generate a production-scale synthetic dataset for performance testing.
+
+Scale 1.0 produces roughly 50 branches, 150k customers, 500k orders, 350k invoices
+and ~1.2M invoice line items. Rows are written with bulk_create in batches, so it
+runs in minutes on SQLite or MySQL instead of hours.
+
+Run with:
+    python manage.py generate_perf_dataset --scale 0.01 --seed 42
+    python manage.py generate_perf_dataset --clear            # remove generated rows
+"""
+
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from tracker.models import (
+    Branch, Customer, Vehicle, Order, Invoice, InvoiceLineItem, OrderInvoiceLink, LabourCode,
+)
+from tracker.utils.order_type_detector import _normalize_category_to_order_type
+from .seed_labour_codes import LABOUR_CODES_DATA
+
+
+# Row counts at scale 1.0
+BASE_BRANCHES = 50
+BASE_ORDERS = 500_000
+ORDERS_PER_CUSTOMER = 3.3
+INVOICE_RATE = 0.7
+
+REGIONS = ['Dar es Salaam', 'Arusha', 'Mwanza', 'Dodoma', 'Mbeya', 'Tanga', 'Morogoro']
+CUSTOMER_TYPES = [('personal', 60), ('company', 25), ('government', 10), ('ngo', 5)]
+ORDER_TYPES = [('service', 45), ('sales', 35), ('labour', 10), ('inquiry', 7), ('unspecified', 3)]
+CLOSED_STATUSES = [('completed', 85), ('overdue', 8), ('cancelled', 7)]
+OPEN_STATUSES = [('created', 30), ('in_progress', 55), ('overdue', 15)]
+PRIORITIES = [('medium', 60), ('high', 20), ('low', 15), ('urgent', 5)]
+VEHICLE_MAKES = ['Toyota', 'Nissan', 'Isuzu', 'Mitsubishi', 'Scania', 'Volvo', 'Subaru', 'Suzuki']
+LINE_ITEM_COUNTS = [(1, 30), (2, 25), (3, 18), (4, 10), (5, 7), (6, 5), (8, 3), (12, 2)]
+SALES_CODES = ['TYR-20555R16', 'TYR-19565R15', 'TYR-31580R22', 'BAT-N70', 'OIL-5W30', 'FLT-OIL01', 'TUBE-1000R20']
+FIRST_NAMES = ['Juma', 'Amina', 'Baraka', 'Neema', 'Hassan', 'Rehema', 'Daudi', 'Zawadi', 'Salim', 'Grace']
+LAST_NAMES = ['Mushi', 'Mwakyusa', 'Said', 'Kimaro', 'Mollel', 'Ngowi', 'Lyimo', 'Massawe', 'Shayo', 'Temba']
+
+
+def _weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights, k=1)[0]
+
+
+class Command(BaseCommand):
+    help = "Generate a deterministic, production-scale synthetic dataset for performance testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='Dataset size relative to production (1.0 = 50 branches / 500k orders)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for reproducible data (default: 42)')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk_create batch (default: 2000)')
+        parser.add_argument('--days', type=int, default=365, help='Spread order timestamps over this many days (default: 365)')
+        parser.add_argument('--prefix', default='PERF', help='Code prefix marking generated rows (default: PERF)')
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated rows for --prefix and exit')
+
+    def handle(self, *args, **options):
+        self.prefix = options['prefix'].upper()
+        self.batch_size = max(100, options['batch_size'])
+        if options['clear']:
+            self._clear()
+            return
+
+        scale = options['scale']
+        if scale <= 0:
+            raise CommandError('--scale must be positive')
+        if Branch.objects.filter(code__startswith=f'{self.prefix}B').exists():
+            raise CommandError(f"Generated data with prefix '{self.prefix}' already exists; run with --clear first")
+
+        self.rng = random.Random(options['seed'])
+        self.days = max(1, options['days'])
+        # Anchor timestamps to today's midnight so the same seed yields the same rows within a day
+        self.anchor = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+        self.now = timezone.now()
+
+        n_branches = max(1, round(BASE_BRANCHES * min(scale, 1.0)))
+        n_orders = max(n_branches, round(BASE_ORDERS * scale))
+        self.stdout.write(f"Generating {n_branches} branches and ~{n_orders} orders (seed={options['seed']})…")
+
+        self.code_map = self._ensure_labour_codes()
+        branches = self._create_branches(n_branches)
+        totals = {'customers': 0, 'vehicles': 0, 'orders': 0, 'invoices': 0, 'line_items': 0}
+        per_branch = n_orders // n_branches
+        for idx, branch in enumerate(branches):
+            counts = self._generate_branch(idx, branch, per_branch + (1 if idx < n_orders % n_branches else 0))
+            for k, v in counts.items():
+                totals[k] += v
+            self.stdout.write(f"  {branch.code}: {counts['orders']} orders, {counts['invoices']} invoices")
+
+        self.stdout.write(self.style.SUCCESS(
+            "✓ Generated " + ", ".join(f"{v} {k}" for k, v in totals.items())
+        ))
+        self.stdout.write("Rows were bulk-inserted without signals; run backfill_order_invoice_totals "
+                          "and rebuild_customer_stats to fill the denormalized totals.")
+
+    # ---- reference data -------------------------------------------------
+
+    def _ensure_labour_codes(self):
+        """Return {code: order_type} for active labour codes, seeding the defaults if the table is empty."""
+        if not LabourCode.objects.exists():
+            LabourCode.objects.bulk_create(
+                [LabourCode(**row) for row in LABOUR_CODES_DATA], ignore_conflicts=True
+            )
+        mapping = {
+            code: _normalize_category_to_order_type(category)
+            for code, category in LabourCode.objects.filter(is_active=True).values_list('code', 'category')
+        }
+        mapping.update({code: 'sales' for code in SALES_CODES})
+        return mapping
+
+    def _create_branches(self, count):
+        Branch.objects.bulk_create([
+            Branch(name=f'{self.prefix} Branch {i:03d}', code=f'{self.prefix}B{i:03d}',
+                   region=REGIONS[i % len(REGIONS)])
+            for i in range(count)
+        ])
+        return list(Branch.objects.filter(code__startswith=f'{self.prefix}B').order_by('code'))
+
+    # ---- per-branch generation -----------------------------------------
+
+    def _random_timestamp(self):
+        """Timestamp within the window, weighted to weekdays and working hours (08:00-17:00)."""
+        rng = self.rng
+        while True:
+            day = self.anchor - timedelta(days=int(rng.triangular(0, self.days, 0)))
+            if day.weekday() < 5 or rng.random() < 0.35:
+                break
+        minutes = int(rng.gauss(12.5 * 60, 150))
+        minutes = min(max(minutes, 7 * 60), 19 * 60)
+        return min(day + timedelta(minutes=minutes), self.now)
+
+    def _plate(self, serial):
+        letters = 'ABCDEFGHJKLMNPRSTUVWXYZ'
+        n = serial
+        suffix = ''
+        for _ in range(3):
+            n, r = divmod(n, len(letters))
+            suffix += letters[r]
+        return f'T{serial % 1000:03d}{suffix}'
+
+    def _generate_branch(self, idx, branch, n_orders):
+        rng = self.rng
+        bcode = branch.code
+        n_customers = max(1, round(n_orders / ORDERS_PER_CUSTOMER))
+
+        # Assign each order a customer and timestamp up front so visit statistics can be
+        # written with the customers instead of one UPDATE per customer afterwards.
+        # Skewed choice: a minority of customers account for most visits.
+        plan = []
+        for _ in range(n_orders):
+            if rng.random() < 0.4:
+                cust_idx = min(int(rng.paretovariate(1.2)) - 1, n_customers - 1)
+            else:
+                cust_idx = rng.randrange(n_customers)
+            plan.append((cust_idx, self._random_timestamp()))
+        visits = [0] * n_customers
+        last_visit = [None] * n_customers
+        for cust_idx, created in plan:
+            visits[cust_idx] += 1
+            if last_visit[cust_idx] is None or created > last_visit[cust_idx]:
+                last_visit[cust_idx] = created
+
+        # Customers
+        customers = []
+        for i in range(n_customers):
+            ctype = _weighted(rng, CUSTOMER_TYPES)
+            name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}'
+            reg = min(self._random_timestamp(), last_visit[i] or self.now)
+            customers.append(Customer(
+                code=f'{bcode}C{i:06d}', branch=branch, full_name=name,
+                phone=f'+2557{idx % 100:02d}{i:06d}', phone_normalized=f'2557{idx % 100:02d}{i:06d}',
+                customer_type=ctype,
+                organization_name=f'{name} Ltd' if ctype != 'personal' else None,
+                personal_subtype='owner' if ctype == 'personal' else None,
+                registration_date=reg, arrival_time=last_visit[i] or reg, current_status='departed',
+                total_visits=visits[i], last_visit=last_visit[i],
+            ))
+        self._bulk(Customer, customers)
+        customer_ids = dict(Customer.objects.filter(branch=branch).values_list('code', 'id'))
+        cust_pks = [customer_ids[c.code] for c in customers]
+
+        # Vehicles: one per personal customer, up to three for organisations
+        vehicles = []
+        serial = idx * 1_000_000
+        for cust_pk, c in zip(cust_pks, customers):
+            count = 1 if c.customer_type == 'personal' else rng.choice([1, 2, 3])
+            for _ in range(count):
+                serial += 1
+                plate = self._plate(serial)
+                vehicles.append(Vehicle(customer_id=cust_pk, branch=branch, plate_number=plate, plate_key=plate,
+                                        make=rng.choice(VEHICLE_MAKES), vehicle_type=rng.choice(['Car', '4x4', 'Truck'])))
+        self._bulk(Vehicle, vehicles)
+        vehicles_by_customer = {}
+        self.plates = {}
+        for vid, cid, plate in Vehicle.objects.filter(branch=branch).values_list('id', 'customer_id', 'plate_number'):
+            vehicles_by_customer.setdefault(cid, []).append(vid)
+            self.plates[vid] = plate
+
+        # Orders, invoices and line items are generated in batches to bound memory
+        counts = {'customers': len(customers), 'vehicles': len(vehicles), 'orders': 0, 'invoices': 0, 'line_items': 0}
+        for start in range(0, n_orders, self.batch_size):
+            batch = []
+            for i in range(start, min(start + self.batch_size, n_orders)):
+                cust_idx, created = plan[i]
+                cust_pk = cust_pks[cust_idx]
+                batch.append(self._build_order(bcode, i, branch, cust_pk, created,
+                                               vehicles_by_customer.get(cust_pk) or [None]))
+            counts['orders'] += len(batch)
+            inv_count, li_count = self._persist_orders(bcode, branch, batch)
+            counts['invoices'] += inv_count
+            counts['line_items'] += li_count
+        return counts
+
+    def _build_order(self, bcode, i, branch, cust_pk, created, vehicle_ids):
+        rng = self.rng
+        order_type = _weighted(rng, ORDER_TYPES)
+        age = self.now - created
+        if order_type == 'inquiry':
+            status = 'completed'
+        elif age > timedelta(days=1):
+            status = _weighted(rng, CLOSED_STATUSES)
+        else:
+            status = _weighted(rng, OPEN_STATUSES)
+        started = created + timedelta(minutes=10) if status != 'created' else None
+        duration = int(rng.lognormvariate(4.3, 0.6))  # median ~75 minutes
+        completed = min(created + timedelta(minutes=duration), self.now) if status == 'completed' else None
+        return Order(
+            order_number=f'{bcode}O{i:07d}', branch=branch, customer_id=cust_pk,
+            vehicle_id=rng.choice(vehicle_ids) if order_type != 'inquiry' else None,
+            type=order_type, status=status, priority=_weighted(rng, PRIORITIES),
+            created_at=created, started_at=started, completed_at=completed, completion_date=completed,
+            cancelled_at=created + timedelta(hours=1) if status == 'cancelled' else None,
+            actual_duration=duration if completed else None, estimated_duration=rng.choice([30, 60, 90, 120]),
+        )
+
+    def _persist_orders(self, bcode, branch, orders):
+        rng = self.rng
+        codes = list(self.code_map)
+        with transaction.atomic():
+            Order.objects.bulk_create(orders, batch_size=self.batch_size)
+            order_ids = dict(Order.objects.filter(order_number__in=[o.order_number for o in orders])
+                             .values_list('order_number', 'id'))
+
+            invoices, lines_by_number = [], {}
+            for o in orders:
+                if o.type == 'inquiry' or o.status == 'cancelled' or rng.random() > INVOICE_RATE:
+                    continue
+                number = f'{bcode}I{o.order_number[len(bcode) + 1:]}'
+                lines = []
+                for _ in range(_weighted(rng, LINE_ITEM_COUNTS)):
+                    code = rng.choice(codes)
+                    qty = Decimal(rng.choice([1, 1, 1, 2, 4]))
+                    price = Decimal(rng.randrange(15, 900) * 1000)
+                    total = qty * price
+                    lines.append(dict(code=code, description=f'ITEM {code}', quantity=qty, unit='PCS',
+                                      unit_price=price, line_total=total, tax_rate=Decimal('18'),
+                                      tax_amount=(total * Decimal('0.18')).quantize(Decimal('0.01')),
+                                      order_type=self.code_map[code]))
+                subtotal = sum(li['line_total'] for li in lines)
+                tax = sum(li['tax_amount'] for li in lines)
+                invoices.append(Invoice(
+                    invoice_number=number, branch=branch, order_id=order_ids[o.order_number],
+                    customer_id=o.customer_id, vehicle_id=o.vehicle_id,
+                    invoice_date=timezone.localtime(o.created_at).date(),
+                    reference=f'FOR {self.plates[o.vehicle_id]}' if o.vehicle_id else None,
+                    status='paid' if o.status == 'completed' else 'issued',
+                    subtotal=subtotal, tax_amount=tax, total_amount=subtotal + tax,
+                ))
+                lines_by_number[number] = lines
+            Invoice.objects.bulk_create(invoices, batch_size=self.batch_size)
+            invoice_ids = dict(Invoice.objects.filter(invoice_number__in=list(lines_by_number))
+                               .values_list('invoice_number', 'id'))
+
+            line_items = [
+                InvoiceLineItem(invoice_id=invoice_ids[number], **li)
+                for number, lines in lines_by_number.items() for li in lines
+            ]
+            InvoiceLineItem.objects.bulk_create(line_items, batch_size=self.batch_size)
+            OrderInvoiceLink.objects.bulk_create([
+                OrderInvoiceLink(order_id=inv.order_id, invoice_id=invoice_ids[inv.invoice_number],
+                                 is_primary=True, linked_at=timezone.now())
+                for inv in invoices
+            ], batch_size=self.batch_size)
+        return len(invoices), len(line_items)
+
+    def _bulk(self, model, objs):
+        for i in range(0, len(objs), self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(objs[i:i + self.batch_size])
+
+    # ---- cleanup --------------------------------------------------------
+
+    def _clear(self):
+        branch_ids = list(Branch.objects.filter(code__startswith=f'{self.prefix}B').values_list('id', flat=True))
+        if not branch_ids:
+            self.stdout.write(f"No generated data found for prefix '{self.prefix}'.")
+            return
+        with transaction.atomic():
+            InvoiceLineItem.objects.filter(invoice__branch_id__in=branch_ids).delete()
+            OrderInvoiceLink.objects.filter(order__branch_id__in=branch_ids).delete()
+            Invoice.objects.filter(branch_id__in=branch_ids).delete()
+            Order.objects.filter(branch_id__in=branch_ids).delete()
+            Customer.objects.filter(branch_id__in=branch_ids).delete()
+            Branch.objects.filter(id__in=branch_ids).delete()
+        self.stdout.write(self.style.SUCCESS(f"✓ Removed generated data for {len(branch_ids)} branches."))
@@ -0,0 +1,192 @@
+"""
+Management command to check index coverage of the hottest views with EXPLAIN.
+
+Requests each endpoint as a superuser inside a rolled-back transaction, captures the
+SELECT statements the ORM issues on every database alias (views decorated with
+@read_replica may read from ``replica``), runs EXPLAIN on each against the alias that
+executed it and flags:
+  - full table scans (MySQL type=ALL, SQLite "SCAN <table>" without an index);
+  - filesorts and temporary tables (MySQL "Using filesort"/"Using temporary", SQLite
+    "USE TEMP B-TREE").
+Endpoints default to the slowest ones recorded by the request metrics (console/performance/),
+or a built-in list of hot views when no metrics were recorded. It also lists indexes
+declared on the models but missing from the database. Usage:
+    python manage.py index_advisor
+    python manage.py index_advisor --top 5 --min-rows 500
+    python manage.py index_advisor --endpoint tracker:orders_list --strict
+"""
+
+import re
+from contextlib import ExitStack, contextmanager
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import NoReverseMatch, reverse
+
+from tracker.utils import request_metrics
+
+DEFAULT_ENDPOINTS = (
+    'tracker:dashboard',
+    'tracker:orders_list',
+    'tracker:customers_list',
+    'tracker:started_orders_dashboard',
+    'tracker:api_started_orders_kpis',
+    'tracker:api_branch_metrics',
+    'tracker:api_notifications_summary',
+    'tracker:invoice_list',
+    'tracker:customer_groups',
+)
+
+# Plain table scans; scans of subquery results and covering-index scans are fine
+_SQLITE_SCAN = re.compile(r'^SCAN (?!subquery\b|CONSTANT\b)(\w+)(?!.*\bUSING (COVERING )?INDEX\b)')
+
+
+class _Rollback(Exception):
+    pass
+
+
+class _SelectRecorder:
+    """Execute wrapper keeping the first params of every distinct (alias, SELECT)."""
+
+    def __init__(self):
+        self.selects = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith('SELECT'):
+            self.selects.setdefault((context['connection'].alias, sql), params)
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def record_selects():
+    """Record the SELECTs run on every configured database alias in this block."""
+    recorder = _SelectRecorder()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        yield recorder
+
+
+def explain(sql: str, params=None, min_rows: int = 0, using: str = DEFAULT_DB_ALIAS) -> list[str]:
+    """Problems EXPLAIN reports for one SELECT on ``using`` (empty when it is index-friendly)."""
+    issues = []
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            for row in cursor.fetchall():
+                detail = row[-1]
+                match = _SQLITE_SCAN.match(detail)
+                if match:
+                    issues.append(f'full scan of {match.group(1)}')
+                elif 'USE TEMP B-TREE' in detail:
+                    issues.append(detail.lower())
+        else:
+            cursor.execute(f'EXPLAIN {sql}', params)
+            columns = [c[0].lower() for c in cursor.description]
+            for values in cursor.fetchall():
+                row = dict(zip(columns, values))
+                table, extra = row.get('table'), row.get('extra') or ''
+                if row.get('type') == 'ALL' and (row.get('rows') or 0) >= min_rows:
+                    issues.append(f"full scan of {table} (~{row.get('rows')} rows)")
+                for flag in ('Using filesort', 'Using temporary'):
+                    if flag in extra:
+                        issues.append(f'{flag.lower()} on {table}')
+    return issues
+
+
+def missing_indexes() -> list[str]:
+    """Model Meta indexes that do not exist in the database (no migration applied yet)."""
+    missing = []
+    connection = connections[DEFAULT_DB_ALIAS]
+    with connection.cursor() as cursor:
+        tables = set(connection.introspection.table_names(cursor))
+        for model in apps.get_app_config('tracker').get_models():
+            table = model._meta.db_table
+            if table not in tables or not model._meta.indexes:
+                continue
+            existing = connection.introspection.get_constraints(cursor, table)
+            for index in model._meta.indexes:
+                if index.name not in existing:
+                    missing.append(f"{table}.{index.name} ({', '.join(index.fields)})")
+    return missing
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the SQL of the hottest views and flag full scans, filesorts and missing indexes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', action='append', help='URL name to check (repeatable)')
+        parser.add_argument('--top', type=int, default=10, help='Hottest endpoints by p95 to check (default: 10)')
+        parser.add_argument('--user', help='Username to request as (default: first active superuser)')
+        parser.add_argument('--min-rows', type=int, default=1000,
+                            help='Ignore MySQL full scans estimated below this many rows (default: 1000)')
+        parser.add_argument('--strict', action='store_true', help='Exit with an error when anything is flagged')
+
+    def _endpoints(self, options):
+        if options['endpoint']:
+            return options['endpoint']
+        recorded = [
+            row['endpoint'] for row in request_metrics.get_report(sort='p95', limit=0)
+            if row['endpoint'] != 'unresolved'
+        ]
+        return (recorded or list(DEFAULT_ENDPOINTS))[:max(1, options['top'])]
+
+    def _user(self, username):
+        users = get_user_model().objects.filter(is_active=True)
+        user = users.filter(username=username).first() if username else users.filter(is_superuser=True).first()
+        if not user:
+            raise CommandError('No such user.' if username else 'No active superuser; pass --user.')
+        return user
+
+    def _capture(self, client, url):
+        """Request ``url`` and return (status, {(alias, sql): params}), rolling back any writes."""
+        with record_selects() as recorder:
+            try:
+                with transaction.atomic():
+                    response = client.get(url)
+                    raise _Rollback()
+            except _Rollback:
+                pass
+        return response.status_code, recorder.selects
+
+    def handle(self, *args, **options):
+        client = Client(raise_request_exception=False)
+        client.force_login(self._user(options['user']))
+        flagged = 0
+
+        with override_settings(ALLOWED_HOSTS=['*']):
+            for name in self._endpoints(options):
+                try:
+                    url = reverse(name)
+                except NoReverseMatch:
+                    self.stdout.write(self.style.WARNING(f"{name}: needs URL arguments, skipped"))
+                    continue
+                status, selects = self._capture(client, url)
+                problems = []
+                for (alias, sql), params in selects.items():
+                    try:
+                        issues = explain(sql, params, options['min_rows'], using=alias)
+                    except Exception as e:
+                        issues = [f'EXPLAIN failed: {e}']
+                    if issues:
+                        problems.append((alias, sql, issues))
+
+                self.stdout.write(f"{name} [{status}]: {len(selects)} distinct SELECTs, {len(problems)} flagged")
+                for alias, sql, issues in problems:
+                    on = f' [{alias}]' if alias != DEFAULT_DB_ALIAS else ''
+                    self.stdout.write(f"  - {'; '.join(issues)}{on}")
+                    self.stdout.write(f"    {sql[:300]}{'...' if len(sql) > 300 else ''}")
+                flagged += len(problems)
+
+        missing = missing_indexes()
+        for index in missing:
+            self.stdout.write(self.style.WARNING(f"Declared but not in the database: {index}"))
+
+        if (flagged or missing) and options['strict']:
+            raise CommandError(f"{flagged} queries flagged, {len(missing)} indexes missing")
+        self.stdout.write(self.style.SUCCESS(f"✓ {flagged} queries flagged, {len(missing)} indexes missing."))
@@ -0,0 +1,251 @@
+"""
+Management command to load-test the front-desk workflow against a running server.
+
+Each virtual user logs in with its own session and repeatedly replays the counter flow:
+start order -> check plate -> extract invoice preview -> create invoice from upload
+-> complete order with signature -> poll order detail. Latency is recorded per step and
+summarised as throughput, p50/p95/p99 and error rate.
+
+Start a server first (``python manage.py runserver --noreload`` or gunicorn), then run:
+    python manage.py load_test_frontdesk --base-url http://127.0.0.1:8000 --users 10 --iterations 5 \\
+        --username counter --password secret
+"""
+
+import io
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.utils.request_metrics import percentile
+
+
+STEPS = [
+    'start_order', 'check_plate', 'extract_preview', 'create_invoice', 'complete_order', 'order_detail',
+]
+DEFAULT_PDF = Path(settings.BASE_DIR) / 'tracker' / 'static' / 'assets' / 'pdf' / 'sample.pdf'
+
+
+def _signature_png():
+    """Small PNG resembling a drawn signature."""
+    from PIL import Image, ImageDraw
+    img = Image.new('RGBA', (300, 100), (255, 255, 255, 0))
+    draw = ImageDraw.Draw(img)
+    draw.line([(10, 70), (80, 20), (140, 80), (210, 30), (290, 60)], fill=(0, 0, 0, 255), width=3)
+    buf = io.BytesIO()
+    img.save(buf, format='PNG')
+    return buf.getvalue()
+
+
+class StepFailed(Exception):
+    pass
+
+
+class VirtualUser:
+    """One counter operator with its own logged-in HTTP session."""
+
+    def __init__(self, index, base_url, username, password, pdfs, signature, polls, timeout, record, run_tag):
+        import requests
+        self.index = index
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.pdfs = pdfs
+        self.signature = signature
+        self.polls = polls
+        self.timeout = timeout
+        self.record = record
+        self.run_tag = run_tag
+        self.session = requests.Session()
+
+    def _url(self, path):
+        return f'{self.base_url}{path}'
+
+    def _headers(self):
+        return {'X-CSRFToken': self.session.cookies.get('csrftoken', ''), 'Referer': self.base_url + '/'}
+
+    def login(self):
+        self.session.get(self._url('/login/'), timeout=self.timeout)
+        resp = self.session.post(self._url('/login/'), data={
+            'username': self.username, 'password': self.password, 'remember': '1',
+            'csrfmiddlewaretoken': self.session.cookies.get('csrftoken', ''),
+        }, headers=self._headers(), timeout=self.timeout, allow_redirects=False)
+        if resp.status_code != 302 or 'sessionid' not in self.session.cookies:
+            raise CommandError(f'Login failed for {self.username!r} (HTTP {resp.status_code})')
+
+    def _step(self, name, method, path, check=None, **kwargs):
+        start = time.perf_counter()
+        ok = False
+        try:
+            resp = self.session.request(method, self._url(path), headers=self._headers(), timeout=self.timeout, **kwargs)
+            ok = resp.status_code < 400 and (check is None or check(resp))
+        except Exception:
+            resp = None
+        self.record(name, (time.perf_counter() - start) * 1000.0, ok)
+        if not ok:
+            raise StepFailed(name)
+        return resp
+
+    def run_iteration(self, iteration):
+        plate = f'LT{self.run_tag}{self.index:03d}{iteration:04d}'
+        body = json.dumps({'plate_number': plate, 'order_type': 'sales', 'force_new_order': True})
+        resp = self._step('start_order', 'POST', '/api/orders/start/', data=body,
+                          check=lambda r: r.json().get('success'))
+        order_id = resp.json()['order_id']
+
+        self._step('check_plate', 'POST', '/api/orders/check-plate/',
+                   data=json.dumps({'plate_number': plate}))
+
+        pdf_name, pdf_bytes = self.pdfs[iteration % len(self.pdfs)]
+        resp = self._step('extract_preview', 'POST', '/api/invoices/extract-preview/',
+                          files={'file': (pdf_name, pdf_bytes, 'application/pdf')})
+        preview = resp.json()
+        header = preview.get('header') or {}
+        items = preview.get('items') or [{'description': 'LOAD TEST ITEM', 'qty': 1, 'value': 100, 'code': ''}]
+
+        data = {
+            'selected_order_id': order_id,
+            'plate': plate,
+            'customer_name': header.get('customer_name') or f'Load Test {plate}',
+            'customer_phone': header.get('phone') or f'07{self.index:03d}{iteration:05d}',
+            'customer_type': 'personal',
+            'invoice_number': f'{plate}-INV',
+            'invoice_date': header.get('date') or '',
+            'subtotal': header.get('subtotal') or 0,
+            'tax_amount': header.get('tax') or 0,
+            'total_amount': header.get('total') or 0,
+            'item_description[]': [i.get('description') or '' for i in items],
+            'item_qty[]': [i.get('qty') or 1 for i in items],
+            'item_price[]': [i.get('rate') or i.get('value') or 0 for i in items],
+            'item_value[]': [i.get('value') or 0 for i in items],
+            'item_code[]': [i.get('code') or '' for i in items],
+        }
+        self._step('create_invoice', 'POST', '/api/invoices/create-from-upload/', data=data,
+                   files={'file': (pdf_name, pdf_bytes, 'application/pdf')},
+                   check=lambda r: r.json().get('success'))
+
+        self._step('complete_order', 'POST', f'/orders/{order_id}/complete/',
+                   files={'signature_file': ('signature.png', self.signature, 'image/png')},
+                   data={'delay_reason_text': ''}, allow_redirects=False)
+
+        for _ in range(self.polls):
+            self._step('order_detail', 'GET', f'/orders/{order_id}/')
+
+
+class Command(BaseCommand):
+    help = "Replay the front-desk workflow with concurrent virtual users and report per-step latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Server to test (default: http://127.0.0.1:8000)')
+        parser.add_argument('--users', type=int, default=5, help='Concurrent virtual users (default: 5)')
+        parser.add_argument('--iterations', type=int, default=3, help='Workflow runs per virtual user (default: 3)')
+        parser.add_argument('--username', required=True, help='Login used by every virtual user (needs a branch profile)')
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--pdf', action='append', dest='pdfs', help='Invoice PDF to upload; repeat for several (default: sample.pdf)')
+        parser.add_argument('--polls', type=int, default=3, help='order_detail requests after completion (default: 3)')
+        parser.add_argument('--think-time', type=float, default=0.0, help='Seconds to pause between iterations (default: 0)')
+        parser.add_argument('--timeout', type=float, default=60.0, help='Per-request timeout in seconds (default: 60)')
+        parser.add_argument('--json', dest='json_path', help='Also write the summary to this JSON file')
+
+    def handle(self, *args, **options):
+        try:
+            import requests  # noqa: F401
+        except ImportError:
+            raise CommandError('The requests package is required: pip install requests')
+
+        pdf_paths = [Path(p) for p in (options['pdfs'] or [DEFAULT_PDF])]
+        missing = [str(p) for p in pdf_paths if not p.is_file()]
+        if missing:
+            raise CommandError(f"PDF not found: {', '.join(missing)}")
+        pdfs = [(p.name, p.read_bytes()) for p in pdf_paths]
+
+        samples = defaultdict(list)
+        lock = threading.Lock()
+
+        def record(step, elapsed_ms, ok):
+            with lock:
+                samples[step].append((elapsed_ms, ok))
+
+        run_tag = uuid.uuid4().hex[:4].upper()
+        signature = _signature_png()
+        users = [
+            VirtualUser(i, options['base_url'], options['username'], options['password'], pdfs, signature,
+                        options['polls'], options['timeout'], record, run_tag)
+            for i in range(max(1, options['users']))
+        ]
+        for vu in users:
+            vu.login()
+
+        workflows = {'ok': 0, 'failed': 0}
+
+        def run(vu):
+            for it in range(options['iterations']):
+                try:
+                    vu.run_iteration(it)
+                    outcome = 'ok'
+                except StepFailed:
+                    outcome = 'failed'
+                with lock:
+                    workflows[outcome] += 1
+                if options['think_time']:
+                    time.sleep(options['think_time'])
+
+        self.stdout.write(f"Running {len(users)} virtual users x {options['iterations']} iterations against {options['base_url']}…")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(users)) as pool:
+            list(pool.map(run, users))
+        elapsed = time.perf_counter() - started
+
+        summary = self._summarize(samples, workflows, elapsed, len(users))
+        self._print(summary)
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump(summary, fh, indent=2)
+            self.stdout.write(f"Summary written to {options['json_path']}")
+
+    def _summarize(self, samples, workflows, elapsed, users):
+        steps = []
+        for name in STEPS:
+            rows = samples.get(name, [])
+            latencies = sorted(ms for ms, _ in rows)
+            errors = sum(1 for _, ok in rows if not ok)
+            steps.append({
+                'step': name,
+                'requests': len(rows),
+                'errors': errors,
+                'error_rate': round(errors / len(rows), 4) if rows else 0.0,
+                'p50_ms': round(percentile(latencies, 50), 1),
+                'p95_ms': round(percentile(latencies, 95), 1),
+                'p99_ms': round(percentile(latencies, 99), 1),
+                'rps': round(len(rows) / elapsed, 2) if elapsed else 0.0,
+            })
+        total = workflows['ok'] + workflows['failed']
+        return {
+            'users': users,
+            'elapsed_s': round(elapsed, 2),
+            'workflows': total,
+            'workflows_failed': workflows['failed'],
+            'workflows_per_min': round(workflows['ok'] / elapsed * 60, 2) if elapsed else 0.0,
+            'requests_per_s': round(sum(s['requests'] for s in steps) / elapsed, 2) if elapsed else 0.0,
+            'steps': steps,
+        }
+
+    def _print(self, summary):
+        self.stdout.write(f"\n{'Step':<18}{'Reqs':>7}{'Err%':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}")
+        for s in summary['steps']:
+            self.stdout.write(
+                f"{s['step']:<18}{s['requests']:>7}{s['error_rate'] * 100:>7.1f}%"
+                f"{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}{s['rps']:>9}"
+            )
+        style = self.style.SUCCESS if not summary['workflows_failed'] else self.style.WARNING
+        self.stdout.write(style(
+            f"\n{summary['workflows']} workflows in {summary['elapsed_s']}s "
+            f"({summary['workflows_failed']} failed) · {summary['workflows_per_min']} workflows/min · "
+            f"{summary['requests_per_s']} req/s"
+        ))
@@ -0,0 +1,85 @@
+"""
+Management command to measure worker start-up import time.
+
+Starts a fresh interpreter with ``python -X importtime``, runs django.setup() and loads
+the URLconf (every view module, as a gunicorn worker does on its first request), and
+reports the slowest packages. Fails when the import time exceeds the budget or when a
+heavy optional dependency (pandas, matplotlib, PyMuPDF, ...) is imported at start-up
+instead of on first use, so it can guard CI:
+    python manage.py measure_startup
+    python manage.py measure_startup --budget-ms 800 --runs 5
+    python manage.py measure_startup --forbid pandas --forbid PIL
+"""
+
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+HEAVY_MODULES = ('pandas', 'numpy', 'matplotlib', 'fitz', 'PyPDF2', 'reportlab', 'PIL', 'cv2', 'pytesseract')
+
+BOOT_SCRIPT = (
+    "import django; django.setup(); "
+    "from django.urls import get_resolver; get_resolver().url_patterns"
+)
+
+
+def parse_importtime(stderr: str):
+    """Return ([(module, self_us, cumulative_us, depth)], total_us) from -X importtime output."""
+    rows = []
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        module = name.strip()
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((module, int(self_us), int(cumulative_us), depth))
+        if depth == 0:
+            total += int(cumulative_us)
+    return rows, total
+
+
+class Command(BaseCommand):
+    help = "Measure import time of django.setup() plus the URLconf and enforce a start-up budget"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget-ms', type=float, default=1500.0,
+                            help='Fail if start-up imports take longer (default: 1500)')
+        parser.add_argument('--runs', type=int, default=3, help='Fresh interpreters to start; best run counts (default: 3)')
+        parser.add_argument('--top', type=int, default=15, help='Packages to list (default: 15)')
+        parser.add_argument('--forbid', action='append',
+                            help=f"Module that must not be imported at start-up (default: {', '.join(HEAVY_MODULES)})")
+
+    def _run(self):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'pos_tracker.settings'))
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT],
+            cwd=str(settings.BASE_DIR), env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise CommandError(f"Start-up failed:\n{proc.stderr[-2000:]}")
+        return parse_importtime(proc.stderr)
+
+    def handle(self, *args, **options):
+        rows, total = min((self._run() for _ in range(max(1, options['runs']))), key=lambda run: run[1])
+
+        packages = defaultdict(int)
+        for module, self_us, _, _ in rows:
+            packages[module.split('.')[0]] += self_us
+        slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:options['top']]
+
+        self.stdout.write(f"Start-up imports: {total / 1000:.1f} ms ({len(rows)} modules, best of {options['runs']})")
+        for package, self_us in slowest:
+            self.stdout.write(f"  {package:<28} {self_us / 1000:8.1f} ms  {self_us / max(total, 1) * 100:5.1f}%")
+
+        imported = {module for module, _, _, _ in rows}
+        forbidden = [m for m in (options['forbid'] or HEAVY_MODULES) if m in imported]
+        if forbidden:
+            raise CommandError(f"Imported at start-up, should be lazy: {', '.join(forbidden)}")
+        if total / 1000 > options['budget_ms']:
+            raise CommandError(f"Start-up imports took {total / 1000:.1f} ms; budget is {options['budget_ms']:.0f} ms")
+        self.stdout.write(self.style.SUCCESS(f"✓ Within the {options['budget_ms']:.0f} ms budget."))
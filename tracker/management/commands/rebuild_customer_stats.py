@@ -0,0 +1,37 @@
+"""
+Management command to rebuild the CustomerStats table from orders, invoices and vehicles.
+
+Signals keep the table current; run this after deploying it, after bulk imports that
+bypass signals (bulk_create/update), or whenever the figures are in doubt:
+    python manage.py rebuild_customer_stats
+    python manage.py rebuild_customer_stats --batch-size 500
+"""
+
+from django.core.management.base import BaseCommand
+
+from tracker.models import Customer
+from tracker.services import CustomerStatsService
+
+
+class Command(BaseCommand):
+    help = "Recompute CustomerStats (lifetime spend, order counts, first/last order, vehicles) for every customer"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Customers per batch (default: 1000)')
+
+    def handle(self, *args, **options):
+        batch_size = max(100, options['batch_size'])
+        last_id = 0
+        total = 0
+
+        while True:
+            ids = list(
+                Customer.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            total += CustomerStatsService.refresh(ids)
+            self.stdout.write(f"  {total} customers...")
+
+        self.stdout.write(self.style.SUCCESS(f"✓ Rebuilt stats for {total} customers."))
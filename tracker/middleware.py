@@ -1,9 +1,72 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
 from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
 from datetime import timedelta
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+from . import db_router
 from .models import Order
+from .utils import request_metrics
+
+
+class RequestMetricsMiddleware:
+    """Record query count, DB time, total time and response size per URL name.
+
+    Listed first in MIDDLEWARE so queries issued by later middleware
+    (e.g. AutoProgressOrdersMiddleware) are attributed to the request.
+    Results are shown on the superuser performance report.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request_metrics.should_sample(request.path):
+            return self.get_response(request)
+
+        timer = request_metrics.QueryTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(timer))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - start) * 1000.0
+
+        match = getattr(request, 'resolver_match', None)
+        endpoint = (match.view_name if match else None) or 'unresolved'
+        if getattr(response, 'streaming', False):
+            size = int(response.get('Content-Length') or 0)
+        else:
+            size = len(response.content)
+        request_metrics.record(endpoint, total_ms, timer.duration * 1000.0, timer.count, size, response.status_code)
+        return response
+
+
+class ReplicaPinMiddleware:
+    """Keep a browser on the primary database for a few seconds after it wrote.
+
+    Tracks whether the request wrote to the database (tracker.db_router) and, if so,
+    sets a short-lived cookie that makes @read_replica views read from the primary,
+    so users never see a lagging replica without their own change. Listed before
+    SessionMiddleware so session saves count as writes.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = db_router._wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if db_router.wrote() and db_router.replica_configured():
+                response.set_cookie(
+                    db_router.PIN_COOKIE, '1', max_age=db_router.pin_seconds(), httponly=True, samesite='Lax'
+                )
+        finally:
+            db_router._wrote.reset(token)
+        return response
+
 
 class TimezoneMiddleware(MiddlewareMixin):
     def process_request(self, request):
@@ -35,7 +98,9 @@ class AutoProgressOrdersMiddleware(MiddlewareMixin):
             if updated.exists():
                 # Use F() to set started_at from created_at, preserving the actual start time
                 from django.db.models import F
-                updated.update(status='in_progress', started_at=F('created_at'))
+                from .services import OrderKpiService
+                if updated.update(status='in_progress', started_at=F('created_at')):
+                    OrderKpiService.invalidate()
         except Exception as e:
             # Do not block the request pipeline on errors
             pass
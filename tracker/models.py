@@ -80,6 +80,8 @@ class Customer(models.Model):
     branch = models.ForeignKey('Branch', on_delete=models.PROTECT, null=True, blank=True, related_name='customers')
     full_name = models.CharField(max_length=255)
     phone = models.CharField(max_length=20)
+    # Digits-only copy of phone maintained in save(); used for duplicate detection
+    phone_normalized = models.CharField(max_length=20, blank=True, default='', editable=False)
     whatsapp = models.CharField(max_length=20, blank=True, null=True, help_text="WhatsApp number (if different from phone)")
     email = models.EmailField(blank=True, null=True)
     address = models.TextField(blank=True, null=True)
@@ -111,7 +113,24 @@ class Customer(models.Model):
                 self.code = f"CUST{str(uuid.uuid4())[:8].upper()}"
         if not self.arrival_time:
             self.arrival_time = timezone.now()
+        from .utils import normalize_phone
+        self.phone_normalized = normalize_phone(self.phone)[:20]
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone' in update_fields and 'phone_normalized' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['phone_normalized']
+        branch_moved = self.pk and getattr(self, '_loaded_branch_id', self.branch_id) != self.branch_id
         super().save(*args, **kwargs)
+        if branch_moved:
+            # Keep the denormalized Vehicle.branch in step with the owner
+            Vehicle.objects.filter(customer_id=self.pk).update(branch_id=self.branch_id)
+        self._loaded_branch_id = self.branch_id
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'branch_id' in instance.__dict__:
+            instance._loaded_branch_id = instance.branch_id
+        return instance
 
     def get_icon_for_customer_type(self):
         """Return appropriate icon class based on customer type"""
@@ -133,10 +152,15 @@ class Customer(models.Model):
         indexes = [
             models.Index(fields=["full_name"], name="idx_cust_name"),
             models.Index(fields=["phone"], name="idx_cust_phone"),
+            models.Index(fields=["branch", "phone_normalized"], name="idx_cust_branch_phone_norm"),
+            models.Index(fields=["phone_normalized"], name="idx_cust_phone_norm"),
             models.Index(fields=["email"], name="idx_cust_email"),
             models.Index(fields=["registration_date"], name="idx_cust_reg"),
             models.Index(fields=["last_visit"], name="idx_cust_lastvisit"),
             models.Index(fields=["customer_type"], name="idx_cust_type"),
+            models.Index(fields=["branch", "registration_date"], name="idx_cust_branch_reg"),
+            models.Index(fields=["branch", "customer_type"], name="idx_cust_branch_type"),
+            models.Index(fields=["branch", "last_visit"], name="idx_cust_branch_lastvisit"),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -148,7 +172,11 @@ class Customer(models.Model):
 
 class Vehicle(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="vehicles")
+    # Copy of customer.branch so plate lookups can use a single (branch, plate_key) index
+    branch = models.ForeignKey('Branch', on_delete=models.SET_NULL, null=True, blank=True, related_name='vehicles', editable=False)
     plate_number = models.CharField(max_length=32)
+    # Canonical plate (uppercase, letters and digits only) maintained in save()
+    plate_key = models.CharField(max_length=32, blank=True, default='', editable=False)
     make = models.CharField(max_length=64, blank=True, null=True)
     model = models.CharField(max_length=64, blank=True, null=True)
     vehicle_type = models.CharField(max_length=64, blank=True, null=True)
@@ -156,12 +184,69 @@ class Vehicle(models.Model):
     def __str__(self):
         return f"{self.plate_number} - {self.make or ''} {self.model or ''}"
 
+    def save(self, *args, **kwargs):
+        from .utils import normalize_plate
+        self.plate_key = normalize_plate(self.plate_number)[:32]
+        if self.customer_id:
+            customer = self.customer if Vehicle.customer.is_cached(self) else None
+            if customer is not None and customer.pk == self.customer_id:
+                self.branch_id = customer.branch_id
+            elif self.branch_id is None or self.customer_id != getattr(self, '_loaded_customer_id', None):
+                # New instance, or moved to a customer that is not loaded: branch_id is stale
+                self.branch_id = Customer.objects.filter(pk=self.customer_id).values_list('branch_id', flat=True).first()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            extra = [f for f in ('plate_key', 'branch') if f not in update_fields]
+            if 'plate_number' in update_fields or 'customer' in update_fields:
+                kwargs['update_fields'] = list(update_fields) + extra
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Customer whose branch the stored branch_id reflects; also read by the CustomerStats signal
+        instance._loaded_customer_id = instance.__dict__.get('customer_id')
+        return instance
+
     class Meta:
         indexes = [
             models.Index(fields=["customer"], name="idx_vehicle_customer"),
             models.Index(fields=["plate_number"], name="idx_vehicle_plate"),
+            models.Index(fields=["branch", "plate_key"], name="idx_vehicle_branch_platekey"),
+        ]
+
+
+class CustomerStats(models.Model):
+    """
+    Lifetime order and spend figures per customer, so group analytics read one row per
+    customer instead of joining orders and vehicles. Maintained by
+    tracker.services.CustomerStatsService from order/invoice/vehicle signals; rebuild
+    with `manage.py rebuild_customer_stats`.
+    """
+    customer = models.OneToOneField(Customer, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    total_spent = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_orders = models.PositiveIntegerField(default=0)
+    service_orders = models.PositiveIntegerField(default=0)
+    sales_orders = models.PositiveIntegerField(default=0)
+    labour_orders = models.PositiveIntegerField(default=0)
+    inquiry_orders = models.PositiveIntegerField(default=0)
+    completed_orders = models.PositiveIntegerField(default=0)
+    cancelled_orders = models.PositiveIntegerField(default=0)
+    first_order_at = models.DateTimeField(blank=True, null=True)
+    last_order_at = models.DateTimeField(blank=True, null=True)
+    vehicles_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["total_spent"], name="idx_custstats_spent"),
+            models.Index(fields=["total_orders"], name="idx_custstats_orders"),
+            models.Index(fields=["last_order_at"], name="idx_custstats_last_order"),
         ]
 
+    def __str__(self) -> str:
+        return f"Stats for customer {self.customer_id}"
+
 
 class LabourCode(models.Model):
     """
@@ -268,6 +353,13 @@ class Order(models.Model):
     # Job card/identification number for quick order lookup (optional)
     job_card_number = models.CharField(max_length=64, blank=True, null=True, unique=True)
 
+    # Totals of the invoices linked through OrderInvoiceLink, maintained by OrderInvoiceTotalsService
+    INVOICE_TOTAL_FIELDS = ('invoice_count', 'invoice_net', 'invoice_vat', 'invoice_gross')
+    invoice_count = models.PositiveIntegerField(default=0, editable=False)
+    invoice_net = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    invoice_vat = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    invoice_gross = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+
     def __str__(self):
         return f"{self.order_number} - {self.customer.full_name}"
 
@@ -303,6 +395,14 @@ class Order(models.Model):
             models.Index(fields=["status"], name="idx_order_status"),
             models.Index(fields=["type"], name="idx_order_type"),
             models.Index(fields=["created_at"], name="idx_order_created"),
+            # Branch-scoped lists, KPIs and date ranges (scope_queryset + status/type/created_at)
+            models.Index(fields=["branch", "status", "created_at"], name="idx_order_branch_status_crt"),
+            models.Index(fields=["branch", "type", "created_at"], name="idx_order_branch_type_crt"),
+            models.Index(fields=["branch", "created_at"], name="idx_order_branch_created"),
+            models.Index(fields=["status", "completed_at"], name="idx_order_status_completed"),
+            models.Index(fields=["vehicle", "status"], name="idx_order_vehicle_status"),
+            # Per-customer period counts on the customer group pages
+            models.Index(fields=["customer", "created_at"], name="idx_order_customer_created"),
         ]
 
     def _generate_order_number(self) -> str:
@@ -335,6 +435,13 @@ class Order(models.Model):
             self.status = 'completed'
         super().save(*args, **kwargs)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the CustomerStats signal refresh the previous customer after a reassignment
+        instance._loaded_customer_id = instance.__dict__.get('customer_id')
+        return instance
+
 
 class OrderComponent(models.Model):
     """
@@ -651,11 +758,22 @@ class Invoice(models.Model):
             models.Index(fields=['customer'], name='idx_invoice_customer'),
             models.Index(fields=['order'], name='idx_invoice_order'),
             models.Index(fields=['status'], name='idx_invoice_status'),
+            models.Index(fields=['branch', 'invoice_date', 'invoice_number'], name='idx_invoice_branch_date'),
+            models.Index(fields=['branch', 'created_at'], name='idx_invoice_branch_created'),
+            models.Index(fields=['branch', 'status', 'invoice_date'], name='idx_invoice_branch_status_dt'),
+            models.Index(fields=['vehicle', 'invoice_date'], name='idx_invoice_vehicle_date'),
         ]
 
     def __str__(self) -> str:
         return f"Invoice {self.invoice_number} - {self.customer.full_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the CustomerStats signal refresh the previous customer after a reassignment
+        instance._loaded_customer_id = instance.__dict__.get('customer_id')
+        return instance
+
     def calculate_totals(self):
         """Recalculate totals from line items, considering per-item VAT"""
         line_items = self.line_items.all()
@@ -873,3 +991,17 @@ class InquiryNote(models.Model):
 
     def __str__(self) -> str:
         return f"{self.get_note_type_display()} for Inquiry #{self.inquiry.id}"
+
+
+class SystemSetting(models.Model):
+    """Key/value system setting. Read through tracker.utils.system_settings.get_settings()."""
+    key = models.CharField(max_length=64, unique=True)
+    value = models.JSONField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        ordering = ['key']
+
+    def __str__(self) -> str:
+        return f"{self.key} = {self.value!r}"
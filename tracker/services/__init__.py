@@ -1,5 +1,9 @@
 """Centralized services for business logic."""
 
 from .customer_service import CustomerService, VehicleService, OrderService
+from .kpi_service import OrderKpiService
+from .customer_stats import CustomerStatsService
+from .order_totals import OrderInvoiceTotalsService
+from .invoice_batch import InvoiceBatchService
 
-__all__ = ['CustomerService', 'VehicleService', 'OrderService']
+__all__ = ['CustomerService', 'VehicleService', 'OrderService', 'OrderKpiService', 'CustomerStatsService', 'OrderInvoiceTotalsService', 'InvoiceBatchService']
@@ -7,14 +7,14 @@ import json
 import logging
 from decimal import Decimal
 from datetime import datetime
-from typing import Optional, Dict, Tuple, Any
+from typing import Optional, Dict, Tuple, Any, Iterable
 
 from django.db import transaction, IntegrityError
 from django.utils import timezone
 from django.contrib.auth.models import User
 
 from tracker.models import Customer, Vehicle, Order, InventoryItem, ServiceType, ServiceAddon, Branch
-from tracker.utils import normalize_phone
+from tracker.utils import normalize_phone, normalize_plate
 
 logger = logging.getLogger(__name__)
 
@@ -40,12 +40,11 @@ class CustomerService:
             plate = (plate_number or "").strip().upper()
             if not name or not plate:
                 return None
-            from tracker.models import Vehicle
             vehicle = (
                 Vehicle.objects.select_related("customer")
                 .filter(
-                    plate_number__iexact=plate,
-                    customer__branch=branch,
+                    branch=branch,
+                    plate_key=normalize_plate(plate),
                     customer__full_name__iexact=name,
                 )
                 .first()
@@ -104,24 +103,17 @@ class CustomerService:
             return None
 
         try:
-            # Normalize phone for comparison
+            # Primary match: branch + normalized phone (indexed) + name
             normalized_phone = normalize_phone(phone)
-
-            # Get all potential matches by name and branch
+            if not normalized_phone:
+                return None
             candidates = Customer.objects.filter(
                 branch=branch,
+                phone_normalized=normalized_phone,
                 full_name__iexact=full_name,
             )
 
-            # Check each candidate for phone match (handling normalized numbers)
             for candidate in candidates:
-                candidate_phone = normalize_phone(candidate.phone or '')
-
-                # Primary match: phone (required, normalized)
-                phone_match = normalized_phone == candidate_phone
-                if not phone_match:
-                    continue
-
                 # Secondary match: organization_name and tax_number
                 # Only require exact match if BOTH provided in the query
                 # If either is missing in the query, don't require them to match
@@ -332,6 +324,54 @@ class CustomerService:
 class VehicleService:
     """Service for managing vehicle creation and association."""
 
+    @staticmethod
+    def find_by_plate(branch: Optional[Branch], plate_number: str) -> Optional[Vehicle]:
+        """
+        Find the vehicle for a plate within a branch, ignoring case, spaces and dashes.
+
+        Args:
+            branch: Branch to search (vehicles of branch-less customers when None)
+            plate_number: Plate as typed or extracted ("T 123 ABC", "t123-abc", ...)
+
+        Returns:
+            The Vehicle (with customer loaded) or None
+        """
+        key = normalize_plate(plate_number)
+        if not key:
+            return None
+        return (
+            Vehicle.objects.select_related('customer')
+            .filter(branch=branch, plate_key=key)
+            .order_by('id')
+            .first()
+        )
+
+    @staticmethod
+    def resolve_plates(branch: Optional[Branch], plates: Iterable[str]) -> Dict[str, Vehicle]:
+        """
+        Resolve many plates to vehicles with a single query.
+
+        Args:
+            branch: Branch to search; None searches every branch
+            plates: Plate numbers in any spacing/case
+
+        Returns:
+            Dict mapping each matched plate key (see normalize_plate) to its Vehicle,
+            with customer loaded. When a plate is registered more than once, the
+            oldest vehicle wins, matching the single-plate lookups.
+        """
+        keys = {normalize_plate(p) for p in plates}
+        keys.discard('')
+        if not keys:
+            return {}
+        qs = Vehicle.objects.select_related('customer').filter(plate_key__in=keys)
+        if branch is not None:
+            qs = qs.filter(branch=branch)
+        resolved: Dict[str, Vehicle] = {}
+        for vehicle in qs.order_by('id'):
+            resolved.setdefault(vehicle.plate_key, vehicle)
+        return resolved
+
     @staticmethod
     def create_or_get_vehicle(
         customer: Customer,
@@ -365,7 +405,7 @@ class VehicleService:
             # Try to find existing vehicle for this customer
             vehicle = Vehicle.objects.filter(
                 customer=customer,
-                plate_number__iexact=plate_number
+                plate_key=normalize_plate(plate_number)
             ).first()
 
             if vehicle:
@@ -424,11 +464,7 @@ class OrderService:
 
         plate_number = (plate_number or "").strip().upper()
         try:
-            from tracker.models import Vehicle
-            vehicle = Vehicle.objects.filter(
-                plate_number__iexact=plate_number,
-                customer__branch=branch
-            ).first()
+            vehicle = VehicleService.find_by_plate(branch, plate_number)
 
             if not vehicle:
                 return None
@@ -465,11 +501,7 @@ class OrderService:
 
         plate_number = (plate_number or "").strip().upper()
         try:
-            from tracker.models import Vehicle
-            vehicle = Vehicle.objects.filter(
-                plate_number__iexact=plate_number,
-                customer__branch=branch
-            ).first()
+            vehicle = VehicleService.find_by_plate(branch, plate_number)
 
             if not vehicle:
                 return []
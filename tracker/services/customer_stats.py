@@ -0,0 +1,166 @@
+"""
+Maintenance of the denormalized CustomerStats table.
+
+Each refresh recomputes the affected customers' rows from their own orders, invoices
+and vehicles with three grouped queries, whatever the number of customers, so it is
+cheap enough to run after every order/invoice/vehicle change (tracker/signals.py) and
+for the full rebuild in the rebuild_customer_stats command.
+"""
+
+import logging
+from decimal import Decimal
+from typing import Iterable
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, Max, Min, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from tracker.db_compat import in_date_range
+from tracker.models import Customer, CustomerStats, Invoice, Order, Vehicle
+
+logger = logging.getLogger(__name__)
+
+ORDER_COUNTS = {
+    'total_orders': Q(),
+    'service_orders': Q(type='service'),
+    'sales_orders': Q(type='sales'),
+    'labour_orders': Q(type='labour'),
+    'inquiry_orders': Q(type='inquiry'),
+    'completed_orders': Q(status='completed'),
+    'cancelled_orders': Q(status='cancelled'),
+}
+# Counts the group pages show for the selected period
+PERIOD_COUNTS = ['service_orders', 'sales_orders', 'inquiry_orders', 'completed_orders', 'cancelled_orders']
+STAT_FIELDS = list(ORDER_COUNTS) + ['first_order_at', 'last_order_at', 'vehicles_count', 'total_spent']
+
+
+class CustomerStatsService:
+    """Service for keeping CustomerStats in step with orders, invoices and vehicles."""
+
+    @staticmethod
+    def refresh(customer_ids: Iterable[int]) -> int:
+        """
+        Recompute CustomerStats (and the mirrored Customer.total_spent) for customers.
+
+        Args:
+            customer_ids: Customers whose orders, invoices or vehicles changed
+
+        Returns:
+            Number of customers refreshed
+        """
+        ids = {cid for cid in customer_ids if cid}
+        if not ids:
+            return 0
+        current_spent = dict(Customer.objects.filter(pk__in=ids).values_list('pk', 'total_spent'))
+        if not current_spent:
+            return 0
+        ids = set(current_spent)
+
+        order_rows = (
+            Order.objects.filter(customer_id__in=ids).values('customer_id')
+            .annotate(
+                first_order_at=Min('created_at'),
+                last_order_at=Max('created_at'),
+                **{name: Count('id', filter=cond) for name, cond in ORDER_COUNTS.items()},
+            )
+        )
+        by_customer = {row.pop('customer_id'): row for row in order_rows}
+        spent = dict(
+            Invoice.objects.filter(customer_id__in=ids).exclude(status='cancelled')
+            .values('customer_id').annotate(s=Sum('total_amount')).values_list('customer_id', 's')
+        )
+        vehicles = dict(
+            Vehicle.objects.filter(customer_id__in=ids).values('customer_id')
+            .annotate(c=Count('id')).values_list('customer_id', 'c')
+        )
+
+        rows = []
+        for cid in ids:
+            values = by_customer.get(cid) or {name: 0 for name in ORDER_COUNTS}
+            rows.append(CustomerStats(
+                customer_id=cid,
+                total_spent=spent.get(cid) or Decimal('0'),
+                vehicles_count=vehicles.get(cid, 0),
+                first_order_at=values.get('first_order_at'),
+                last_order_at=values.get('last_order_at'),
+                **{name: values[name] for name in ORDER_COUNTS},
+            ))
+
+        with transaction.atomic():
+            existing = set(CustomerStats.objects.filter(customer_id__in=ids).values_list('customer_id', flat=True))
+            to_update = [r for r in rows if r.customer_id in existing]
+            to_create = [r for r in rows if r.customer_id not in existing]
+            if to_update:
+                CustomerStats.objects.bulk_update(to_update, STAT_FIELDS)
+            if to_create:
+                try:
+                    with transaction.atomic():
+                        CustomerStats.objects.bulk_create(to_create)
+                except IntegrityError:
+                    # Another worker created some of the rows meanwhile
+                    CustomerStats.objects.bulk_create(to_create, ignore_conflicts=True)
+                    CustomerStats.objects.bulk_update(to_create, STAT_FIELDS)
+            # Customer.total_spent is read by existing pages; keep it equal to the stats
+            stale = [
+                Customer(pk=r.customer_id, total_spent=r.total_spent)
+                for r in rows if current_spent.get(r.customer_id) != r.total_spent
+            ]
+            if stale:
+                Customer.objects.bulk_update(stale, ['total_spent'])
+        return len(rows)
+
+    @staticmethod
+    def schedule_refresh(*customer_ids) -> None:
+        """Refresh the given customers once the current transaction commits."""
+        ids = {cid for cid in customer_ids if cid}
+        if not ids:
+            return
+
+        def run():
+            try:
+                CustomerStatsService.refresh(ids)
+            except Exception as e:
+                logger.warning(f"Failed to refresh customer stats for {sorted(ids)}: {e}")
+
+        transaction.on_commit(run)
+
+    @staticmethod
+    def period_orders(since, condition=Q()):
+        """
+        Orders a customer placed from local date ``since`` on, as an annotation expression.
+
+        ``condition`` narrows the count (e.g. an ORDER_COUNTS entry); the subquery is
+        grouped per customer and ranges over the (customer, created_at) index.
+        """
+        counts = (
+            Order.objects.filter(condition, in_date_range('created_at', since), customer=OuterRef('pk'))
+            .order_by().values('customer').annotate(c=Count('id')).values('c')
+        )
+        return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+    @staticmethod
+    def with_stats(queryset, since=None):
+        """
+        Annotate a Customer queryset with the stats under the names the group pages use.
+
+        Without ``since`` every count is a lifetime figure read from CustomerStats, and
+        customers without a stats row read as zero. With ``since`` the per-type and
+        per-status counts and ``recent_orders_count`` cover the orders placed from that
+        local date on; ``total_orders`` and ``vehicles_count`` stay lifetime figures.
+        """
+        def count(field):
+            return Coalesce(F(f'stats__{field}'), Value(0), output_field=IntegerField())
+
+        if since:
+            counts = {name: CustomerStatsService.period_orders(since, ORDER_COUNTS[name]) for name in PERIOD_COUNTS}
+            counts['recent_orders_count'] = CustomerStatsService.period_orders(since)
+        else:
+            counts = {name: count(name) for name in PERIOD_COUNTS}
+            counts['recent_orders_count'] = count('total_orders')
+        return queryset.annotate(
+            total_orders=count('total_orders'),
+            vehicles_count=count('vehicles_count'),
+            first_order_date=F('stats__first_order_at'),
+            last_order_date=F('stats__last_order_at'),
+            **counts,
+        )
@@ -0,0 +1,577 @@
+"""
+Batch upload of invoice documents (end-of-day reconciliation).
+
+A batch goes through two steps, like the single-invoice upload in
+views_invoice_upload.py:
+
+  - prepare(): extract every spooled upload (tracker/utils/upload_spool.py) from disk
+    concurrently, move the documents into a staging directory of storage and match each
+    invoice to a started order by the plate in its reference. Matching, duplicate
+    invoice numbers and item-code categories take one query each for the whole batch.
+    The reviewable batch is kept in the shared cache under a token.
+  - confirm(): move the accepted documents to invoices/, create the invoices, line items,
+    payment records and order links with bulk_create in one transaction, then refresh the
+    denormalized order totals and customer stats that the per-row signals would otherwise
+    maintain. The batch's staging directory is removed.
+
+Batches never confirmed expire from the cache after INVOICE_BATCH_SECONDS; their staged
+documents are removed by purge_staging() (run by the gc_media_blobs command). A batch is
+claimed in the cache before anything is created, so a double submit creates nothing twice.
+
+Entries without a started order are returned for review; the reviewer can point them
+at an order in confirm(), or upload them one by one when a new customer is needed.
+"""
+
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from tracker.models import (
+    Branch, Invoice, InvoiceLineItem, InvoicePayment, LabourCode, Order, OrderInvoiceLink, Salesperson,
+)
+from tracker.utils import normalize_plate, shared_cache
+from tracker.utils.upload_spool import SpooledUpload
+
+from .customer_service import VehicleService
+from .customer_stats import CustomerStatsService
+from .kpi_service import OrderKpiService
+from .order_totals import OrderInvoiceTotalsService
+
+logger = logging.getLogger(__name__)
+
+CACHE_NAMESPACE = 'invoice_batch'
+STAGING_DIR = 'invoice_batch_staging'
+# Attempts at creating a batch when a concurrent upload takes one of its invoice numbers
+CREATE_ATTEMPTS = 3
+
+# Same plate shapes the single upload accepts in the invoice Reference field
+PLATE_PATTERNS = [
+    re.compile(r'^[A-Z]{1,3}\s*-?\s*\d{1,4}[A-Z]?$'),
+    re.compile(r'^[A-Z]{1,3}\d{3,4}$'),
+    re.compile(r'^\d{1,4}[A-Z]{2,3}$'),
+    re.compile(r'^[A-Z]\s*\d{1,4}\s*[A-Z]{2,3}$'),
+]
+PAYMENT_METHODS = {
+    'cash': 'cash', 'cheque': 'cheque', 'chq': 'cheque', 'bank': 'bank_transfer', 'transfer': 'bank_transfer',
+    'card': 'card', 'mpesa': 'mpesa', 'credit': 'on_credit', 'delivery': 'on_delivery', 'cod': 'on_delivery',
+}
+DATE_FORMATS = ('%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%d-%m-%y', '%Y-%m-%d')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def plate_from_reference(reference: Optional[str]) -> Optional[str]:
+    """Plate number in an invoice reference such as "FOR T 290 EJF", or None."""
+    ref = (reference or '').strip().upper()
+    if ref.startswith('FOR'):
+        ref = ref[3:].strip()
+    if ref and any(p.match(ref) for p in PLATE_PATTERNS):
+        return ref.replace('-', '').replace(' ', '')
+    return None
+
+
+def _decimal(value) -> Decimal:
+    try:
+        return Decimal(str(value if value not in (None, '') else '0').replace(',', ''))
+    except (InvalidOperation, ValueError):
+        return Decimal('0')
+
+
+def _parse_date(value):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), fmt).date()
+        except (TypeError, ValueError):
+            continue
+    return timezone.localdate()
+
+
+def _payment_method(extracted: Optional[str]) -> str:
+    extracted = (extracted or '').strip().lower()
+    return next((method for key, method in PAYMENT_METHODS.items() if key in extracted), 'on_delivery')
+
+
+def _code_categories(codes: Iterable[str]) -> Dict[str, str]:
+    """Active LabourCode category per code, in one query."""
+    codes = {str(c).strip() for c in codes if c}
+    if not codes:
+        return {}
+    return dict(LabourCode.objects.filter(code__in=codes, is_active=True).values_list('code', 'category'))
+
+
+def _extract_one(upload) -> dict:
+    from tracker.utils.pdf_text_extractor import extract_from_path
+
+    try:
+        return extract_from_path(upload.path, upload.name)
+    except Exception as e:
+        logger.warning(f"Batch extraction failed for {upload.name}: {e}")
+        return {'success': False, 'message': f'Failed to extract invoice data: {e}'}
+
+
+class InvoiceBatchService:
+    """Service for uploading and confirming many invoice documents at once."""
+
+    @staticmethod
+    def extract(files: List[SpooledUpload]) -> List[dict]:
+        """
+        Extract invoice data from many documents concurrently.
+
+        Args:
+            files: Spooled uploads (see spool_upload)
+
+        Returns:
+            Extraction result per document, in the same order
+        """
+        if not files:
+            return []
+        workers = max(1, min(int(_setting('INVOICE_BATCH_WORKERS', 4) or 1), len(files)))
+        if workers == 1:
+            return [_extract_one(upload) for upload in files]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_extract_one, files))
+
+    @staticmethod
+    def prepare(files: List[SpooledUpload], branch: Optional[Branch], user) -> dict:
+        """
+        Extract, store and match a batch of invoice documents for review.
+
+        Args:
+            files: Spooled uploads; they are moved into storage
+            branch: Branch to match started orders in; None matches every branch
+            user: Uploading user; only they can confirm the batch
+
+        Returns:
+            Dict with the batch token and one entry per document
+        """
+        extracted = InvoiceBatchService.extract(files)
+        token = uuid.uuid4().hex
+
+        entries = []
+        for index, (upload, result) in enumerate(zip(files, extracted)):
+            header = result.get('header') or {}
+            entries.append({
+                'index': index,
+                'filename': upload.name,
+                'document': default_storage.save(f'{STAGING_DIR}/{token}/{upload.name}', upload),
+                'extracted': bool(result.get('success')),
+                'message': result.get('message') or result.get('error') or '',
+                'header': {key: header.get(key) for key in (
+                    'invoice_no', 'code_no', 'customer_name', 'reference', 'date', 'payment_method',
+                    'delivery_terms', 'remarks', 'attended_by', 'kind_attention', 'seller_name',
+                    'seller_address', 'seller_phone', 'seller_email', 'seller_tax_id', 'seller_vat_reg',
+                )},
+                'subtotal': str(_decimal(header.get('subtotal'))),
+                'tax': str(_decimal(header.get('tax'))),
+                'total': str(_decimal(header.get('total'))),
+                'items': [{
+                    'description': (item.get('description') or '').strip(),
+                    'code': (str(item.get('code')).strip() if item.get('code') else None),
+                    'unit': item.get('unit'),
+                    'qty': str(_decimal(item.get('qty') or 1)),
+                    'rate': str(_decimal(item.get('rate'))),
+                    'value': str(_decimal(item.get('value'))),
+                } for item in (result.get('items') or []) if (item.get('description') or '').strip()],
+                'plate': plate_from_reference(header.get('reference')),
+            })
+
+        # Item categories for the whole batch in one query
+        from tracker.utils.order_type_detector import _normalize_category_to_order_type
+        categories = _code_categories(item['code'] for e in entries for item in e['items'])
+        for entry in entries:
+            for item in entry['items']:
+                category = categories.get(item['code'])
+                item['category'] = category or 'Sales'
+                item['order_type'] = _normalize_category_to_order_type(category) if category else 'sales'
+
+        InvoiceBatchService._match(entries, branch)
+
+        batch = {
+            'token': token,
+            'user_id': user.pk,
+            'branch_id': branch.pk if branch else None,
+            'entries': entries,
+        }
+        shared_cache.set(CACHE_NAMESPACE, token, batch, timeout=_setting('INVOICE_BATCH_SECONDS', 4 * 3600))
+        return batch
+
+    @staticmethod
+    def _match(entries: List[dict], branch: Optional[Branch]) -> None:
+        """Fill order / duplicate / status fields of the entries with one query each."""
+        vehicles = VehicleService.resolve_plates(branch, [e['plate'] for e in entries if e['plate']])
+        started = Order.objects.select_related('customer').filter(
+            vehicle_id__in=[v.id for v in vehicles.values()], status='created'
+        ).order_by('vehicle_id', '-created_at')
+        if branch is not None:
+            started = started.filter(branch=branch)
+        order_by_vehicle = {}
+        for order in started:
+            order_by_vehicle.setdefault(order.vehicle_id, order)
+
+        numbers = {e['header']['invoice_no'] for e in entries if e['header']['invoice_no']}
+        existing = set(Invoice.objects.filter(invoice_number__in=numbers).values_list('invoice_number', flat=True))
+
+        for entry in entries:
+            vehicle = vehicles.get(normalize_plate(entry['plate'])) if entry['plate'] else None
+            order = order_by_vehicle.get(vehicle.id) if vehicle else None
+            entry['order_id'] = order.id if order else None
+            entry['order_number'] = order.order_number if order else None
+            entry['customer'] = order.customer.full_name if order else None
+            if not entry['extracted']:
+                entry['status'] = 'failed'
+            elif entry['header']['invoice_no'] in existing:
+                entry['status'] = 'duplicate'
+                entry['message'] = f"Invoice {entry['header']['invoice_no']} already exists"
+            elif order:
+                entry['status'] = 'matched'
+            else:
+                entry['status'] = 'unmatched'
+                entry['message'] = (
+                    f"No started order for plate {entry['plate']}" if entry['plate'] else 'No plate in reference'
+                )
+
+    @staticmethod
+    def get(token: str, user) -> Optional[dict]:
+        """The pending batch for a token, if it belongs to the user."""
+        batch = shared_cache.get(CACHE_NAMESPACE, token) if token else None
+        if not batch or batch['user_id'] != user.pk:
+            return None
+        return batch
+
+    @staticmethod
+    def confirm(batch: dict, user, overrides: Optional[Dict[int, Optional[int]]] = None,
+                restrict_branch: bool = True) -> dict:
+        """
+        Create the invoices of a reviewed batch.
+
+        Args:
+            batch: Batch returned by prepare()/get()
+            user: Confirming user (recorded as created_by)
+            overrides: Entry index -> order id to link to, or None to skip the entry
+            restrict_branch: Only accept override orders from the batch's branch
+
+        Returns:
+            Dict with 'created' (index, invoice_id, invoice_number, order_id per invoice)
+            and 'skipped' (index, reason per entry)
+        """
+        # Claim the batch first: a double submit must not generate a second set of numbers
+        claim = ('confirming', batch['token'])
+        if not shared_cache.add(CACHE_NAMESPACE, claim, user.pk, timeout=_setting('INVOICE_BATCH_SECONDS', 4 * 3600)):
+            raise ValueError('This batch is already being confirmed')
+        try:
+            result = InvoiceBatchService._confirm(batch, user, overrides, restrict_branch)
+        except Exception:
+            # Nothing was created; let the reviewer try again
+            shared_cache.delete(CACHE_NAMESPACE, claim)
+            raise
+        shared_cache.delete(CACHE_NAMESPACE, batch['token'])
+        return result
+
+    @staticmethod
+    def _confirm(batch: dict, user, overrides: Optional[Dict[int, Optional[int]]],
+                 restrict_branch: bool) -> dict:
+        overrides = {int(k): v for k, v in (overrides or {}).items()}
+        wanted = {}
+        skipped = []
+        for entry in batch['entries']:
+            order_id = overrides[entry['index']] if entry['index'] in overrides else entry['order_id']
+            if not entry['extracted'] or entry['status'] == 'duplicate':
+                skipped.append({'index': entry['index'], 'reason': entry['message'] or entry['status']})
+            elif not order_id:
+                skipped.append({'index': entry['index'], 'reason': 'No order selected'})
+            else:
+                wanted[entry['index']] = int(order_id)
+
+        orders = Order.objects.select_related('customer').filter(pk__in=set(wanted.values()))
+        if restrict_branch and batch['branch_id']:
+            orders = orders.filter(branch_id=batch['branch_id'])
+        orders = {o.pk: o for o in orders}
+
+        entries = []
+        for entry in batch['entries']:
+            if entry['index'] not in wanted:
+                continue
+            if wanted[entry['index']] not in orders:
+                skipped.append({'index': entry['index'], 'reason': 'Order not found'})
+                continue
+            entries.append((entry, orders[wanted[entry['index']]]))
+
+        created = []
+        if entries:
+            documents = {}
+            try:
+                for entry, _ in entries:
+                    documents[entry['index']] = InvoiceBatchService._promote(entry['document'])
+                created = InvoiceBatchService._create_with_retry(entries, documents, user, skipped)
+            finally:
+                kept = {c['index'] for c in created}
+                for index, name in documents.items():
+                    if index not in kept:
+                        InvoiceBatchService._delete(name)
+
+        # Staged copies are no longer needed, whether or not their entry was confirmed
+        for entry in batch['entries']:
+            InvoiceBatchService._delete(entry.get('document'))
+        InvoiceBatchService._remove_dir(f"{STAGING_DIR}/{batch['token']}")
+
+        skipped.sort(key=lambda s: s['index'])
+        return {'created': created, 'skipped': skipped}
+
+    @staticmethod
+    def _promote(staged: Optional[str]) -> Optional[str]:
+        """Copy a staged document to invoices/ and return its stored name."""
+        if not staged:
+            return None
+        with default_storage.open(staged) as fh:
+            return default_storage.save(f'invoices/{os.path.basename(staged)}', fh)
+
+    @staticmethod
+    def _delete(name: Optional[str]) -> None:
+        if not name:
+            return
+        try:
+            default_storage.delete(name)
+        except Exception as e:
+            logger.warning(f"Could not delete batch document {name}: {e}")
+
+    @staticmethod
+    def _remove_dir(name: str) -> None:
+        try:
+            os.rmdir(default_storage.path(name))
+        except (NotImplementedError, OSError):
+            pass
+
+    @staticmethod
+    def purge_staging(max_age: Optional[int] = None, dry_run: bool = False) -> int:
+        """
+        Delete staged documents of batches that can no longer be confirmed.
+
+        A batch is abandoned once it has left the cache and its token directory is
+        older than ``max_age``. Documents' own modification times say nothing: with
+        ContentAddressedStorage a staged file shares the mtime of a possibly old blob.
+
+        Args:
+            max_age: Seconds after which a batch is abandoned; defaults to
+                INVOICE_BATCH_SECONDS, the lifetime of a pending batch
+            dry_run: Count without deleting
+
+        Returns:
+            Number of documents removed (or that would be)
+        """
+        max_age = _setting('INVOICE_BATCH_SECONDS', 4 * 3600) if max_age is None else max_age
+        cutoff = time.time() - max_age
+        try:
+            tokens, _ = default_storage.listdir(STAGING_DIR)
+        except (FileNotFoundError, NotImplementedError):
+            return 0
+        removed = 0
+        for token in tokens:
+            directory = f'{STAGING_DIR}/{token}'
+            if shared_cache.get(CACHE_NAMESPACE, token) is not None:
+                continue
+            try:
+                # Set by prepare() while it stores the documents; later never touched
+                if os.path.getmtime(default_storage.path(directory)) > cutoff:
+                    continue
+            except NotImplementedError:
+                pass
+            except OSError:
+                continue
+            _, names = default_storage.listdir(directory)
+            removed += len(names)
+            if not dry_run:
+                for name in names:
+                    InvoiceBatchService._delete(f'{directory}/{name}')
+                InvoiceBatchService._remove_dir(directory)
+        return removed
+
+    @staticmethod
+    def _create_with_retry(entries: List[Tuple[dict, Order]], documents: Dict[int, Optional[str]],
+                           user, skipped: List[dict]) -> List[dict]:
+        """
+        Run _create in a transaction, retrying when an invoice number was taken meanwhile.
+
+        Generated numbers are read from the table without a lock, so a single upload
+        committing between the read and the insert makes the batch's insert fail on the
+        unique invoice_number. The rolled-back attempt is repeated with fresh numbers;
+        extracted numbers that now exist are skipped as duplicates on the next pass.
+        """
+        for attempt in range(1, CREATE_ATTEMPTS + 1):
+            attempt_skipped = list(skipped)
+            try:
+                with transaction.atomic():
+                    created = InvoiceBatchService._create(entries, documents, user, attempt_skipped)
+            except IntegrityError:
+                if attempt == CREATE_ATTEMPTS:
+                    raise
+                logger.info(f"Invoice number taken during batch confirm, retrying ({attempt}/{CREATE_ATTEMPTS})")
+                continue
+            skipped[:] = attempt_skipped
+            return created
+
+    @staticmethod
+    def _create(entries: List[Tuple[dict, Order]], documents: Dict[int, Optional[str]],
+                user, skipped: List[dict]) -> List[dict]:
+        order_ids = {order.pk for _, order in entries}
+        has_primary = set(
+            OrderInvoiceLink.objects.filter(order_id__in=order_ids, is_primary=True).values_list('order_id', flat=True)
+        )
+        numbers = [entry['header']['invoice_no'] for entry, _ in entries if entry['header']['invoice_no']]
+        taken = set(Invoice.objects.filter(invoice_number__in=numbers).values_list('invoice_number', flat=True))
+        generated = iter(InvoiceBatchService._allocate_numbers(
+            sum(1 for entry, _ in entries if not entry['header']['invoice_no'])
+        ))
+        salesperson = Salesperson.get_default()
+
+        invoices, rows = [], []
+        for entry, order in entries:
+            header = entry['header']
+            number = header['invoice_no'] or next(generated)
+            if number in taken:
+                skipped.append({'index': entry['index'], 'reason': f'Invoice {number} already exists'})
+                continue
+            taken.add(number)
+            primary = order.pk not in has_primary
+            has_primary.add(order.pk)
+            notes = [header.get('remarks'), f"Delivery: {header['delivery_terms']}" if header.get('delivery_terms') else None]
+            subtotal, tax = _decimal(entry['subtotal']), _decimal(entry['tax'])
+            invoices.append(Invoice(
+                invoice_number=number,
+                branch_id=order.branch_id,
+                order=order if primary else None,
+                customer_id=order.customer_id,
+                vehicle_id=order.vehicle_id,
+                salesperson=salesperson,
+                invoice_date=_parse_date(header.get('date')),
+                code_no=header.get('code_no') or None,
+                reference=header.get('reference') or None,
+                notes=' | '.join(n for n in notes if n),
+                attended_by=header.get('attended_by') or None,
+                kind_attention=header.get('kind_attention') or None,
+                remarks=header.get('remarks') or None,
+                seller_name=header.get('seller_name') or None,
+                seller_address=header.get('seller_address') or None,
+                seller_phone=header.get('seller_phone') or None,
+                seller_email=header.get('seller_email') or None,
+                seller_tax_id=header.get('seller_tax_id') or None,
+                seller_vat_reg=header.get('seller_vat_reg') or None,
+                subtotal=subtotal or sum((_decimal(i['value']) for i in entry['items']), Decimal('0')),
+                tax_amount=tax,
+                total_amount=_decimal(entry['total']) or (subtotal + tax),
+                document=documents.get(entry['index']),
+                created_by=user,
+            ))
+            rows.append((entry, order, primary))
+        if not invoices:
+            return []
+
+        # bulk_create does not return primary keys on MySQL; read them back by number
+        Invoice.objects.bulk_create(invoices)
+        ids = dict(Invoice.objects.filter(
+            invoice_number__in=[inv.invoice_number for inv in invoices]
+        ).values_list('invoice_number', 'id'))
+        for inv in invoices:
+            inv.pk = ids[inv.invoice_number]
+
+        items, links, payments = [], [], []
+        now = timezone.now()
+        for inv, (entry, order, primary) in zip(invoices, rows):
+            for item in entry['items']:
+                qty, rate, value = _decimal(item['qty']), _decimal(item['rate']), _decimal(item['value'])
+                items.append(InvoiceLineItem(
+                    invoice_id=inv.pk,
+                    code=item['code'],
+                    description=item['description'][:255],
+                    quantity=qty,
+                    unit=item['unit'],
+                    unit_price=rate,
+                    line_total=value or qty * rate,
+                    tax_rate=Decimal('0'),
+                    tax_amount=Decimal('0'),
+                    order_type=item['order_type'],
+                    salesperson=salesperson if item['order_type'] == 'sales' else None,
+                ))
+            links.append(OrderInvoiceLink(order_id=order.pk, invoice_id=inv.pk, is_primary=primary,
+                                          linked_at=now, linked_by=user))
+            if inv.total_amount > 0:
+                payments.append(InvoicePayment(invoice_id=inv.pk, amount=Decimal('0'),
+                                               payment_method=_payment_method(entry['header'].get('payment_method'))))
+        InvoiceLineItem.objects.bulk_create(items)
+        OrderInvoiceLink.objects.bulk_create(links)
+        InvoicePayment.objects.bulk_create(payments)
+
+        touched = {order.pk: order for _, order, _ in rows}
+        InvoiceBatchService._update_order_types(list(touched.values()))
+
+        # Bulk writes skip the signals that maintain these
+        OrderInvoiceTotalsService.refresh(list(touched))
+        CustomerStatsService.refresh({order.customer_id for order in touched.values()})
+        for branch_id in {order.branch_id for order in touched.values()}:
+            OrderKpiService.invalidate(branch_id)
+
+        from tracker.utils.invoice_pdf_cache import prerender_async
+        for inv in invoices:
+            prerender_async(inv.pk)
+
+        return [{
+            'index': entry['index'],
+            'invoice_id': inv.pk,
+            'invoice_number': inv.invoice_number,
+            'order_id': order.pk,
+        } for inv, (entry, order, _) in zip(invoices, rows)]
+
+    @staticmethod
+    def _update_order_types(orders: List[Order]) -> None:
+        """Re-derive order type from the item codes of all linked invoices, as the single upload does."""
+        from tracker.utils.order_type_detector import _normalize_category_to_order_type
+
+        codes_by_order: Dict[int, set] = {order.pk: set() for order in orders}
+        for order_id, code in InvoiceLineItem.objects.filter(
+            invoice__order_links__order_id__in=codes_by_order
+        ).values_list('invoice__order_links__order_id', 'code'):
+            if code:
+                codes_by_order[order_id].add(code.strip())
+        categories = _code_categories(c for codes in codes_by_order.values() for c in codes)
+
+        for order in orders:
+            codes = codes_by_order[order.pk]
+            if not codes:
+                continue
+            found = {categories[c] for c in codes if c in categories}
+            types = {_normalize_category_to_order_type(c) for c in found}
+            if len(found) < len(codes):
+                types.add('sales')
+                found.add('sales')
+            order.type = types.pop() if len(types) == 1 else 'mixed'
+            order.mixed_categories = json.dumps(sorted(found)) if order.type == 'mixed' else None
+            if order.status == 'created' and not order.started_at:
+                order.started_at = order.created_at
+        Order.objects.bulk_update(orders, ['type', 'mixed_categories', 'started_at'])
+
+    @staticmethod
+    def _allocate_numbers(count: int) -> List[str]:
+        """Reserve `count` sequential INV-<year>-NNNNN numbers (see Invoice.generate_invoice_number)."""
+        if count <= 0:
+            return []
+        prefix = f"INV-{datetime.now().year}-"
+        max_seq = 0
+        for number in Invoice.objects.filter(invoice_number__startswith=prefix).values_list('invoice_number', flat=True):
+            try:
+                max_seq = max(max_seq, int(number.split(prefix)[1]))
+            except (IndexError, ValueError):
+                continue
+        return [f"{prefix}{max_seq + i:05d}" for i in range(1, count + 1)]
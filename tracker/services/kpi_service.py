@@ -0,0 +1,107 @@
+"""
+Order KPI strip shared by the orders list and the started-orders dashboard.
+
+Every KPI is a conditional COUNT over the same scoped Order queryset, so they are
+computed together in one aggregate query and cached briefly per branch scope. Order
+saves and deletes invalidate the owning branch (see tracker/signals.py); bulk status
+updates call OrderKpiService.invalidate() without a branch to drop every scope.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from tracker.db_compat import on_date
+from tracker.models import Order
+from tracker.utils import get_user_branch, scope_queryset, shared_cache
+
+ACTIVE_STATUSES = ['created', 'in_progress', 'overdue']
+
+# Temporary customers created from a bare plate ("Plate T123ABC" / "PLATE_...") are
+# placeholders and are left out of the order-list KPIs
+REAL_CUSTOMER = ~Q(customer__full_name__startswith='Plate ', customer__phone__startswith='PLATE_')
+
+
+class OrderKpiService:
+    """Service for computing and caching order KPI counts per branch scope."""
+
+    @staticmethod
+    def _namespace(branch_id) -> str:
+        return f'order_kpis:{branch_id or "all"}'
+
+    @staticmethod
+    def invalidate(branch_id=None) -> None:
+        """
+        Drop cached KPIs after orders change.
+
+        Args:
+            branch_id: Branch of the changed order; None drops every branch scope
+        """
+        if branch_id is None:
+            shared_cache.bump('order_kpis')
+        else:
+            shared_cache.bump(OrderKpiService._namespace(branch_id))
+            shared_cache.bump(OrderKpiService._namespace(None))
+
+    @staticmethod
+    def compute(queryset) -> dict:
+        """
+        Count every KPI for an Order queryset in one aggregate query
+        (plus one grouped query for repeated vehicles).
+
+        Args:
+            queryset: Order queryset already scoped to the user's branch
+
+        Returns:
+            Dict of KPI name -> count
+        """
+        today = timezone.localdate()
+        kpis = queryset.aggregate(
+            total_orders=Count('id', filter=REAL_CUSTOMER),
+            pending_orders=Count('id', filter=REAL_CUSTOMER & Q(status='created')),
+            active_orders=Count('id', filter=REAL_CUSTOMER & Q(status__in=ACTIVE_STATUSES)),
+            completed_today=Count('id', filter=REAL_CUSTOMER & Q(status='completed') & on_date('completed_at', today)),
+            urgent_orders=Count('id', filter=REAL_CUSTOMER & Q(priority='urgent')),
+            overdue_count=Count('id', filter=REAL_CUSTOMER & Q(status='overdue')),
+            started_total=Count('id', filter=Q(status__in=ACTIVE_STATUSES)),
+            started_pending=Count('id', filter=Q(status='in_progress')),
+            started_completed=Count('id', filter=Q(status='completed')),
+            today_started=Count('id', filter=Q(status__in=ACTIVE_STATUSES) & on_date('created_at', today)),
+        )
+        # Vehicles with 2+ orders created today
+        kpis['repeated_vehicles_today'] = (
+            queryset.filter(on_date('created_at', today), vehicle__isnull=False)
+            .values('vehicle__plate_number').annotate(order_count=Count('id'))
+            .filter(order_count__gte=2).count()
+        )
+        return kpis
+
+    @staticmethod
+    def get_kpis(user, request=None) -> dict:
+        """
+        Return the KPI counts for the orders a user can see, from cache when fresh.
+
+        Args:
+            user: Requesting user (scoped to their branch unless superuser)
+            request: Optional request, for the superuser ?branch= filter
+
+        Returns:
+            Dict of KPI name -> count
+        """
+        queryset = scope_queryset(Order.objects.all(), user, request)
+        if queryset.query.is_empty():
+            # User without a branch sees no orders
+            return OrderKpiService.compute(queryset)
+        branch = None if getattr(user, 'is_superuser', False) else get_user_branch(user)
+        branch_id = getattr(branch, 'id', None)
+        sql, params = queryset.query.sql_with_params()
+        scope = hashlib.sha1(f'{sql}|{params!r}'.encode('utf-8')).hexdigest()
+        # The global generation key lets invalidate() without a branch reach every scope
+        parts = (shared_cache.make_key('order_kpis'), scope, timezone.localdate().isoformat())
+        timeout = getattr(settings, 'ORDER_KPI_CACHE_SECONDS', 30)
+        return shared_cache.get_or_compute(
+            OrderKpiService._namespace(branch_id), parts,
+            lambda: OrderKpiService.compute(queryset), timeout=timeout,
+        )
@@ -0,0 +1,91 @@
+"""
+Denormalized invoice totals on Order.
+
+Order.invoice_count / invoice_net / invoice_vat / invoice_gross hold the sums over the
+invoices linked to the order through OrderInvoiceLink, so reading an order's
+financials is a single-row fetch. They are recomputed in one UPDATE with correlated
+subqueries whenever a link, an invoice or a line item changes (tracker/signals.py),
+and for every order by the backfill_order_invoice_totals command.
+"""
+
+import logging
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from tracker.models import Order, OrderInvoiceLink
+
+logger = logging.getLogger(__name__)
+
+TOTAL_FIELDS = {
+    'invoice_net': 'invoice__subtotal',
+    'invoice_vat': 'invoice__tax_amount',
+    'invoice_gross': 'invoice__total_amount',
+}
+
+
+def _linked(aggregate, output_field):
+    """Correlated subquery aggregating the links of the outer order."""
+    return Coalesce(
+        Subquery(
+            OrderInvoiceLink.objects.filter(order_id=OuterRef('pk')).order_by()
+            .values('order_id').annotate(v=aggregate).values('v'),
+            output_field=output_field,
+        ),
+        Value(0),
+        output_field=output_field,
+    )
+
+
+class OrderInvoiceTotalsService:
+    """Service for keeping Order invoice totals in step with linked invoices."""
+
+    @staticmethod
+    def refresh(order_ids: Iterable[int]) -> int:
+        """
+        Recompute the invoice totals of orders in a single UPDATE.
+
+        Args:
+            order_ids: Orders whose links or linked invoices changed
+
+        Returns:
+            Number of orders updated
+        """
+        ids = {oid for oid in order_ids if oid}
+        if not ids:
+            return 0
+        money = DecimalField(max_digits=14, decimal_places=2)
+        values = {name: _linked(Sum(path), money) for name, path in TOTAL_FIELDS.items()}
+        values['invoice_count'] = _linked(Count('invoice_id'), IntegerField())
+        return Order.objects.filter(pk__in=ids).update(**values)
+
+    @staticmethod
+    def schedule_refresh(order_ids: Iterable[int] = (), invoice_ids: Iterable[int] = ()) -> None:
+        """
+        Refresh orders once the current transaction commits.
+
+        Args:
+            order_ids: Orders to refresh
+            invoice_ids: Invoices whose linked orders should be refreshed; resolved at
+                commit time so links created later in the same transaction are included
+        """
+        order_ids = {oid for oid in order_ids if oid}
+        invoice_ids = {iid for iid in invoice_ids if iid}
+        if not order_ids and not invoice_ids:
+            return
+
+        def run():
+            try:
+                ids = set(order_ids)
+                if invoice_ids:
+                    ids.update(
+                        OrderInvoiceLink.objects.filter(invoice_id__in=invoice_ids)
+                        .values_list('order_id', flat=True)
+                    )
+                OrderInvoiceTotalsService.refresh(ids)
+            except Exception as e:
+                logger.warning(f"Failed to refresh invoice totals for orders {sorted(order_ids)} / invoices {sorted(invoice_ids)}: {e}")
+
+        transaction.on_commit(run)
@@ -1,7 +1,10 @@
 from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from .utils import add_audit_log
+from .models import Invoice, InvoiceLineItem, Order, OrderInvoiceLink, Vehicle
+from .services import CustomerStatsService, OrderInvoiceTotalsService, OrderKpiService
+from .utils import add_audit_log, shared_cache
 
 
 def _client_ip(request):
@@ -32,3 +35,50 @@ def on_user_login_failed(sender, credentials, request, **kwargs):
     ua = (request.META.get('HTTP_USER_AGENT') if request else '') or ''
     ua = ua[:200]
     add_audit_log(None, 'login_failed', f'Username: {username} from {ip or "?"} UA: {ua}')
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def on_order_changed(sender, instance, **kwargs):
+    OrderKpiService.invalidate(instance.branch_id)
+    _refresh_customer_stats(instance)
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def on_dashboard_data_changed(sender, instance, **kwargs):
+    # Drops the cached dashboard metrics of every scope (see views.dashboard)
+    shared_cache.bump('dashboard')
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+@receiver(post_save, sender=Vehicle)
+@receiver(post_delete, sender=Vehicle)
+def on_customer_activity_changed(sender, instance, **kwargs):
+    _refresh_customer_stats(instance)
+
+def _refresh_customer_stats(instance):
+    # Also refresh the previous customer when an order/invoice was moved to another one
+    CustomerStatsService.schedule_refresh(instance.customer_id, getattr(instance, '_loaded_customer_id', None))
+    instance._loaded_customer_id = instance.customer_id
+
+@receiver(post_save, sender=OrderInvoiceLink)
+@receiver(post_delete, sender=OrderInvoiceLink)
+def on_invoice_link_changed(sender, instance, **kwargs):
+    OrderInvoiceTotalsService.schedule_refresh(order_ids=[instance.order_id])
+
+@receiver(post_save, sender=Order)
+def on_order_saved(sender, instance, created, update_fields=None, **kwargs):
+    # A full save writes the totals the instance was loaded with; recompute them so
+    # values that changed since it was loaded are not left overwritten
+    if not created and (update_fields is None or set(update_fields) & set(Order.INVOICE_TOTAL_FIELDS)):
+        OrderInvoiceTotalsService.schedule_refresh(order_ids=[instance.pk])
+
+@receiver(post_save, sender=Invoice)
+def on_invoice_saved(sender, instance, **kwargs):
+    OrderInvoiceTotalsService.schedule_refresh(invoice_ids=[instance.pk])
+
+@receiver(post_save, sender=InvoiceLineItem)
+@receiver(post_delete, sender=InvoiceLineItem)
+def on_invoice_line_item_changed(sender, instance, **kwargs):
+    OrderInvoiceTotalsService.schedule_refresh(invoice_ids=[instance.invoice_id])
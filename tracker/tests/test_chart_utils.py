@@ -0,0 +1,49 @@
+import base64
+from datetime import datetime
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from tracker.utils import chart_utils
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'chart-tests'}}
+
+
+@override_settings(CACHES=LOCMEM, CHART_CACHE_ENTRIES=2)
+class ChartRenderCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        chart_utils._lru.clear()
+        patcher = mock.patch.object(chart_utils, 'charts_available', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.render = mock.Mock(side_effect=lambda payload: payload['title'].encode())
+        patcher = mock.patch.object(chart_utils, '_render_monthly_trend', self.render)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_same_series_is_rendered_once(self):
+        data = [{'month': datetime(2024, 1, 1), 'orders': 3}, {'month': datetime(2024, 3, 1), 'orders': 5}]
+        first = chart_utils.generate_monthly_trend_chart(data, title='Trend')
+        chart_utils._lru.clear()
+        second = chart_utils.generate_monthly_trend_chart(list(data), title='Trend')
+
+        self.assertEqual(base64.b64decode(first), b'Trend')
+        self.assertEqual(first, second)
+        self.render.assert_called_once()
+        payload = self.render.call_args.args[0]
+        self.assertEqual(payload['months'], ['2024-01-01', '2024-02-01', '2024-03-01'])
+        self.assertEqual(payload['orders'], [3, 0, 5])
+
+        chart_utils.generate_monthly_trend_chart(data, title='Trend', width=8)
+        self.assertEqual(self.render.call_count, 2)
+
+    def test_local_lru_is_bounded(self):
+        data = [{'month': '2024-05-01', 'orders': 1}]
+        for title in ('a', 'b', 'c'):
+            chart_utils.generate_monthly_trend_chart(data, title=title)
+        self.assertEqual(len(chart_utils._lru), 2)
+
+    def test_no_chart_without_data(self):
+        self.assertIsNone(chart_utils.generate_monthly_trend_chart([], title='Empty'))
+        self.render.assert_not_called()
@@ -0,0 +1,52 @@
+import io
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from tracker.models import Branch, Customer, Profile
+from tracker.services import CustomerService
+
+
+class CustomerDedupTests(TestCase):
+
+    def setUp(self):
+        self.branch = Branch.objects.create(name='Main', code='MAIN')
+
+    def test_save_maintains_phone_normalized(self):
+        c = Customer.objects.create(full_name='Jane Doe', phone='+255 712-345-678', branch=self.branch)
+        self.assertEqual(c.phone_normalized, '255712345678')
+        c.phone = '0712 000 111'
+        c.save(update_fields=['phone'])
+        c.refresh_from_db()
+        self.assertEqual(c.phone_normalized, '0712000111')
+
+    def test_duplicate_lookup_is_single_query(self):
+        Customer.objects.bulk_create([
+            Customer(code=f'C{i}', full_name='John Smith', phone=f'07000{i:05d}',
+                     phone_normalized=f'07000{i:05d}', branch=self.branch)
+            for i in range(200)
+        ])
+        target = Customer.objects.create(full_name='John Smith', phone='0799 123 456', branch=self.branch)
+        with self.assertNumQueries(1):
+            found = CustomerService.find_duplicate_customer(self.branch, 'john smith', '+0799-123-456')
+        self.assertEqual(found, target)
+
+    def test_backfill_command(self):
+        Customer.objects.bulk_create([Customer(code='OLD1', full_name='Old', phone='+255 700 111 222', branch=self.branch)])
+        call_command('backfill_phone_normalized', stdout=io.StringIO())
+        self.assertEqual(Customer.objects.get(code='OLD1').phone_normalized, '255700111222')
+
+    def test_duplicate_check_spans_branches(self):
+        other = Branch.objects.create(name='North', code='NORTH')
+        existing = Customer.objects.create(full_name='Jane Doe', phone='0712 345 678', branch=other,
+                                           customer_type='personal')
+        user = User.objects.create_user('clerk', password='pass')
+        Profile.objects.update_or_create(user=user, defaults={'branch': self.branch})
+        self.client.login(username='clerk', password='pass')
+        data = self.client.get(reverse('tracker:api_check_customer_duplicate'), {
+            'full_name': 'Jane Doe', 'phone': '0712 345 678', 'customer_type': 'personal',
+        }).json()
+        self.assertTrue(data['exists'])
+        self.assertEqual(data['customer']['id'], existing.id)
@@ -0,0 +1,81 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from tracker.models import Branch, Customer, CustomerStats, Invoice, Order, Vehicle
+from tracker.services import CustomerStatsService
+
+
+class CustomerStatsTests(TestCase):
+
+    def setUp(self):
+        self.branch = Branch.objects.create(name='Main', code='MAIN')
+        self.customer = Customer.objects.create(full_name='Jane Doe', phone='0712345678', branch=self.branch)
+
+    def _stats(self, customer=None):
+        return CustomerStats.objects.get(customer=customer or self.customer)
+
+    def test_signals_keep_stats_current(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicle = Vehicle.objects.create(customer=self.customer, plate_number='T100AAA')
+            order = Order.objects.create(customer=self.customer, branch=self.branch, vehicle=vehicle,
+                                         type='service', status='completed')
+            Order.objects.create(customer=self.customer, branch=self.branch, type='sales', status='cancelled')
+            Invoice.objects.create(customer=self.customer, branch=self.branch, order=order,
+                                   total_amount=Decimal('354.00'))
+        stats = self._stats()
+        self.assertEqual(stats.total_orders, 2)
+        self.assertEqual(stats.service_orders, 1)
+        self.assertEqual(stats.sales_orders, 1)
+        self.assertEqual(stats.completed_orders, 1)
+        self.assertEqual(stats.cancelled_orders, 1)
+        self.assertEqual(stats.vehicles_count, 1)
+        self.assertEqual(stats.total_spent, Decimal('354.00'))
+        self.assertEqual(stats.last_order_at, Order.objects.latest('created_at').created_at)
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.total_spent, Decimal('354.00'))
+
+    def test_moving_an_order_refreshes_both_customers(self):
+        other = Customer.objects.create(full_name='John Roe', phone='0787654321', branch=self.branch)
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(customer=self.customer, branch=self.branch, type='service')
+        order = Order.objects.get(pk=order.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            order.customer = other
+            order.save()
+        self.assertEqual(self._stats().total_orders, 0)
+        self.assertEqual(self._stats(other).total_orders, 1)
+
+    def test_rebuild_command_and_group_annotations(self):
+        Order.objects.bulk_create([
+            Order(customer=self.customer, branch=self.branch, order_number=f'BULK{i}', type='inquiry', status='completed')
+            for i in range(3)
+        ])
+        self.assertFalse(CustomerStats.objects.exists())
+        call_command('rebuild_customer_stats', stdout=StringIO())
+        self.assertEqual(self._stats().inquiry_orders, 3)
+
+        row = CustomerStatsService.with_stats(Customer.objects.filter(pk=self.customer.pk)).get()
+        self.assertEqual(row.recent_orders_count, 3)
+        self.assertEqual(row.completed_orders, 3)
+        self.assertEqual(row.vehicles_count, 0)
+
+    def test_recent_orders_count_follows_the_period(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.create(customer=self.customer, branch=self.branch, type='service')
+            old = Order.objects.create(customer=self.customer, branch=self.branch, type='sales')
+        Order.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=100))
+
+        customers = Customer.objects.filter(pk=self.customer.pk)
+        since = timezone.localdate() - timedelta(days=30)
+        self.assertEqual(CustomerStatsService.with_stats(customers).get().recent_orders_count, 2)
+        row = CustomerStatsService.with_stats(customers, since=since).get()
+        self.assertEqual((row.recent_orders_count, row.total_orders), (1, 2))
+        self.assertEqual((row.service_orders, row.sales_orders), (1, 0))
+        self.assertEqual(
+            CustomerStatsService.with_stats(customers, since=since).filter(recent_orders_count__gte=2).count(), 0
+        )
@@ -0,0 +1,43 @@
+from datetime import date, datetime, time, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from tracker.db_compat import day_bounds, in_date_range, on_date
+from tracker.models import Branch, Customer, Order
+
+
+class DateRangeFilterTests(TestCase):
+
+    def setUp(self):
+        branch = Branch.objects.create(name='Main', code='MAIN')
+        customer = Customer.objects.create(full_name='Jane Doe', phone='0712345678', branch=branch)
+        self.day = date(2024, 3, 10)
+        midnight = timezone.make_aware(datetime.combine(self.day, time.min))
+        # Either side of local midnight at both ends of the day
+        for i, offset in enumerate((-1, 0, 1, 24 * 3600 - 1, 24 * 3600)):
+            Order.objects.create(
+                order_number=f'O-{i}', branch=branch, customer=customer, type='service',
+                created_at=midnight + timedelta(seconds=offset),
+            )
+
+    def test_matches_date_lookups(self):
+        orders = Order.objects.all()
+        self.assertQuerySetEqual(
+            orders.filter(on_date('created_at', self.day)).order_by('pk'),
+            orders.filter(created_at__date=self.day).order_by('pk'),
+        )
+        self.assertEqual(orders.filter(on_date('created_at', self.day)).count(), 3)
+        start, end = self.day - timedelta(days=1), self.day
+        self.assertQuerySetEqual(
+            orders.filter(in_date_range('created_at', start, end)).order_by('pk'),
+            orders.filter(created_at__date__gte=start, created_at__date__lte=end).order_by('pk'),
+        )
+        self.assertEqual(orders.filter(in_date_range('created_at', self.day + timedelta(days=1))).count(), 1)
+
+    def test_filters_compare_the_column_directly(self):
+        sql = str(Order.objects.filter(on_date('created_at', self.day)).query)
+        self.assertNotIn('cast_date', sql)
+        start, end = day_bounds(timezone.make_aware(datetime.combine(self.day, time(15))))
+        self.assertEqual(end - start, timedelta(days=1))
+        self.assertEqual(timezone.localtime(start).date(), self.day)
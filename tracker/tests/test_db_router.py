@@ -0,0 +1,64 @@
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase
+
+from tracker import db_router
+from tracker.middleware import ReplicaPinMiddleware
+from tracker.models import Branch, Order
+
+# A second alias for the same database, standing in for a replica
+REPLICA = {**connections.databases[DEFAULT_DB_ALIAS]}
+
+
+class ReplicaRouterTests(TransactionTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(connections.databases, {'replica': REPLICA})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = db_router.ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def _run_request(self, request, view):
+        """Run ``view`` behind ReplicaPinMiddleware and return (response, read alias seen by the view)."""
+        seen = {}
+
+        @db_router.read_replica
+        def wrapped(req):
+            seen['db'] = self.router.db_for_read(Order)
+            return view(req)
+
+        return ReplicaPinMiddleware(wrapped)(request), seen['db']
+
+    def test_reads_go_to_replica_until_a_write(self):
+        with db_router.use_replica():
+            token = db_router._wrote.set(False)
+            try:
+                self.assertEqual(self.router.db_for_read(Order), 'replica')
+                with transaction.atomic():
+                    self.assertIsNone(self.router.db_for_read(Order))
+                self.assertEqual(self.router.db_for_write(Branch), DEFAULT_DB_ALIAS)
+                self.assertIsNone(self.router.db_for_read(Order))
+            finally:
+                db_router._wrote.reset(token)
+        self.assertIsNone(self.router.db_for_read(Order))
+        self.assertFalse(self.router.allow_migrate('replica', 'tracker'))
+
+    def test_browser_is_pinned_to_primary_after_writing(self):
+        response, db = self._run_request(self.factory.get('/'), lambda req: HttpResponse())
+        self.assertEqual(db, 'replica')
+        self.assertNotIn(db_router.PIN_COOKIE, response.cookies)
+
+        def write(req):
+            Branch.objects.create(name='Main', code='MAIN')
+            return HttpResponse()
+
+        response, db = self._run_request(self.factory.get('/'), write)
+        self.assertEqual(response.cookies[db_router.PIN_COOKIE]['max-age'], db_router.pin_seconds())
+
+        request = self.factory.get('/')
+        request.COOKIES[db_router.PIN_COOKIE] = '1'
+        _, db = self._run_request(request, lambda req: HttpResponse())
+        self.assertIsNone(db)
@@ -0,0 +1,43 @@
+"""
+Golden-output checks for invoice PDF extraction on the synthetic corpus.
+
+Only the smaller documents run here; ``manage.py benchmark_extraction`` checks the
+full corpus. Regenerate the golden file with ``--update-golden`` after an intended
+parser change.
+"""
+
+import json
+import logging
+
+from django.test import SimpleTestCase
+
+from tracker.utils.invoice_corpus import GOLDEN_PATH, golden_view, iter_corpus
+from tracker.utils.pdf_text_extractor import extract_from_bytes
+
+
+class ExtractionGoldenTests(SimpleTestCase):
+
+    DOCUMENTS = ['pi_1p_5items', 'pi_1p_25items', 'pi_5p']
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.golden = json.loads(GOLDEN_PATH.read_text())
+        logging.disable(logging.INFO)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+        super().tearDownClass()
+
+    def test_corpus_matches_golden(self):
+        for name, pages, items, pdf_bytes in iter_corpus(self.DOCUMENTS):
+            with self.subTest(document=name):
+                result = extract_from_bytes(pdf_bytes, f'{name}.pdf')
+                self.assertTrue(result['success'])
+                self.assertEqual(json.loads(json.dumps(golden_view(result))), self.golden[name])
+
+    def test_corpus_is_deterministic(self):
+        (_, _, _, first), = iter_corpus(['pi_1p_5items'])
+        (_, _, _, second), = iter_corpus(['pi_1p_5items'])
+        self.assertEqual(first, second)
@@ -0,0 +1,58 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import TestCase
+from django.utils import timezone
+
+from tracker.management.commands.index_advisor import explain, missing_indexes, record_selects
+from tracker.models import Branch, Customer, Invoice, Order
+
+
+def _sql(qs):
+    return qs.query.sql_with_params()
+
+
+class IndexAdvisorTests(TestCase):
+
+    def setUp(self):
+        User.objects.create_superuser(username='admin', password='pass', email='a@example.com')
+        self.branch = Branch.objects.create(name='Main', code='MAIN')
+        customer = Customer.objects.create(full_name='Jane Doe', phone='0712345678', branch=self.branch)
+        Order.objects.create(order_number='O-1', branch=self.branch, customer=customer, type='service')
+
+    def test_branch_scoped_filters_use_composite_indexes(self):
+        since = timezone.now() - timedelta(days=30)
+        for qs in (
+            Order.objects.filter(branch=self.branch, status='completed', created_at__gte=since),
+            Order.objects.filter(branch=self.branch, type='sales', created_at__gte=since),
+            Customer.objects.filter(branch=self.branch, registration_date__gte=since),
+            Invoice.objects.filter(branch=self.branch, invoice_date__gte=since.date()),
+        ):
+            self.assertEqual(explain(*_sql(qs)), [], qs.query)
+        self.assertTrue(explain('SELECT * FROM tracker_order'))
+        self.assertEqual(missing_indexes(), [])
+
+    def test_reports_endpoints(self):
+        out = StringIO()
+        call_command('index_advisor', '--endpoint', 'tracker:orders_list', stdout=out)
+        self.assertIn('tracker:orders_list [200]', out.getvalue())
+        self.assertIn('indexes missing', out.getvalue())
+        self.assertTrue(Order.objects.filter(order_number='O-1').exists())
+
+    def test_selects_are_explained_on_the_alias_that_ran_them(self):
+        # A second alias for the same database, standing in for a replica
+        patcher = mock.patch.dict(connections.databases, {'replica': {**connections.databases[DEFAULT_DB_ALIAS]}})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connections.__delitem__, 'replica')
+
+        with record_selects() as recorder:
+            list(Order.objects.filter(branch=self.branch, type='sales'))
+            list(Invoice.objects.using('replica').filter(branch=self.branch))
+        self.assertEqual({alias for alias, _ in recorder.selects}, {DEFAULT_DB_ALIAS, 'replica'})
+        for (alias, sql), params in recorder.selects.items():
+            self.assertEqual(explain(sql, params, using=alias), [], sql)
@@ -0,0 +1,181 @@
+import json
+import os
+import tempfile
+import time
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from tracker.models import Branch, Customer, Invoice, LabourCode, Order, OrderInvoiceLink, Profile, Vehicle
+from tracker.services.invoice_batch import CACHE_NAMESPACE
+from tracker.utils import shared_cache
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'invoice-batch-tests'}}
+
+
+def _extracted(invoice_no, reference, items):
+    return {
+        'success': True,
+        'header': {'invoice_no': invoice_no, 'reference': reference, 'date': '05/03/2025',
+                   'subtotal': '100.00', 'tax': '18.00', 'total': '118.00', 'payment_method': 'Cash'},
+        'items': items,
+    }
+
+
+@override_settings(CACHES=LOCMEM, INVOICE_BATCH_WORKERS=2, INVOICE_PDF_PRERENDER=False)
+class InvoiceBatchTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.branch = Branch.objects.create(name='Main', code='MAIN')
+        self.customer = Customer.objects.create(full_name='Jane Doe', phone='0712345678', branch=self.branch)
+        self.vehicle = Vehicle.objects.create(customer=self.customer, plate_number='T 290 EJF')
+        self.order = Order.objects.create(customer=self.customer, branch=self.branch, vehicle=self.vehicle,
+                                          type='service', status='created')
+        LabourCode.objects.create(code='22007', description='Wheel alignment', category='tyre service')
+        Invoice.objects.create(invoice_number='INV-OLD', customer=self.customer, branch=self.branch)
+
+        user = User.objects.create_user('clerk', password='pass')
+        Profile.objects.update_or_create(user=user, defaults={'branch': self.branch})
+        self.client.login(username='clerk', password='pass')
+
+    def _preview(self, results):
+        files = [SimpleUploadedFile(f'inv{i}.pdf', b'%PDF-1.4 test', content_type='application/pdf')
+                 for i in range(len(results))]
+        by_name = {f'inv{i}.pdf': r for i, r in enumerate(results)}
+        with mock.patch('tracker.utils.pdf_text_extractor.extract_from_path',
+                        side_effect=lambda path, name: by_name[name]):
+            return self.client.post(reverse('tracker:api_invoice_batch_preview'), {'files': files}).json()
+
+    def test_preview_matches_and_confirm_creates_invoices(self):
+        items = [{'description': 'Wheel alignment', 'code': '22007', 'qty': 1, 'rate': 60, 'value': 60},
+                 {'description': 'Valve', 'code': '3100', 'qty': 2, 'rate': 20, 'value': 40}]
+        data = self._preview([
+            _extracted('INV-A', 'FOR T 290 EJF', items),
+            _extracted('INV-B', 't290 ejf', items[:1]),
+            _extracted('INV-C', 'T 999 XYZ', items),
+            _extracted('INV-OLD', 'FOR T 290 EJF', items),
+            {'success': False, 'message': 'Unreadable'},
+        ])
+        self.assertTrue(data['success'])
+        statuses = [e['status'] for e in data['entries']]
+        self.assertEqual(statuses, ['matched', 'matched', 'unmatched', 'duplicate', 'failed'])
+        self.assertEqual(data['entries'][0]['order_id'], self.order.id)
+        self.assertEqual(data['entries'][0]['items'][0]['order_type'], 'service')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = self.client.post(
+                reverse('tracker:api_invoice_batch_confirm'),
+                json.dumps({'batch': data['batch'], 'orders': {'2': self.order.id}}),
+                content_type='application/json',
+            ).json()
+
+        self.assertEqual([c['index'] for c in result['created']], [0, 1, 2])
+        self.assertEqual([s['index'] for s in result['skipped']], [3, 4])
+        links = OrderInvoiceLink.objects.filter(order=self.order).order_by('invoice__invoice_number')
+        self.assertEqual([(l.invoice.invoice_number, l.is_primary) for l in links],
+                         [('INV-A', True), ('INV-B', False), ('INV-C', False)])
+        first = Invoice.objects.get(invoice_number='INV-A')
+        self.assertEqual(first.order_id, self.order.id)
+        self.assertEqual(first.line_items.count(), 2)
+        self.assertEqual(first.payment.payment_method, 'cash')
+        self.assertTrue(first.document.name.startswith('invoices/'))
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.invoice_count, 3)
+        self.assertEqual(self.order.invoice_gross, Decimal('354.00'))
+        self.assertEqual(self.order.type, 'mixed')
+        self.assertEqual(json.loads(self.order.mixed_categories), ['sales', 'tyre service'])
+
+        # A batch can only be confirmed once
+        again = self.client.post(reverse('tracker:api_invoice_batch_confirm'),
+                                 json.dumps({'batch': data['batch']}), content_type='application/json')
+        self.assertEqual(again.status_code, 404)
+
+    def test_staged_documents_are_cleaned_up(self):
+        from tracker.services.invoice_batch import STAGING_DIR, InvoiceBatchService
+
+        items = [{'description': 'Valve', 'code': '3100', 'qty': 1, 'rate': 20, 'value': 20}]
+        data = self._preview([_extracted('INV-A', 'FOR T 290 EJF', items),
+                              _extracted('INV-B', 'T 999 XYZ', items)])
+        batch = InvoiceBatchService.get(data['batch'], User.objects.get(username='clerk'))
+        staged = [e['document'] for e in batch['entries']]
+        self.assertTrue(all(name.startswith(f"{STAGING_DIR}/{data['batch']}/") for name in staged))
+
+        self.client.post(reverse('tracker:api_invoice_batch_confirm'), json.dumps({'batch': data['batch']}),
+                         content_type='application/json')
+        self.assertFalse(any(default_storage.exists(name) for name in staged))
+        document = Invoice.objects.get(invoice_number='INV-A').document
+        self.assertTrue(document.name.startswith('invoices/') and default_storage.exists(document.name))
+
+        # A batch that is never confirmed leaves its documents until they expire
+        token = self._preview([_extracted('INV-C', 'FOR T 290 EJF', items)])['batch']
+        abandoned = InvoiceBatchService.get(token, User.objects.get(username='clerk'))['entries'][0]['document']
+        # Staged files may share the mtime of an old blob; that does not make the batch old
+        old = time.time() - 10 * 3600
+        os.utime(default_storage.path(abandoned), (old, old))
+        self.assertEqual(InvoiceBatchService.purge_staging(), 0)
+        self.assertEqual(InvoiceBatchService.purge_staging(max_age=-1), 0)
+        shared_cache.delete(CACHE_NAMESPACE, token)
+        self.assertEqual(InvoiceBatchService.purge_staging(), 0)
+        self.assertEqual(InvoiceBatchService.purge_staging(max_age=-1), 1)
+        self.assertFalse(default_storage.exists(abandoned))
+
+    def test_a_batch_is_confirmed_once_and_can_be_retried_after_a_failure(self):
+        from tracker.services.invoice_batch import InvoiceBatchService
+
+        items = [{'description': 'Valve', 'code': '3100', 'qty': 1, 'rate': 20, 'value': 20}]
+        data = self._preview([_extracted(None, 'FOR T 290 EJF', items), _extracted(None, 'FOR T 290 EJF', items)])
+        user = User.objects.get(username='clerk')
+        batch = InvoiceBatchService.get(data['batch'], user)
+
+        # The second document cannot be read: the first one's promoted copy is removed again
+        promote = InvoiceBatchService._promote
+        with mock.patch.object(InvoiceBatchService, '_promote',
+                               side_effect=[promote(batch['entries'][0]['document']), FileNotFoundError]):
+            with self.assertRaises(FileNotFoundError):
+                InvoiceBatchService.confirm(batch, user)
+        _, promoted = default_storage.listdir('invoices')
+        self.assertEqual(promoted, [])
+
+        # A confirm already running holds the batch; a second submit meanwhile creates nothing
+        create = InvoiceBatchService._create_with_retry
+        second = []
+
+        def create_during_second_submit(*args):
+            with self.assertRaises(ValueError):
+                InvoiceBatchService.confirm(batch, user)
+            second.append(True)
+            return create(*args)
+
+        with mock.patch.object(InvoiceBatchService, '_create_with_retry', side_effect=create_during_second_submit):
+            result = InvoiceBatchService.confirm(batch, user)
+        self.assertEqual(second, [True])
+        self.assertEqual(len(result['created']), 2)
+        self.assertEqual(Invoice.objects.exclude(invoice_number='INV-OLD').count(), 2)
+
+    def test_confirm_retries_when_a_generated_number_is_taken(self):
+        from tracker.services.invoice_batch import InvoiceBatchService
+
+        items = [{'description': 'Valve', 'code': '3100', 'qty': 1, 'rate': 20, 'value': 20}]
+        data = self._preview([_extracted(None, 'FOR T 290 EJF', items)])
+        allocate = InvoiceBatchService._allocate_numbers
+        # The first allocation loses a race with a single upload that took INV-RACE
+        Invoice.objects.create(invoice_number='INV-RACE', customer=self.customer, branch=self.branch)
+        with mock.patch.object(InvoiceBatchService, '_allocate_numbers',
+                               side_effect=[['INV-RACE'], allocate(1)]):
+            result = self.client.post(reverse('tracker:api_invoice_batch_confirm'),
+                                      json.dumps({'batch': data['batch']}), content_type='application/json').json()
+        self.assertEqual(len(result['created']), 1)
+        self.assertNotEqual(result['created'][0]['invoice_number'], 'INV-RACE')
+        self.assertEqual(Invoice.objects.filter(invoice_number='INV-RACE').count(), 1)
@@ -0,0 +1,86 @@
+import os
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from tracker.models import Branch, Customer, Invoice, InvoiceLineItem
+from tracker.utils import invoice_pdf_cache
+
+
+class InvoicePdfCacheTests(TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = override_settings(INVOICE_PDF_CACHE_DIR=tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        branch = Branch.objects.create(name='Main', code='MAIN')
+        self.customer = customer = Customer.objects.create(full_name='Jane Doe', phone='0712345678', branch=branch)
+        self.invoice = Invoice.objects.create(invoice_number='INV-1', customer=customer, branch=branch, status='issued')
+        self.line = InvoiceLineItem.objects.create(invoice=self.invoice, description='Tyre', quantity=1,
+                                                   unit_price=Decimal('100'))
+
+    def test_renders_once_per_revision(self):
+        with mock.patch.object(invoice_pdf_cache, 'render_invoice_pdf', return_value=b'%PDF-1') as render:
+            first = invoice_pdf_cache.get_or_render(self.invoice)
+            second = invoice_pdf_cache.get_or_render(self.invoice)
+        self.assertEqual(first, second)
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(first.read_bytes(), b'%PDF-1')
+
+    def test_edit_produces_new_revision_and_drops_old_file(self):
+        with mock.patch.object(invoice_pdf_cache, 'render_invoice_pdf', return_value=b'%PDF-1'):
+            old = invoice_pdf_cache.get_or_render(self.invoice)
+        InvoiceLineItem.objects.create(invoice=self.invoice, description='Valve', quantity=2, unit_price=Decimal('5'))
+        with mock.patch.object(invoice_pdf_cache, 'render_invoice_pdf', return_value=b'%PDF-2') as render:
+            new = invoice_pdf_cache.get_or_render(self.invoice)
+        self.assertEqual(render.call_count, 1)
+        self.assertNotEqual(old, new)
+        self.assertFalse(old.exists())
+
+    def test_printed_customer_and_line_edits_change_the_revision(self):
+        key = invoice_pdf_cache.revision_key(self.invoice)
+        # Same total, different wording
+        InvoiceLineItem.objects.filter(pk=self.line.pk).update(description='Tyre 205/55 R16')
+        described = invoice_pdf_cache.revision_key(self.invoice)
+        self.assertNotEqual(key, described)
+        Customer.objects.filter(pk=self.customer.pk).update(address='Plot 12, Dar es Salaam')
+        self.assertNotEqual(described, invoice_pdf_cache.revision_key(self.invoice))
+
+    def test_stale_render_keeps_the_newer_revision(self):
+        with mock.patch.object(invoice_pdf_cache, 'render_invoice_pdf', return_value=b'%PDF-1'):
+            old = invoice_pdf_cache.get_or_render(self.invoice)
+        os.utime(old, (1, 1))
+        InvoiceLineItem.objects.filter(pk=self.line.pk).update(description='Tyre 205/55 R16')
+
+        def render_while_edited(invoice, base_url=None):
+            # Another request renders the edited invoice before this render finishes
+            Customer.objects.filter(pk=self.customer.pk).update(full_name='Jane Doe Ltd')
+            with mock.patch.object(invoice_pdf_cache, 'render_invoice_pdf', return_value=b'%PDF-new'):
+                newer.append(invoice_pdf_cache.get_or_render(invoice))
+            return b'%PDF-stale'
+
+        newer = []
+        with mock.patch.object(invoice_pdf_cache, 'render_invoice_pdf', side_effect=render_while_edited):
+            stale = invoice_pdf_cache.get_or_render(self.invoice)
+        self.assertNotEqual(stale, newer[0])
+        self.assertFalse(old.exists())
+        self.assertEqual(newer[0].read_bytes(), b'%PDF-new')
+        self.assertEqual(invoice_pdf_cache.cached_path(self.invoice), newer[0])
+
+    def test_view_streams_cached_file(self):
+        User.objects.create_user('clerk', password='pass', is_staff=True)
+        self.client.login(username='clerk', password='pass')
+        with mock.patch.object(invoice_pdf_cache, 'render_invoice_pdf', return_value=b'%PDF-1') as render:
+            for _ in range(2):
+                response = self.client.get(reverse('tracker:invoice_pdf', kwargs={'pk': self.invoice.pk}))
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.streaming)
+                self.assertEqual(b''.join(response.streaming_content), b'%PDF-1')
+        self.assertEqual(render.call_count, 1)
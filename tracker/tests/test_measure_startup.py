@@ -0,0 +1,28 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from tracker.management.commands.measure_startup import parse_importtime
+
+
+class MeasureStartupTests(SimpleTestCase):
+
+    def test_parse_importtime(self):
+        rows, total = parse_importtime(
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       100 |        100 |   pandas.core\n"
+            "import time:        50 |        150 | pandas\n"
+            "import time:        20 |         20 | json\n"
+        )
+        self.assertEqual(rows[0], ('pandas.core', 100, 100, 1))
+        self.assertEqual(total, 170)
+
+    def test_heavy_dependencies_are_not_imported_at_startup(self):
+        out = StringIO()
+        call_command('measure_startup', '--runs', '1', '--budget-ms', '100000', stdout=out)
+        self.assertIn('Within the', out.getvalue())
+
+        with self.assertRaisesMessage(CommandError, 'should be lazy: django'):
+            call_command('measure_startup', '--runs', '1', '--forbid', 'django', stdout=StringIO())
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, storages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from tracker.models import Branch, Customer, Invoice
+from tracker.utils.media_store import ContentAddressedStorage
+from tracker.utils.upload_spool import spool_upload
+
+
+class MediaStoreTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.storage = storages['default']
+        self.assertIsInstance(self.storage, ContentAddressedStorage)
+
+        branch = Branch.objects.create(name='Main', code='MAIN')
+        self.customer = Customer.objects.create(full_name='Jane Doe', phone='0712345678', branch=branch)
+
+    def _blobs(self):
+        return list(self.storage.iter_blobs())
+
+    def test_identical_content_is_stored_once(self):
+        first = self.storage.save('invoices/a.pdf', ContentFile(b'%PDF-same'))
+        with spool_upload(SimpleUploadedFile('b.pdf', b'%PDF-same')) as upload:
+            second = self.storage.save('invoices/a.pdf', upload)
+        self.storage.save('invoices/c.pdf', ContentFile(b'%PDF-other'))
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(os.stat(self.storage.path(first)).st_ino, os.stat(self.storage.path(second)).st_ino)
+        self.assertEqual(self.storage.reference_count(first), 2)
+        with self.storage.open(second) as fh:
+            self.assertEqual(fh.read(), b'%PDF-same')
+        self.assertEqual(len(self._blobs()), 2)
+
+    def test_gc_removes_unreferenced_blobs(self):
+        name = self.storage.save('order_attachments/x.pdf', ContentFile(b'%PDF-gone'))
+        self.storage.save('order_attachments/y.pdf', ContentFile(b'%PDF-kept'))
+        self.storage.delete(name)
+
+        call_command('gc_media_blobs', '--min-age', '0', stdout=StringIO())
+        self.assertEqual([links for _, links, _, _ in self._blobs()], [2])
+
+    def test_adopt_links_existing_duplicates(self):
+        plain = FileSystemStorage()
+        names = [plain.save(f'invoices/old{i}.pdf', ContentFile(b'%PDF-legacy')) for i in range(2)]
+        for i, name in enumerate(names):
+            Invoice.objects.create(invoice_number=f'INV-{i}', customer=self.customer, document=name)
+
+        call_command('gc_media_blobs', '--adopt', stdout=StringIO())
+        paths = [self.storage.path(name) for name in names]
+        self.assertEqual(os.stat(paths[0]).st_ino, os.stat(paths[1]).st_ino)
+        self.assertEqual(len(self._blobs()), 1)
+
+    def test_concurrent_saves_of_identical_content(self):
+        names = []
+        threads = [
+            threading.Thread(target=lambda i=i: names.append(
+                self.storage.save(f'signatures/s{i}.png', ContentFile(b'same signature bytes'))
+            ))
+            for i in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(names), 8)
+        for name in names:
+            with self.storage.open(name) as fh:
+                self.assertEqual(fh.read(), b'same signature bytes')
+        blobs = self._blobs()
+        self.assertEqual(len(blobs), 1)
+        self.assertFalse(blobs[0][0].endswith('.partial'))
+
+    def test_spooled_upload_survives_its_blob_being_collected(self):
+        self.storage.save('invoices/old.pdf', ContentFile(b'%PDF-collected'))
+        self.storage.delete('invoices/old.pdf')
+        link = self.storage._link
+
+        def collect_then_link(blob, full_path):
+            # gc_media_blobs removes the unreferenced blob between the check and the link
+            if blob.startswith(self.storage.blob_root) and not blob.endswith('.partial'):
+                os.remove(blob)
+            return link(blob, full_path)
+
+        with spool_upload(SimpleUploadedFile('new.pdf', b'%PDF-collected')) as upload, \
+                mock.patch.object(self.storage, '_link', side_effect=collect_then_link):
+            name = self.storage.save('invoices/new.pdf', upload)
+        with self.storage.open(name) as fh:
+            self.assertEqual(fh.read(), b'%PDF-collected')
+        self.assertEqual([links for _, links, _, _ in self._blobs()], [2])
@@ -0,0 +1,91 @@
+"""
+Scanned-invoice OCR: image-only page detection always runs; the end-to-end check needs
+the tesseract binary and is skipped without it.
+"""
+
+import io
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock, skipUnless
+
+import fitz
+from django.test import SimpleTestCase, override_settings
+from PIL import Image, ImageDraw
+
+from tracker.utils import ocr_engine
+from tracker.utils.pdf_text_extractor import extract_from_bytes, extract_text_from_pdf
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'ocr-tests'}}
+
+
+def _scan_png(text):
+    image = Image.new('RGB', (1400, 500), 'white')
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(text.splitlines()):
+        draw.text((40, 40 + i * 60), line, fill='black', font_size=40)
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _pdf(text_page=None, scanned_pages=()):
+    doc = fitz.open()
+    if text_page:
+        doc.new_page().insert_text((72, 72), text_page)
+    for png in scanned_pages:
+        doc.new_page().insert_image(fitz.Rect(0, 0, 595, 212), stream=png)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+@override_settings(CACHES=LOCMEM)
+class OcrEngineTests(SimpleTestCase):
+
+    @skipUnless(not ocr_engine.ocr_available(), 'only meaningful without tesseract')
+    def test_image_only_pages_are_skipped_without_ocr(self):
+        pages = extract_text_from_pdf(_pdf('Proforma Invoice PI-1001', [_scan_png('Customer Name: Jane')]))
+        self.assertEqual([p['page_num'] for p in pages], [1])
+
+    @skipUnless(not ocr_engine.ocr_available(), 'only meaningful without tesseract')
+    def test_scan_without_ocr_reports_it(self):
+        result = extract_from_bytes(_pdf(scanned_pages=[_scan_png('Invoice No: PI-1')]), 'scan.pdf')
+        self.assertFalse(result['success'])
+        self.assertFalse(result['ocr_available'])
+
+    @override_settings(INVOICE_OCR_WORKERS=2)
+    def test_concurrent_documents_share_one_pool(self):
+        def ocr_document(n):
+            results.append(ocr_engine.ocr_images([_scan_png(f'Doc {n} page {p}') for p in (1, 2)]))
+
+        results = []
+        with mock.patch.object(ocr_engine, '_pool', None), \
+                mock.patch.object(ocr_engine, 'ProcessPoolExecutor', wraps=ProcessPoolExecutor) as executor:
+            threads = [threading.Thread(target=ocr_document, args=(n,)) for n in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            pool = ocr_engine._get_pool()
+            self.addCleanup(pool.shutdown)
+        self.assertEqual([len(pages) for pages in results], [2] * 4)
+        self.assertEqual(executor.call_count, 1)
+        self.assertEqual(pool._max_workers, 2)
+        self.assertNotEqual(pool._mp_context.get_start_method(), 'fork')
+
+    @skipUnless(ocr_engine.ocr_available(), 'tesseract is not installed')
+    def test_scanned_pages_are_read_in_order_and_cached(self):
+        scans = [_scan_png(f'Page {n} Invoice PI-{n}00') for n in (2, 3)]
+        pdf = _pdf('Proforma Invoice PI-1001', scans)
+        pages = extract_text_from_pdf(pdf)
+        self.assertEqual([p['page_num'] for p in pages], [1, 2, 3])
+        self.assertIn('PI-200', pages[1]['text'])
+        self.assertTrue(pages[2].get('ocr'))
+
+        # Same pages again come from the cache without starting tesseract
+        original = ocr_engine._ocr_png
+        ocr_engine._ocr_png = None
+        try:
+            self.assertEqual([p['text'] for p in extract_text_from_pdf(pdf)], [p['text'] for p in pages])
+        finally:
+            ocr_engine._ocr_png = original
@@ -0,0 +1,70 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from tracker.models import Branch, Customer, Invoice, Order, OrderInvoiceLink, Profile
+
+
+class OrderInvoiceTotalsTests(TestCase):
+
+    def setUp(self):
+        self.branch = Branch.objects.create(name='Main', code='MAIN')
+        self.customer = Customer.objects.create(full_name='Jane Doe', phone='0712345678', branch=self.branch)
+        self.order = Order.objects.create(customer=self.customer, branch=self.branch, type='service')
+
+    def _invoice(self, subtotal):
+        return Invoice.objects.create(
+            invoice_number=f'INV-{subtotal}', customer=self.customer, branch=self.branch, subtotal=Decimal(subtotal),
+            tax_amount=Decimal(subtotal) * Decimal('0.18'), total_amount=Decimal(subtotal) * Decimal('1.18'),
+        )
+
+    def test_links_and_invoice_edits_update_totals(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self._invoice('100.00')
+            OrderInvoiceLink.objects.create(order=self.order, invoice=first, is_primary=True)
+            OrderInvoiceLink.objects.create(order=self.order, invoice=self._invoice('50.00'))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.invoice_count, 2)
+        self.assertEqual(self.order.invoice_net, Decimal('150.00'))
+        self.assertEqual(self.order.invoice_vat, Decimal('27.00'))
+        self.assertEqual(self.order.invoice_gross, Decimal('177.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.total_amount = Decimal('200.00')
+            first.save()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.invoice_gross, Decimal('259.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.invoice_count, 1)
+        self.assertEqual(self.order.invoice_gross, Decimal('59.00'))
+
+    def test_full_save_of_stale_order_keeps_totals(self):
+        stale = Order.objects.get(pk=self.order.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderInvoiceLink.objects.create(order=self.order, invoice=self._invoice('100.00'))
+        stale.description = 'Edited'
+        with self.captureOnCommitCallbacks(execute=True):
+            stale.save()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.description, 'Edited')
+        self.assertEqual(self.order.invoice_count, 1)
+
+    def test_backfill_and_api(self):
+        invoice = self._invoice('100.00')
+        OrderInvoiceLink.objects.bulk_create([OrderInvoiceLink(order=self.order, invoice=invoice)])
+        call_command('backfill_order_invoice_totals', stdout=StringIO())
+
+        user = User.objects.create_user('clerk', password='pass')
+        Profile.objects.update_or_create(user=user, defaults={'branch': self.branch})
+        self.client.login(username='clerk', password='pass')
+        data = self.client.get(reverse('tracker:api_order_invoice_totals', kwargs={'pk': self.order.pk})).json()
+        self.assertEqual(data['invoice_count'], 1)
+        self.assertEqual(data['aggregated_totals'], {'net': 100.0, 'vat': 18.0, 'gross': 118.0})
+        self.assertEqual(data['invoices'][0]['invoice_number'], invoice.invoice_number)
@@ -0,0 +1,52 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from tracker.models import Branch, Customer, Order, Profile, Vehicle
+from tracker.services import OrderKpiService
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'kpi-tests'}})
+class OrderKpiServiceTests(TestCase):
+
+    def setUp(self):
+        self.branch = Branch.objects.create(name='Main', code='MAIN')
+        other = Branch.objects.create(name='North', code='NORTH')
+        self.user = User.objects.create_user('clerk', password='pass')
+        Profile.objects.update_or_create(user=self.user, defaults={'branch': self.branch})
+        self.user.refresh_from_db()
+
+        real = Customer.objects.create(full_name='Jane Doe', phone='0712345678', branch=self.branch)
+        temp = Customer.objects.create(full_name='Plate T1', phone='PLATE_T1', branch=self.branch)
+        vehicle = Vehicle.objects.create(customer=real, plate_number='T100AAA')
+        now = timezone.now()
+        for customer, status, priority in [
+            (real, 'created', 'urgent'), (real, 'in_progress', 'medium'), (real, 'overdue', 'medium'),
+            (real, 'completed', 'low'), (temp, 'created', 'urgent'),
+        ]:
+            Order.objects.create(customer=customer, branch=self.branch, vehicle=vehicle, type='service',
+                                 status=status, priority=priority,
+                                 completed_at=now if status == 'completed' else None)
+        Order.objects.create(customer=Customer.objects.create(full_name='Other', phone='1', branch=other),
+                             branch=other, type='service', status='created')
+
+    def test_counts_match_definitions(self):
+        kpis = OrderKpiService.get_kpis(self.user)
+        self.assertEqual(kpis['total_orders'], 4)
+        self.assertEqual(kpis['pending_orders'], 1)
+        self.assertEqual(kpis['active_orders'], 3)
+        self.assertEqual(kpis['completed_today'], 1)
+        self.assertEqual(kpis['urgent_orders'], 1)
+        self.assertEqual(kpis['overdue_count'], 1)
+        self.assertEqual(kpis['started_total'], 4)
+        self.assertEqual(kpis['started_completed'], 1)
+        self.assertEqual(kpis['repeated_vehicles_today'], 1)
+
+    def test_cached_until_an_order_changes(self):
+        OrderKpiService.get_kpis(self.user)
+        with self.assertNumQueries(0):
+            OrderKpiService.get_kpis(self.user)
+        order = Order.objects.filter(branch=self.branch, status='created', priority='urgent').first()
+        order.status = 'completed'
+        order.save()
+        self.assertEqual(OrderKpiService.get_kpis(self.user)['pending_orders'], 0)
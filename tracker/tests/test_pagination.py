@@ -0,0 +1,71 @@
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker.models import Branch, Customer
+from tracker.utils import shared_cache
+from tracker.utils.pagination import paginate
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'pagination-tests'}})
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        shared_cache.bump('counts')
+        branch = Branch.objects.create(name='Main', code='MAIN')
+        now = timezone.now()
+        # Pairs share a registration_date so the id tie-breaker is exercised
+        Customer.objects.bulk_create([
+            Customer(code=f'C{i:03d}', full_name=f'Customer {i}', phone=f'0700{i:06d}', branch=branch,
+                     registration_date=now - timezone.timedelta(minutes=i // 2), arrival_time=now)
+            for i in range(45)
+        ])
+        self.qs = Customer.objects.all()
+        self.expected = list(self.qs.order_by('-registration_date', '-id').values_list('id', flat=True))
+        self.factory = RequestFactory()
+
+    def _page(self, query=''):
+        return paginate(self.factory.get('/?' + query), self.qs, 10, ordering=('-registration_date', '-id'))
+
+    def test_walk_forward_and_back(self):
+        seen, page = [], self._page()
+        while True:
+            seen.extend(c.id for c in page)
+            if not page.has_next():
+                break
+            page = self._page(page.next_query)
+        self.assertEqual(seen, self.expected)
+        self.assertEqual((page.number, page.start_index(), page.end_index()), (5, 41, 45))
+
+        back = self._page(page.previous_query)
+        self.assertEqual([c.id for c in back], self.expected[30:40])
+        self.assertEqual(back.number, 4)
+
+    def test_deep_page_costs_the_same_as_first(self):
+        first = self._page()
+        with self.assertNumQueries(1):
+            list(self._page(first.next_query))
+        page = first
+        for _ in range(3):
+            page = self._page(page.next_query)
+        with self.assertNumQueries(1):
+            list(self._page(page.next_query))
+
+    def test_last_page_and_offset_fallback(self):
+        last = self._page('page=last')
+        self.assertEqual([c.id for c in last], self.expected[-10:])
+        self.assertFalse(last.has_next())
+        offset = self._page('page=2')
+        self.assertEqual([c.id for c in offset], self.expected[10:20])
+        self.assertEqual([c.id for c in self._page(offset.next_query)], self.expected[20:30])
+        self.assertEqual([c.id for c in self._page('after=garbage')], self.expected[:10])
+
+    def test_customers_list_view(self):
+        User.objects.create_superuser('admin', 'a@example.com', 'pass')
+        self.client.login(username='admin', password='pass')
+        response = self.client.get(reverse('tracker:customers_list'))
+        self.assertEqual(response.status_code, 200)
+        page = response.context['customers']
+        response = self.client.get(reverse('tracker:customers_list') + '?' + page.next_query)
+        self.assertEqual([c.id for c in response.context['customers']], self.expected[20:40])
@@ -0,0 +1,61 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from tracker.models import Branch, Customer, Vehicle
+from tracker.services import OrderService, VehicleService
+from tracker.utils import normalize_plate
+
+
+class PlateLookupTests(TestCase):
+
+    def setUp(self):
+        self.branch = Branch.objects.create(name='Main', code='MAIN')
+        self.other = Branch.objects.create(name='North', code='NORTH')
+        self.customer = Customer.objects.create(full_name='Jane Doe', phone='0712345678', branch=self.branch)
+
+    def test_normalize_plate(self):
+        self.assertEqual(normalize_plate(' t 123-abc '), 'T123ABC')
+        self.assertEqual(normalize_plate(None), '')
+
+    def test_spacing_variants_match(self):
+        vehicle = Vehicle.objects.create(customer=self.customer, plate_number='T 123 ABC')
+        self.assertEqual((vehicle.plate_key, vehicle.branch_id), ('T123ABC', self.branch.id))
+        self.assertEqual(VehicleService.find_by_plate(self.branch, 't123-abc'), vehicle)
+        self.assertIsNone(VehicleService.find_by_plate(self.other, 'T123ABC'))
+        self.assertEqual(VehicleService.create_or_get_vehicle(self.customer, 'T123ABC'), vehicle)
+        self.assertIsNone(OrderService.find_started_order_by_plate(self.branch, 'T-123-ABC'))
+
+    def test_resolve_plates_single_query(self):
+        for plate in ['T100AAA', 'T200BBB', 'T300CCC']:
+            Vehicle.objects.create(customer=self.customer, plate_number=plate)
+        with self.assertNumQueries(1):
+            found = VehicleService.resolve_plates(self.branch, ['t 100 aaa', 'T200-BBB', 'T999ZZZ', ''])
+        self.assertEqual(sorted(found), ['T100AAA', 'T200BBB'])
+        self.assertEqual(found['T100AAA'].customer, self.customer)
+        self.assertEqual(VehicleService.resolve_plates(self.other, ['T100AAA']), {})
+
+    def test_customer_branch_change_moves_vehicles(self):
+        vehicle = Vehicle.objects.create(customer=self.customer, plate_number='T100AAA')
+        customer = Customer.objects.get(pk=self.customer.pk)
+        customer.branch = self.other
+        customer.save()
+        vehicle.refresh_from_db()
+        self.assertEqual(vehicle.branch_id, self.other.id)
+
+    def test_moving_vehicle_by_customer_id_follows_new_branch(self):
+        other_customer = Customer.objects.create(full_name='John Roe', phone='0787654321', branch=self.other)
+        Vehicle.objects.create(customer=self.customer, plate_number='T100AAA')
+        vehicle = Vehicle.objects.get(plate_number='T100AAA')
+        vehicle.customer_id = other_customer.pk
+        vehicle.save()
+        vehicle.refresh_from_db()
+        self.assertEqual(vehicle.branch_id, self.other.id)
+        self.assertEqual(VehicleService.find_by_plate(self.other, 'T100AAA'), vehicle)
+
+    def test_backfill_command(self):
+        Vehicle.objects.bulk_create([Vehicle(customer=self.customer, plate_number='t 555-xyz')])
+        call_command('backfill_plate_keys', stdout=io.StringIO())
+        vehicle = Vehicle.objects.get(plate_number='t 555-xyz')
+        self.assertEqual((vehicle.plate_key, vehicle.branch_id), ('T555XYZ', self.branch.id))
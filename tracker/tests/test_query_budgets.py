@@ -0,0 +1,196 @@
+"""
+Query-budget regression tests for hot endpoints.
+
+Each endpoint is requested against a multi-branch fixture, then the fixture is
+grown and the endpoint requested again. The number of queries must stay within
+the endpoint's budget and must not change with the number of rows, so any N+1
+pattern introduced later fails here.
+"""
+
+import itertools
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker.models import (
+    Branch, Customer, Vehicle, Order, Invoice, InvoiceLineItem, OrderInvoiceLink,
+    InventoryItem, Brand, LabourCode, Profile,
+)
+from tracker.services import CustomerStatsService, OrderInvoiceTotalsService, OrderKpiService
+from tracker.utils import shared_cache
+
+
+ORDER_TYPES = ['service', 'sales', 'labour', 'inquiry', 'service', 'sales']
+ORDER_STATUSES = ['completed', 'completed', 'in_progress', 'created', 'overdue', 'cancelled']
+ITEM_CODES = ['22007', '41003', '3795', 'TYR-205', '50101']
+
+_seq = itertools.count(1)
+
+
+def seed_branch_data(branch, orders, lines_per_invoice=3, now=None):
+    """Bulk-create customers, vehicles, orders, invoices and line items for one branch.
+
+    Every second order gets an invoice linked through OrderInvoiceLink.
+    Returns the created orders.
+    """
+    now = now or timezone.now()
+    batch = next(_seq)
+    customers = Customer.objects.bulk_create([
+        Customer(
+            code=f'PB{batch}C{i}', branch=branch, full_name=f'Customer {batch}-{i}',
+            phone=f'07{batch:03d}{i:05d}', customer_type=['personal', 'company', 'government', 'ngo'][i % 4],
+            registration_date=now - timedelta(days=i % 90), arrival_time=now,
+            total_visits=i % 4, last_visit=now - timedelta(days=i % 10),
+        )
+        for i in range(max(1, orders // 2))
+    ])
+    customers = list(Customer.objects.filter(code__startswith=f'PB{batch}C').order_by('id'))
+    plates = [f'T{batch % 1000:03d}{chr(65 + i % 26)}{chr(65 + (i // 26) % 26)}X' for i in range(len(customers))]
+    Vehicle.objects.bulk_create([
+        Vehicle(customer=c, branch=branch, plate_number=plate, plate_key=plate, make='Toyota')
+        for plate, c in zip(plates, customers)
+    ])
+    vehicles = {v.customer_id: v for v in Vehicle.objects.filter(customer__in=customers)}
+
+    order_objs = []
+    for i in range(orders):
+        c = customers[i % len(customers)]
+        created = now - timedelta(days=i % 60, hours=3)
+        status = ORDER_STATUSES[i % len(ORDER_STATUSES)]
+        order_type = ORDER_TYPES[i % len(ORDER_TYPES)]
+        if order_type == 'inquiry':
+            status = 'completed'
+        order_objs.append(Order(
+            order_number=f'PB{batch}O{i}', branch=branch, customer=c, vehicle=vehicles.get(c.id),
+            type=order_type, status=status, priority=['low', 'medium', 'high', 'urgent'][i % 4],
+            created_at=created,
+            started_at=created if status != 'created' else None,
+            completed_at=created + timedelta(hours=1) if status == 'completed' else None,
+        ))
+    Order.objects.bulk_create(order_objs)
+    order_objs = list(Order.objects.filter(order_number__startswith=f'PB{batch}O').order_by('id'))
+
+    invoices = []
+    for i, o in enumerate(order_objs[::2]):
+        invoices.append(Invoice(
+            invoice_number=f'PB{batch}I{i}', branch=branch, order=o, customer=o.customer, vehicle=o.vehicle,
+            invoice_date=(o.created_at).date(), reference=f'FOR {o.vehicle.plate_number}' if o.vehicle else '',
+            status='issued', subtotal=Decimal('300.00'), tax_amount=Decimal('54.00'),
+            total_amount=Decimal('354.00'),
+        ))
+    Invoice.objects.bulk_create(invoices)
+    invoices = list(Invoice.objects.filter(invoice_number__startswith=f'PB{batch}I').order_by('id'))
+
+    InvoiceLineItem.objects.bulk_create([
+        InvoiceLineItem(
+            invoice=inv, code=ITEM_CODES[(inv.id + j) % len(ITEM_CODES)], description=f'Item {j}',
+            quantity=Decimal('1'), unit_price=Decimal('100.00'), line_total=Decimal('100.00'),
+            tax_rate=Decimal('18'), tax_amount=Decimal('18.00'),
+            order_type=['labour', 'service', 'sales'][j % 3],
+        )
+        for inv in invoices for j in range(lines_per_invoice)
+    ])
+    OrderInvoiceLink.objects.bulk_create([
+        OrderInvoiceLink(order_id=inv.order_id, invoice=inv, is_primary=True) for inv in invoices
+    ])
+    # bulk_create skips signals, so fill the denormalized tables the way the rebuild commands do
+    CustomerStatsService.refresh(c.id for c in customers)
+    OrderInvoiceTotalsService.refresh(o.id for o in order_objs)
+    return order_objs
+
+
+class QueryBudgetTests(TestCase):
+    """Hot endpoints must run a bounded number of queries regardless of data volume.
+
+    Budgets match the current query counts; lower them when an endpoint gets cheaper.
+    """
+
+    SMALL = 60
+    GROWTH = 600
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.branches = [
+            Branch.objects.create(name=f'Branch {i}', code=f'BR{i}') for i in range(3)
+        ]
+        cls.branch = cls.branches[0]
+        cls.user = User.objects.create_user(username='counter', password='pass', is_staff=True)
+        Profile.objects.create(user=cls.user, branch=cls.branch)
+
+        brand = Brand.objects.create(name='Perf Brand')
+        InventoryItem.objects.bulk_create([
+            InventoryItem(name=f'Tyre {i}', brand=brand, quantity=i % 7, price=Decimal('10'))
+            for i in range(12)
+        ])
+        LabourCode.objects.bulk_create([
+            LabourCode(code='22007', description='Labour', category='labour'),
+            LabourCode(code='3795', description='Wheel alignment', category='tyre service'),
+        ])
+        for b in cls.branches:
+            seed_branch_data(b, cls.SMALL)
+
+    def setUp(self):
+        self.client.login(username='counter', password='pass')
+        # Warm-up: let middleware settle order statuses (created -> in_progress -> overdue)
+        self.client.get(reverse('tracker:api_notifications_summary'))
+
+    def _count(self, url):
+        # Measure with cold list totals, KPIs and dashboard metrics so both requests do the same work
+        shared_cache.bump('counts')
+        shared_cache.bump('dashboard')
+        OrderKpiService.invalidate()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertLess(response.status_code, 400, f'{url} returned {response.status_code}')
+        return len(ctx.captured_queries)
+
+    def _grow(self):
+        for b in self.branches:
+            seed_branch_data(b, self.GROWTH)
+        # Settle statuses of the new rows before measuring again
+        self.client.get(reverse('tracker:api_notifications_summary'))
+
+    def assertQueryBudget(self, url, budget, grow=None):
+        """Assert the query count is within budget and unchanged after growing the data."""
+        before = self._count(url)
+        (grow or self._grow)()
+        after = self._count(url)
+        self.assertLessEqual(after, budget, f'{url}: {after} queries exceeds budget of {budget}')
+        self.assertEqual(before, after, f'{url}: query count grew with row count ({before} -> {after})')
+
+    def test_dashboard(self):
+        self.assertQueryBudget(reverse('tracker:dashboard'), 67)
+
+    def test_orders_list(self):
+        self.assertQueryBudget(reverse('tracker:orders_list'), 19)
+
+    def test_orders_list_started_view(self):
+        self.assertQueryBudget(reverse('tracker:orders_list') + '?view=started', 21)
+
+    def test_customers_list(self):
+        self.assertQueryBudget(reverse('tracker:customers_list'), 14)
+
+    def test_api_customer_groups_data(self):
+        self.assertQueryBudget(reverse('tracker:api_customer_groups_data') + '?group=personal', 15)
+
+    def test_api_notifications_summary(self):
+        self.assertQueryBudget(reverse('tracker:api_notifications_summary'), 18)
+
+    def test_order_detail(self):
+        order = Order.objects.filter(branch=self.branch, invoice_links__isnull=False).first()
+
+        def link_more_invoices():
+            self._grow()
+            for inv in Invoice.objects.filter(branch=self.branch).exclude(order=order)[:10]:
+                OrderInvoiceLink.objects.get_or_create(order=order, invoice=inv)
+
+        self.assertQueryBudget(reverse('tracker:order_detail', kwargs={'pk': order.pk}), 23, grow=link_more_invoices)
+
+    def test_api_vehicle_tracking_data(self):
+        self.assertQueryBudget(reverse('tracker:api_vehicle_tracking_data'), 17)
@@ -0,0 +1,102 @@
+import tempfile
+import threading
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from tracker.utils import shared_cache
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared-cache-tests'}})
+class SharedCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        shared_cache.reset_stats()
+
+    def test_bump_invalidates_whole_namespace(self):
+        shared_cache.set('inventory', ('brands', 'Tyre 205'), {'brands': ['A']})
+        shared_cache.set('settings', 'system', {'company_name': 'X'})
+        shared_cache.bump('inventory')
+        self.assertIsNone(shared_cache.get('inventory', ('brands', 'Tyre 205')))
+        self.assertEqual(shared_cache.get('settings', 'system'), {'company_name': 'X'})
+
+    def test_evicted_version_does_not_revive_stale_entries(self):
+        from django.core.cache import cache
+        shared_cache.set('inventory', 'items', 'v1 data')
+        shared_cache.bump('inventory')
+        cache.delete('sc:ns:inventory')  # culled by the backend
+        self.assertIsNone(shared_cache.get('inventory', 'items'))
+
+    def test_append_keeps_entries_from_concurrent_writers(self):
+        with tempfile.TemporaryDirectory() as tmp, override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tmp,
+        }}):
+            threads = [
+                threading.Thread(target=shared_cache.append, args=('audit', 'logs', i), kwargs={'limit': 50})
+                for i in range(20)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual(sorted(shared_cache.get('audit', 'logs')), list(range(20)))
+            shared_cache.append('audit', 'logs', 'last', limit=3)
+            self.assertEqual(len(shared_cache.get('audit', 'logs')), 3)
+
+    def test_unsafe_parts_are_hashed(self):
+        key = shared_cache.make_key('inventory', ('brands', 'Tyre 205/55 R16'))
+        self.assertNotIn(' ', key)
+        self.assertRegex(key, r'^sc:inventory:v\d+:[0-9a-f]{32}$')
+
+    def test_get_or_compute_runs_once_under_concurrency(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return 42
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(shared_cache.get_or_compute('dashboard', 'kpis', compute)))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, [42] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(shared_cache._flight_locks, {})
+
+    def test_waiters_leave_no_local_locks_and_keep_foreign_cache_locks(self):
+        from django.core.cache import cache
+        key = shared_cache.make_key('dashboard', 'kpis')
+        cache.add(f'{key}:lock', 1, 30)  # held by another worker
+
+        def publish():
+            time.sleep(0.1)
+            shared_cache.set('dashboard', 'kpis', 'theirs')
+
+        writer = threading.Thread(target=publish)
+        writer.start()
+        self.assertEqual(shared_cache.get_or_compute('dashboard', 'kpis', lambda: 'ours'), 'theirs')
+        writer.join()
+
+        # The other worker's lock outlives a caller that gave up waiting
+        shared_cache.bump('dashboard')
+        key = shared_cache.make_key('dashboard', 'kpis')
+        cache.add(f'{key}:lock', 1, 30)
+        self.assertEqual(shared_cache.get_or_compute('dashboard', 'kpis', lambda: 'ours', wait=0.1), 'ours')
+        self.assertTrue(cache.get(f'{key}:lock'))
+        self.assertEqual(shared_cache._flight_locks, {})
+
+    def test_hit_miss_counters(self):
+        shared_cache.get_or_compute('inventory', 'items', lambda: {'items': []})
+        shared_cache.get_or_compute('inventory', 'items', lambda: {'items': []})
+        shared_cache.get('inventory', 'missing')
+        stats = {row['namespace']: row for row in shared_cache.get_stats()}
+        self.assertEqual(stats['inventory']['hits'], 1)
+        self.assertEqual(stats['inventory']['misses'], 2)
@@ -0,0 +1,52 @@
+import io
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from tracker.models import SystemSetting
+from tracker.utils import system_settings
+
+
+class SystemSettingsTests(TestCase):
+
+    def setUp(self):
+        system_settings.invalidate()
+
+    def test_defaults_without_rows(self):
+        snap = system_settings.get_settings()
+        self.assertEqual(snap.default_priority, 'medium')
+        self.assertTrue(snap.allow_order_without_vehicle)
+        with self.assertRaises(AttributeError):
+            snap.default_priority = 'high'
+
+    def test_snapshot_is_reused_within_refresh_window(self):
+        system_settings.get_settings()
+        with self.assertNumQueries(0):
+            for _ in range(100):
+                system_settings.get_settings().company_name
+
+    @override_settings(SYSTEM_SETTINGS_REFRESH_SECONDS=0)
+    def test_change_from_another_worker_is_picked_up(self):
+        self.assertEqual(system_settings.get_settings().company_name, '')
+        # Simulate another process writing directly to the table
+        SystemSetting.objects.create(key='company_name', value='Superdoll')
+        self.assertEqual(system_settings.get_settings().company_name, 'Superdoll')
+
+    def test_backup_round_trip(self):
+        User.objects.create_superuser('admin', 'a@example.com', 'pass')
+        self.client.login(username='admin', password='pass')
+        system_settings.update_settings({'company_name': 'Superdoll', 'sms_provider': 'twilio'})
+
+        payload = json.loads(self.client.get(reverse('tracker:backup_restore') + '?download=1').content)
+        self.assertEqual(payload['system_settings']['company_name'], 'Superdoll')
+
+        self.client.post(reverse('tracker:backup_restore'), {'action': 'reset_settings'})
+        self.assertEqual(system_settings.get_settings().company_name, '')
+
+        upload = io.BytesIO(json.dumps(payload).encode())
+        upload.name = 'backup.json'
+        self.client.post(reverse('tracker:backup_restore'), {'action': 'restore_settings', 'file': upload})
+        snap = system_settings.get_settings()
+        self.assertEqual((snap.company_name, snap.sms_provider), ('Superdoll', 'twilio'))
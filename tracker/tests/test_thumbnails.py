@@ -0,0 +1,65 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import fitz
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from tracker.models import Branch, Customer, Order, OrderAttachment
+from tracker.utils import thumbnails
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'thumbnail-tests'}}
+
+
+def _pdf(text):
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+@override_settings(CACHES=LOCMEM)
+class DocumentThumbnailTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.media = Path(media.name)
+
+        user = User.objects.create_superuser(username='admin', password='pass', email='a@example.com')
+        self.client.force_login(user)
+        branch = Branch.objects.create(name='Main', code='MAIN')
+        customer = Customer.objects.create(full_name='Jane Doe', phone='0712345678', branch=branch)
+        self.order = Order.objects.create(order_number='O-1', branch=branch, customer=customer, type='service')
+        self.attachment = OrderAttachment(order=self.order)
+        self.attachment.file.save('quote.pdf', ContentFile(_pdf('Quotation Q-1')), save=True)
+
+    def test_pdf_first_page_is_rendered_once_and_cached(self):
+        url = reverse('tracker:document_thumbnail', args=['attachment', self.attachment.pk]) + '?w=100'
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Type'], 'image/webp')
+        self.assertIn('immutable', resp['Cache-Control'])
+        self.assertEqual(b''.join(resp.streaming_content)[8:12], b'WEBP')
+        self.assertEqual(len(list((self.media / 'thumbnails').rglob('*-160.webp'))), 1)
+
+        with mock.patch.object(thumbnails, 'render_thumbnail') as render:
+            resp = self.client.get(url)
+            resp.close()
+        self.assertEqual(resp.status_code, 200)
+        render.assert_not_called()
+
+    def test_unsupported_or_missing_documents_are_404(self):
+        self.assertEqual(
+            self.client.get(reverse('tracker:document_thumbnail', args=['completion', self.order.pk])).status_code, 404
+        )
+        self.assertEqual(
+            self.client.get(reverse('tracker:document_thumbnail', args=['other', self.attachment.pk])).status_code, 404
+        )
@@ -0,0 +1,61 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.test import SimpleTestCase
+
+from tracker.utils.pdf_text_extractor import extract_from_bytes, extract_from_path
+from tracker.utils.upload_spool import spool_upload
+
+try:
+    import fitz
+except ImportError:
+    fitz = None
+
+
+class UploadSpoolTests(SimpleTestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.storage = FileSystemStorage(location=media.name)
+        self.data = b'%PDF-1.4 ' + os.urandom(600 * 1024)
+
+    def test_in_memory_upload_is_spooled_hashed_and_moved(self):
+        upload = spool_upload(SimpleUploadedFile('scan.pdf', self.data), chunk_size=64 * 1024)
+        path = upload.path
+        self.assertEqual(upload.sha256, hashlib.sha256(self.data).hexdigest())
+        self.assertEqual(upload.size, len(self.data))
+        with upload:
+            name = self.storage.save('invoices/scan.pdf', upload)
+        self.assertFalse(os.path.exists(path))
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), self.data)
+
+    def test_unsaved_spool_is_removed_on_close(self):
+        with spool_upload(SimpleUploadedFile('scan.pdf', self.data)) as upload:
+            path = upload.path
+            self.assertTrue(os.path.exists(path))
+        self.assertFalse(os.path.exists(path))
+
+    def test_temporary_upload_is_used_in_place(self):
+        uploaded = TemporaryUploadedFile('scan.pdf', 'application/pdf', len(self.data), None)
+        uploaded.write(self.data)
+        uploaded.seek(0)
+        self.addCleanup(uploaded.close)
+        with spool_upload(uploaded) as upload:
+            self.assertEqual(upload.path, uploaded.temporary_file_path())
+            self.assertEqual(upload.sha256, hashlib.sha256(self.data).hexdigest())
+        self.assertTrue(os.path.exists(uploaded.temporary_file_path()))
+
+    def test_extract_from_path_matches_bytes(self):
+        if fitz is None:
+            self.skipTest('PyMuPDF not installed')
+        doc = fitz.open()
+        doc.new_page().insert_text((72, 72), 'Proforma Invoice No: PI-1001\nCustomer Name: Jane Doe\nTotal Amount: 118.00')
+        pdf = doc.tobytes()
+        doc.close()
+        with spool_upload(SimpleUploadedFile('invoice.pdf', pdf)) as upload:
+            self.assertEqual(extract_from_path(upload.path, 'invoice.pdf'), extract_from_bytes(pdf, 'invoice.pdf'))
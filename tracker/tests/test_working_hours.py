@@ -0,0 +1,85 @@
+"""
+Property tests: the closed-form and NumPy working-hours calculators must agree with the
+day-by-day reference implementation on random intervals, including across DST changes.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from tracker.models import Customer, Order
+from tracker.utils.time_utils import (
+    _calculate_duration_by_day, calculate_estimated_duration, calculate_working_minutes_batch,
+    working_minutes_for_orders,
+)
+
+ZONES = ['Asia/Riyadh', 'Europe/London', 'America/New_York']
+# Windows stay clear of the night-time DST transitions the closed form ignores
+WINDOWS = [(8, 17), (3, 23), (9, 10), (17, 8)]
+
+
+def random_intervals(rng, count, tz):
+    base = timezone.make_aware(datetime(2024, 1, 1), tz)
+    for _ in range(count):
+        start = base + timedelta(seconds=rng.randrange(400 * 86400), microseconds=rng.randrange(10 ** 6))
+        span = rng.choice([rng.randrange(-3600, 12 * 3600), rng.randrange(120 * 86400)])
+        yield start, start + timedelta(seconds=span, microseconds=rng.randrange(10 ** 6))
+
+
+class WorkingHoursPropertyTests(SimpleTestCase):
+
+    def test_closed_form_matches_reference(self):
+        rng = random.Random(2024)
+        for zone in ZONES:
+            with timezone.override(zone):
+                tz = timezone.get_current_timezone()
+                for start, end in random_intervals(rng, 500, tz):
+                    hours = rng.choice(WINDOWS)
+                    self.assertEqual(
+                        calculate_estimated_duration(start, end, *hours),
+                        _calculate_duration_by_day(start, end, *hours),
+                        f'{zone} {start} -> {end} window {hours}',
+                    )
+
+    def test_batch_matches_reference(self):
+        rng = random.Random(7)
+        for zone in ZONES:
+            with timezone.override(zone):
+                starts, ends = zip(*random_intervals(rng, 500, timezone.get_current_timezone()))
+                expected = [_calculate_duration_by_day(s, e) for s, e in zip(starts, ends)]
+                self.assertEqual(calculate_working_minutes_batch(starts, ends).tolist(), expected)
+
+    def test_edge_cases(self):
+        with timezone.override('Asia/Riyadh'):
+            day = timezone.make_aware(datetime(2024, 5, 6))
+            self.assertIsNone(calculate_estimated_duration(None, day))
+            self.assertEqual(calculate_estimated_duration(day.replace(hour=18), day.replace(hour=20)), 0)
+            self.assertEqual(calculate_estimated_duration(day.replace(hour=10), day.replace(hour=9)), 0)
+            # 16:00 Monday -> 09:30 Wednesday = 60 + 540 + 90
+            self.assertEqual(calculate_estimated_duration(day.replace(hour=16), day.replace(hour=9, minute=30) + timedelta(days=2)), 690)
+
+            utc_starts = np.array(['2024-05-06T05:00', 'NaT'], dtype='datetime64[us]')  # 08:00 local
+            utc_ends = np.array(['2024-05-06T06:30', '2024-05-06T06:30'], dtype='datetime64[us]')
+            self.assertEqual(calculate_working_minutes_batch(utc_starts, utc_ends).tolist(), [90, -1])
+
+            # Naive values are local wall clock; aware and naive may be mixed
+            starts = [day.replace(hour=9), datetime(2024, 5, 6, 9), None]
+            ends = [datetime(2024, 5, 6, 10), day.replace(hour=11), day]
+            self.assertEqual(calculate_working_minutes_batch(starts, ends).tolist(), [60, 120, -1])
+            self.assertEqual(calculate_working_minutes_batch([], []).tolist(), [])
+
+
+class WorkingMinutesForOrdersTests(TestCase):
+
+    def test_queryset_durations(self):
+        customer = Customer.objects.create(full_name='Jane Doe', phone='0712345678')
+        start = timezone.make_aware(datetime(2024, 5, 6, 9))
+        done = Order.objects.create(customer=customer, type='service', status='completed',
+                                    started_at=start, completed_at=start + timedelta(days=1, hours=1))
+        open_order = Order.objects.create(customer=customer, type='service', started_at=start)
+        with self.assertNumQueries(1):
+            result = working_minutes_for_orders(Order.objects.all())
+        self.assertEqual(result, {done.pk: calculate_estimated_duration(done.started_at, done.completed_at), open_order.pk: None})
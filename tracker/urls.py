@@ -53,6 +53,7 @@ urlpatterns = [
     path("orders/<int:pk>/complete/", views.complete_order, name="complete_order"),
     path("orders/<int:pk>/attachments/add/", views.add_order_attachments, name="add_order_attachments"),
     path("orders/<int:pk>/attachments/sign/", views.sign_supporting_documents, name="sign_supporting_documents"),
+    path("documents/<str:kind>/<int:pk>/thumbnail/", views.document_thumbnail, name="document_thumbnail"),
     path("orders/<int:pk>/sign-document/", views.sign_order_document, name="order_sign_document"),
     path("orders/<int:pk>/sign-existing-document/", views.sign_existing_document, name="sign_existing_document"),
     path("attachments/<int:att_id>/delete/", views.delete_order_attachment, name="delete_order_attachment"),
@@ -135,6 +136,7 @@ urlpatterns = [
     path("console/settings/", views.system_settings, name="system_settings"),
     path("console/audit-logs/", views.audit_logs, name="audit_logs"),
     path("console/backup/", views.backup_restore, name="backup_restore"),
+    path("console/performance/", views.request_metrics_report, name="request_metrics_report"),
 
     path("login/", views.CustomLoginView.as_view(), name="login"),
     path("logout/", views.CustomLogoutView.as_view(), name="logout"),
@@ -180,6 +182,8 @@ urlpatterns = [
     # Invoice upload (two-step process)
     path("api/invoices/extract-preview/", views_invoice_upload.api_extract_invoice_preview, name="api_extract_invoice_preview"),
     path("api/invoices/create-from-upload/", views_invoice_upload.api_create_invoice_from_upload, name="api_create_invoice_from_upload"),
+    path("api/invoices/batch/preview/", views_invoice_upload.api_invoice_batch_preview, name="api_invoice_batch_preview"),
+    path("api/invoices/batch/confirm/", views_invoice_upload.api_invoice_batch_confirm, name="api_invoice_batch_confirm"),
     path("api/salespersons/", views_invoice_upload.api_get_salespersons, name="api_get_salespersons"),
     path("invoices/<int:pk>/", views_invoice.invoice_detail, name="invoice_detail"),
     path("invoices/<int:pk>/print/", views_invoice.invoice_print, name="invoice_print"),
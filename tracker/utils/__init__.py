@@ -10,9 +10,10 @@ import json
 from urllib import request, parse
 import re
 
-from django.core.cache import cache
 from django.utils import timezone
 
+from . import shared_cache
+
 
 # ---- HTTP helpers ---------------------------------------------------------
 
@@ -68,7 +69,7 @@ def send_sms(phone: str, message: str) -> tuple[bool, str]:
     return False, "No SMS provider configured. Set ZAPIER_SMS_WEBHOOK_URL or Twilio env vars."
 
 
-# ---- Phone helpers --------------------------------------------------------
+# ---- Phone / plate helpers ------------------------------------------------
 
 def normalize_phone(phone: str) -> str:
     """Normalize phone number by removing non-digits for consistent comparisons."""
@@ -79,6 +80,14 @@ def normalize_phone(phone: str) -> str:
     except Exception:
         return str(phone)
 
+
+def normalize_plate(plate: str) -> str:
+    """Canonical plate key: uppercase letters and digits only ("t 123-abc" -> "T123ABC")."""
+    if not plate:
+        return ""
+    return re.sub(r"[^A-Z0-9]", "", str(plate).upper())
+
+
 # ---- Audit log helpers ----------------------------------------------------
 
 def add_audit_log(user=None, action: str | None = None, details: str | None = None, **kwargs) -> None:
@@ -90,7 +99,6 @@ def add_audit_log(user=None, action: str | None = None, details: str | None = No
       - any extra metadata via kwargs stored under 'meta'
     """
     try:
-        logs = cache.get('audit_logs', []) or []
         action_val = action or kwargs.pop('action_type', None) or ''
         description_val = (kwargs.pop('description', None) or details or '')
         ip = kwargs.pop('ip', None)
@@ -106,21 +114,19 @@ def add_audit_log(user=None, action: str | None = None, details: str | None = No
             entry['ip'] = ip
         if meta:
             entry['meta'] = meta
-        logs.append(entry)
-        logs = logs[-500:]
-        cache.set('audit_logs', logs, None)
+        shared_cache.append('audit', 'logs', entry, limit=500)
     except Exception:
         # Avoid breaking user flows on logging errors
         pass
 
 
 def get_audit_logs() -> list:
-    logs = cache.get('audit_logs', []) or []
+    logs = shared_cache.get('audit', 'logs', []) or []
     return list(reversed(logs))
 
 
 def clear_audit_logs() -> None:
-    cache.delete('audit_logs')
+    shared_cache.delete('audit', 'logs')
 
 
 # ---- Branch scoping helpers ----------------------------------------------
@@ -172,17 +178,14 @@ def scope_queryset(qs, user, request=None):
 # ---- Inventory helpers ----------------------------------------------------
 
 def clear_inventory_cache(name: str | None = None, brand: str | None = None) -> None:
+    """Invalidate cached inventory lists, brand/stock lookups and dashboard metrics in every worker.
+
+    ``name`` and ``brand`` are accepted for compatibility; the whole namespace is bumped
+    because per-item keys cannot be enumerated.
+    """
     try:
-        cache.delete('api_inv_items_v1')
-        cache.delete('dashboard_metrics_v1')
-        if name:
-            cache.delete(f'api_inv_brands_{name}')
-            # Invalidate stock caches for specific brand, unbranded alias, and any-brand aggregate
-            keys = {f"api_inv_stock_{name}_{brand or 'any'}", f"api_inv_stock_{name}_any"}
-            if (brand or '').lower() == 'unbranded' or not (brand or '').strip():
-                keys.add(f"api_inv_stock_{name}_any")
-            for k in keys:
-                cache.delete(k)
+        shared_cache.bump('inventory')
+        shared_cache.bump('dashboard')
     except Exception:
         pass
 
@@ -1,83 +1,190 @@
+"""
+Server-side chart images (customer_groups monthly trends).
+
+matplotlib is optional and heavy to import, so it is loaded on the first render only,
+with the Agg backend selected once per process; importing this module costs nothing.
+
+Rendered images are cached by a SHA-256 of the input series, title, size and format:
+  - in a small per-process LRU (CHART_CACHE_ENTRIES), so hot charts skip even the
+    cache lookup;
+  - in the shared cache (namespace 'charts', CHART_CACHE_SECONDS), so every worker
+    reuses a chart any worker has drawn.
+Repeat page views with unchanged data therefore never render.
+"""
+
+from __future__ import annotations
+
 import base64
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from functools import lru_cache
 from io import BytesIO
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import pandas as pd
-from django.utils import timezone
-import numpy as np
 
-def generate_monthly_trend_chart(monthly_data, title, width=10, height=6):
+from django.conf import settings
+
+from . import shared_cache
+
+CACHE_NAMESPACE = 'charts'
+FORMATS = {'png', 'svg'}
+
+_lru = OrderedDict()
+_lru_lock = threading.Lock()
+# style.context() swaps the process-global rcParams, which figures read while they are
+# built and saved; renders hold this lock so request threads never see each other's style
+_render_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _matplotlib():
+    """Import matplotlib with the Agg backend (None when it is not installed)."""
+    try:
+        import matplotlib
+    except ImportError:
+        return None
+    matplotlib.use('Agg')
+    return matplotlib
+
+
+def charts_available() -> bool:
+    return _matplotlib() is not None
+
+
+def _month(value) -> date:
+    if isinstance(value, datetime):
+        return value.date().replace(day=1)
+    if isinstance(value, date):
+        return value.replace(day=1)
+    return datetime.fromisoformat(str(value)[:10]).date().replace(day=1)
+
+
+def _monthly_series(monthly_data) -> list[tuple[date, int]]:
+    """Orders per month, with months missing from the data filled in as 0."""
+    counts = {}
+    for row in monthly_data:
+        month = _month(row['month'])
+        counts[month] = counts.get(month, 0) + int(row.get('orders') or 0)
+    month, last = min(counts), max(counts)
+    series = []
+    while month <= last:
+        series.append((month, counts.get(month, 0)))
+        month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    return series
+
+
+def _cache_get(key):
+    with _lru_lock:
+        data = _lru.get(key)
+        if data is not None:
+            _lru.move_to_end(key)
+        return data
+
+
+def _cache_put(key, data):
+    limit = int(getattr(settings, 'CHART_CACHE_ENTRIES', 64))
+    with _lru_lock:
+        _lru[key] = data
+        _lru.move_to_end(key)
+        while len(_lru) > limit:
+            _lru.popitem(last=False)
+
+
+def render_cached(kind: str, payload: dict, render) -> bytes:
+    """
+    Return the image for ``payload``, calling ``render(payload)`` only on a cache miss.
+
+    Args:
+        kind: Chart kind, part of the cache key
+        payload: JSON-serialisable chart inputs (series, title, size, format)
+        render: Callable returning the image bytes
+
+    Returns:
+        Image bytes
+    """
+    digest = hashlib.sha256(
+        json.dumps([kind, payload], sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+    data = _cache_get(digest)
+    if data is None:
+        data = shared_cache.get_or_compute(
+            CACHE_NAMESPACE, (kind, digest), lambda: render(payload),
+            timeout=int(getattr(settings, 'CHART_CACHE_SECONDS', 24 * 3600)),
+        )
+        _cache_put(digest, data)
+    return data
+
+
+def _render_monthly_trend(payload: dict) -> bytes:
+    _matplotlib()
+    from matplotlib import dates as mdates
+    from matplotlib import style
+    from matplotlib.figure import Figure
+
+    months = [datetime.fromisoformat(m) for m in payload['months']]
+    # The seaborn style was renamed in matplotlib 3.6
+    style_name = 'seaborn-v0_8' if 'seaborn-v0_8' in style.available else 'seaborn'
+    with _render_lock, style.context(style_name):
+        # Figure without pyplot, so no global figure registry either
+        fig = Figure(figsize=(payload['width'], payload['height']))
+        ax = fig.subplots()
+        ax.plot(
+            months,
+            payload['orders'],
+            marker='o',
+            linewidth=2,
+            color='#4361ee',
+            markersize=8,
+            markerfacecolor='white',
+            markeredgewidth=2
+        )
+
+        # Format the x-axis to show month and year
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%b %Y'))
+        ax.xaxis.set_major_locator(mdates.MonthLocator(interval=1))
+        for label in ax.get_xticklabels():
+            label.set_rotation(45)
+            label.set_ha('right')
+
+        ax.grid(True, linestyle='--', alpha=0.7)
+        ax.set_xlabel('Month', fontsize=12, labelpad=10, fontfamily='sans-serif')
+        ax.set_ylabel('Number of Orders', fontsize=12, labelpad=10, fontfamily='sans-serif')
+        ax.set_title(payload['title'], fontsize=14, pad=20, fontweight='bold', fontfamily='sans-serif')
+        fig.tight_layout()
+
+        buffer = BytesIO()
+        fig.savefig(buffer, format=payload['format'], dpi=100, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def generate_monthly_trend_chart(monthly_data, title, width=10, height=6, fmt='png'):
     """
     Generate a monthly trend chart from the given data
-    
+
     Args:
         monthly_data: List of dicts with 'month' and 'orders' keys
         title: Chart title
         width: Figure width in inches
         height: Figure height in inches
-        
+        fmt: 'png' or 'svg'
+
     Returns:
-        Base64 encoded PNG image
+        Base64 encoded image, or None without data or without matplotlib
     """
-    if not monthly_data:
+    if not monthly_data or not charts_available():
         return None
-        
-    # Convert to DataFrame for easier manipulation
-    df = pd.DataFrame(monthly_data)
-    
-    # Ensure we have datetime objects
-    df['month'] = pd.to_datetime(df['month'])
-    
-    # Create a complete date range to ensure all months are shown
-    date_range = pd.date_range(
-        start=df['month'].min(),
-        end=df['month'].max(),
-        freq='MS'  # Month Start frequency
-    )
-    
-    # Reindex to include all months in the range
-    df = df.set_index('month').reindex(date_range).fillna(0).reset_index()
-    df = df.rename(columns={'index': 'month'})
-    
-    # Create the plot
-    plt.style.use('seaborn')
-    plt.rcParams['font.family'] = 'sans-serif'
-    
-    fig, ax = plt.subplots(figsize=(width, height))
-    
-    # Plot the data
-    ax.plot(
-        df['month'], 
-        df['orders'], 
-        marker='o', 
-        linewidth=2,
-        color='#4361ee',
-        markersize=8,
-        markerfacecolor='white',
-        markeredgewidth=2
-    )
-    
-    # Format the x-axis to show month and year
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%b %Y'))
-    ax.xaxis.set_major_locator(mdates.MonthLocator(interval=1))
-    
-    # Rotate and align the x-axis labels
-    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
-    
-    # Add grid
-    ax.grid(True, linestyle='--', alpha=0.7)
-    
-    # Set labels and title
-    ax.set_xlabel('Month', fontsize=12, labelpad=10)
-    ax.set_ylabel('Number of Orders', fontsize=12, labelpad=10)
-    ax.set_title(title, fontsize=14, pad=20, fontweight='bold')
-    
-    # Adjust layout to prevent label cutoff
-    plt.tight_layout()
-    
-    # Save to base64 string
-    buffer = BytesIO()
-    plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-    plt.close()
-    
-    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported chart format: {fmt}")
+
+    series = _monthly_series(monthly_data)
+    payload = {
+        'months': [m.isoformat() for m, _ in series],
+        'orders': [n for _, n in series],
+        'title': title,
+        'width': width,
+        'height': height,
+        'format': fmt,
+    }
+    data = render_cached('monthly_trend', payload, _render_monthly_trend)
+    return base64.b64encode(data).decode('utf-8')
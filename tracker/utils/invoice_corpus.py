@@ -0,0 +1,119 @@
+"""
+Versioned corpus of synthetic invoice PDFs for extraction benchmarks and golden checks.
+
+Documents are rendered with reportlab in invariant mode, so the same CORPUS_VERSION
+always produces byte-identical PDFs. Bump CORPUS_VERSION (and regenerate the golden
+file with ``benchmark_extraction --update-golden``) whenever the layout changes.
+"""
+
+import io
+import random
+from decimal import Decimal
+from pathlib import Path
+
+
+CORPUS_VERSION = 1
+# The golden outputs are test data, so they stay with the tests
+GOLDEN_PATH = (
+    Path(__file__).resolve().parent.parent / 'tests' / 'fixtures' / f'extraction_golden_v{CORPUS_VERSION}.json'
+)
+
+# (name, pages, line items per page)
+CORPUS_SPECS = [
+    ('pi_1p_5items', 1, 5),
+    ('pi_1p_25items', 1, 25),
+    ('pi_5p', 5, 20),
+    ('pi_20p', 20, 25),
+    ('pi_50p', 50, 25),
+]
+
+CUSTOMERS = ['STATEOIL TANZANIA LIMITED', 'SERENGETI BREWERIES LTD', 'JUMA HASSAN MUSHI', 'TANROADS DODOMA']
+ITEMS = [
+    ('22007', 'LABOUR CHARGES WHEEL BALANCE', 'UNT'),
+    ('3795', 'WHEEL ALIGNMENT 4X4', 'UNT'),
+    ('41003', 'TYRE 315/80R22.5 MICHELIN X MULTI', 'PCS'),
+    ('41872', 'TYRE 205/55R16 BRIDGESTONE TURANZA', 'PCS'),
+    ('50101', 'BATTERY N70 12V', 'PCS'),
+    ('60420', 'ENGINE OIL 5W30 SYNTHETIC', 'LTR'),
+    ('70015', 'TUBE 1000R20 HEAVY DUTY', 'PCS'),
+]
+
+
+def _money(value):
+    return f'{value:,.2f}'
+
+
+def build_invoice_pdf(name, pages, items_per_page):
+    """Render one synthetic proforma invoice and return its PDF bytes."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    rng = random.Random(f'{CORPUS_VERSION}:{name}')
+    buf = io.BytesIO()
+    pdf = canvas.Canvas(buf, pagesize=A4, invariant=1)
+    width, height = A4
+    customer = rng.choice(CUSTOMERS)
+    pi_no = f'PI-{rng.randint(1000000, 9999999)}'
+    subtotal = Decimal('0')
+    sr = 0
+
+    for page in range(1, pages + 1):
+        y = height - 50
+        pdf.setFont('Helvetica-Bold', 14)
+        pdf.drawString(40, y, 'Proforma Invoice')
+        pdf.setFont('Helvetica', 10)
+        y -= 20
+        pdf.drawString(40, y, f'PI No: {pi_no}')
+        if page == 1:
+            for line in (
+                f'Customer Name: {customer}',
+                'Address: P.O. Box 1234 Dar es Salaam',
+                f'Tel: +255 7{rng.randint(10000000, 99999999)}',
+                'Code No: A01696',
+                f'Date: {rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024',
+                f'Reference: FOR T{rng.randint(100, 999)}ABC',
+            ):
+                y -= 14
+                pdf.drawString(40, y, line)
+        y -= 24
+        pdf.setFont('Courier-Bold', 8)
+        pdf.drawString(40, y, 'Sr No  Item Code  Description                          Type  Qty        Rate        Value')
+        pdf.setFont('Courier', 8)
+        for _ in range(items_per_page):
+            sr += 1
+            code, desc, unit = ITEMS[rng.randrange(len(ITEMS))]
+            qty = rng.choice([1, 1, 2, 4])
+            rate = Decimal(rng.randrange(15, 900) * 1000)
+            value = rate * qty
+            subtotal += value
+            y -= 12
+            pdf.drawString(40, y, f'{sr:<6} {code:<10} {desc:<36} {unit:<5} {qty:<4} {_money(rate):>12} {_money(value):>12}')
+        if page == pages:
+            vat = (subtotal * Decimal('0.18')).quantize(Decimal('0.01'))
+            pdf.setFont('Helvetica', 10)
+            for label, amount in (('Net Value', subtotal), ('VAT', vat), ('Gross Value', subtotal + vat)):
+                y -= 16
+                pdf.drawString(300, y, f'{label}: {_money(amount)}')
+        pdf.setFont('Helvetica', 8)
+        pdf.drawString(width / 2 - 30, 30, f'Page {page} of {pages}')
+        pdf.showPage()
+
+    pdf.save()
+    return buf.getvalue()
+
+
+def iter_corpus(names=None):
+    """Yield (name, pages, items, pdf_bytes) for every document in the corpus."""
+    for name, pages, per_page in CORPUS_SPECS:
+        if names and name not in names:
+            continue
+        yield name, pages, pages * per_page, build_invoice_pdf(name, pages, per_page)
+
+
+def golden_view(result):
+    """Stable subset of an extract_from_bytes() result compared against the golden file."""
+    return {
+        'success': result.get('success'),
+        'header': {k: v for k, v in sorted((result.get('header') or {}).items())},
+        'items': result.get('items') or [],
+    }
@@ -0,0 +1,133 @@
+"""
+Rendered invoice PDF cache.
+
+WeasyPrint rendering of invoice_print.html costs hundreds of milliseconds or more, while
+an invoice rarely changes after it is issued. Rendered PDFs are stored under
+MEDIA_ROOT/invoice_pdfs/ with a file name derived from the invoice revision
+(id + TEMPLATE_VERSION + a hash of every value the template prints, including the
+customer, vehicle, payment and line item fields), so a repeat download is a file read
+and any edit naturally produces a new file. Once a current revision is written, older
+files of the same invoice are removed; a render that finishes after the invoice changed
+again leaves the newer files alone.
+
+Bump TEMPLATE_VERSION whenever tracker/invoice_print.html changes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_VERSION = 1
+_LOGO_DIR = Path(__file__).resolve().parent.parent / 'static' / 'assets' / 'images' / 'logo'
+
+# One background renderer per process keeps pre-rendering from competing with requests for CPU
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='invoice-pdf')
+
+
+def cache_dir() -> Path:
+    return Path(getattr(settings, 'INVOICE_PDF_CACHE_DIR', None) or Path(settings.MEDIA_ROOT) / 'invoice_pdfs')
+
+
+# Related values printed by invoice_print.html; the invoice's own fields are covered by updated_at
+PRINTED_FIELDS = (
+    'updated_at',
+    'customer__code', 'customer__full_name', 'customer__address', 'customer__phone', 'customer__tax_number',
+    'vehicle__plate_number', 'payment__payment_method',
+    'created_by__username', 'created_by__first_name', 'created_by__last_name',
+)
+PRINTED_LINE_FIELDS = (
+    'id', 'code', 'inventory_item__sku', 'description', 'unit', 'item_type',
+    'quantity', 'unit_price', 'line_total',
+)
+
+
+def revision_key(invoice) -> str:
+    """Identify the rendered content: changes whenever any value the template prints changes."""
+    from ..models import Invoice
+
+    printed = Invoice.objects.filter(pk=invoice.pk).values_list(*PRINTED_FIELDS).first()
+    lines = list(invoice.line_items.order_by('created_at', 'id').values_list(*PRINTED_LINE_FIELDS))
+    digest = hashlib.sha1(repr((printed, lines)).encode('utf-8')).hexdigest()[:12]
+    return f'{invoice.pk}-t{TEMPLATE_VERSION}-{digest}'
+
+
+def cached_path(invoice) -> Path:
+    return cache_dir() / f'{revision_key(invoice)}.pdf'
+
+
+def render_invoice_pdf(invoice, base_url: str | None = None) -> bytes:
+    """Render invoice_print.html to PDF bytes (raises ImportError without WeasyPrint)."""
+    from django.template.loader import render_to_string
+    from weasyprint import HTML
+
+    context = {
+        'invoice': invoice,
+        'logo_left_url': f"file://{_LOGO_DIR / 'stm_logo.png'}",
+        'logo_right_url': f"file://{_LOGO_DIR / 'wecare.png'}",
+    }
+    html_string = render_to_string('tracker/invoice_print.html', context)
+    return HTML(string=html_string, base_url=base_url or str(settings.BASE_DIR)).write_pdf()
+
+
+def get_or_render(invoice, base_url: str | None = None) -> Path:
+    """Return the path of the cached PDF for the invoice's current revision, rendering it if needed."""
+    path = cached_path(invoice)
+    if path.exists():
+        return path
+    pdf = render_invoice_pdf(invoice, base_url)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write atomically so concurrent readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(pdf)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    if cached_path(invoice) != path:
+        # The invoice changed while rendering; the newer revision's file is not ours to drop
+        return path
+    written = path.stat().st_mtime_ns
+    for old in path.parent.glob(f'{invoice.pk}-*.pdf'):
+        try:
+            if old != path and old.stat().st_mtime_ns < written:
+                old.unlink()
+        except OSError:
+            pass
+    return path
+
+
+def _prerender(invoice_id: int) -> None:
+    from ..models import Invoice
+    close_old_connections()
+    try:
+        invoice = Invoice.objects.select_related('customer', 'vehicle', 'created_by').get(pk=invoice_id)
+        get_or_render(invoice)
+    except ImportError:
+        pass
+    except Exception as e:
+        logger.warning(f"Background PDF render failed for invoice {invoice_id}: {e}")
+    finally:
+        close_old_connections()
+
+
+def prerender_async(invoice_id: int) -> None:
+    """Queue a background render once the current transaction commits."""
+    if not getattr(settings, 'INVOICE_PDF_PRERENDER', True):
+        return
+    transaction.on_commit(lambda: _executor.submit(_prerender, invoice_id))
@@ -0,0 +1,142 @@
+"""
+Content-addressed media storage.
+
+Every file saved through default_storage (invoice documents, order attachments, signed
+copies, completion attachments, signatures) is stored once per distinct content:
+
+  - the bytes live in a blob named by their SHA-256, sharded as
+    MEDIA_ROOT/.blobs/ab/cd/abcd...;
+  - the file name the model keeps (``invoices/scan.pdf``) is a hard link to that blob,
+    so MEDIA_URL serving, ``FieldFile.path`` and existing names keep working;
+  - re-uploading or re-signing identical content adds a link, not a copy.
+
+The reference count of a blob is its link count minus one; blobs no longer referenced
+by any media file are removed by ``python manage.py gc_media_blobs``, which can also
+fold files stored before this backend into blobs (``--adopt``).
+
+Stored files are immutable: storage never rewrites a file in place, and neither may
+callers (all links share the same bytes). On filesystems without hard links, files are
+copied and simply not deduplicated.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+
+BLOB_DIR = '.blobs'
+CHUNK_SIZE = 256 * 1024
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that hard-links every saved file to a blob named by its SHA-256."""
+
+    @property
+    def blob_root(self) -> str:
+        return os.path.join(self.location, getattr(settings, 'MEDIA_BLOB_DIR', BLOB_DIR))
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.blob_root, sha256[:2], sha256[2:4], sha256)
+
+    def reference_count(self, name: str) -> int:
+        """Number of media files sharing this file's content (1 when not deduplicated)."""
+        links = os.stat(self.path(name)).st_nlink
+        return max(1, links - 1)
+
+    def _content_sha256(self, content) -> str:
+        # Spooled uploads (upload_spool.SpooledUpload) were hashed while being written
+        sha256 = getattr(content, 'sha256', None)
+        if sha256:
+            return sha256
+        digest = hashlib.sha256()
+        for chunk in content.chunks(CHUNK_SIZE):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def _stage(self, content, blob: str) -> str:
+        """Write the content to a uniquely named temporary file beside its blob."""
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        fd, staged = tempfile.mkstemp(dir=os.path.dirname(blob), suffix='.partial')
+        try:
+            if hasattr(content, 'temporary_file_path'):
+                os.close(fd)
+                file_move_safe(content.temporary_file_path(), staged, allow_overwrite=True)
+            else:
+                with os.fdopen(fd, 'wb') as fh:
+                    for chunk in content.chunks(CHUNK_SIZE):
+                        fh.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(staged, self.file_permissions_mode)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(staged)
+            raise
+        return staged
+
+    def _link(self, blob: str, full_path: str) -> None:
+        try:
+            os.link(blob, full_path)
+        except (FileExistsError, FileNotFoundError):
+            raise
+        except OSError:
+            # No hard links here (other filesystem, Windows share...): plain copy
+            with open(blob, 'rb') as src, open(full_path, 'xb') as dst:
+                shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+    def _save(self, name, content):
+        blob = self.blob_path(self._content_sha256(content))
+        staged = None
+        try:
+            while True:
+                full_path = self.path(name)
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                try:
+                    if staged is None and os.path.exists(blob):
+                        try:
+                            self._link(blob, full_path)
+                            break
+                        except FileNotFoundError:
+                            # Collected by gc_media_blobs since the check; store the content again
+                            pass
+                    if staged is None:
+                        staged = self._stage(content, blob)
+                    # Link the name before publishing the blob, so the blob is referenced
+                    # from the moment it appears and gc_media_blobs cannot take it
+                    self._link(staged, full_path)
+                    os.replace(staged, blob)
+                    staged = None
+                    break
+                except FileExistsError:
+                    # A file appeared under this name since get_available_name(); pick another
+                    name = self.get_available_name(name)
+        finally:
+            if staged is not None:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(staged)
+        return str(name).replace('\\', '/')
+
+    def iter_blobs(self):
+        """Yield (path, link count, size, mtime) for every blob."""
+        for dirpath, _dirs, files in os.walk(self.blob_root):
+            for filename in files:
+                path = os.path.join(dirpath, filename)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, st.st_nlink, st.st_size, st.st_mtime
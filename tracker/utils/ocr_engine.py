@@ -0,0 +1,199 @@
+"""
+OCR for scanned invoices: image-only PDF pages and photos.
+
+Pages without a text layer are rendered with PyMuPDF at INVOICE_OCR_DPI, then
+preprocessed (invoice_extractor.preprocess_image_pil) and read with tesseract using
+the same settings as invoice_extractor.ocr_image. Pages are OCR'd in one process pool
+per web worker, shared by every request thread (batch uploads included) and started
+with forkserver/spawn rather than forked from the threaded server; a 10-page scan takes
+about as long as its slowest page rather than the sum of all pages. Results are cached
+in the shared cache by a hash of the rendered page, so re-uploading the same scan (or a
+PDF repeating a page) does not run tesseract again.
+
+Everything degrades to "no OCR" when pytesseract, the tesseract binary or PyMuPDF is
+missing; callers check ocr_available().
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+from django.conf import settings
+
+from . import shared_cache
+
+try:
+    import fitz
+except ImportError:
+    fitz = None
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_NAMESPACE = 'ocr'
+TESSERACT_CONFIG = '--psm 6'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+@lru_cache(maxsize=1)
+def ocr_available() -> bool:
+    """True when pytesseract and the tesseract binary are both installed."""
+    if pytesseract is None:
+        return False
+    command = getattr(pytesseract.pytesseract, 'tesseract_cmd', 'tesseract')
+    return bool(shutil.which(command) or os.path.isfile(command))
+
+
+def _pool_size() -> int:
+    configured = int(_setting('INVOICE_OCR_WORKERS', 0) or 0)
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    return max(1, configured if configured > 0 else min(4, cpus))
+
+
+def _worker_count(jobs: int) -> int:
+    return max(1, min(_pool_size(), jobs))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """The worker's OCR process pool, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Forking a multithreaded server can copy locks held by other threads
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _pool = ProcessPoolExecutor(max_workers=_pool_size(), mp_context=multiprocessing.get_context(method))
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next call starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def _ocr_png(png_bytes: bytes) -> str:
+    """Preprocess and OCR one rendered page (runs in a pool worker)."""
+    from PIL import Image
+    from .invoice_extractor import preprocess_image_pil
+
+    try:
+        image = Image.open(io.BytesIO(png_bytes)).convert('RGB')
+        return pytesseract.image_to_string(preprocess_image_pil(image), config=TESSERACT_CONFIG)
+    except Exception as e:
+        # Some pytesseract errors cannot be unpickled in the parent, which would break the shared pool
+        raise RuntimeError(f'{type(e).__name__}: {e}') from None
+
+
+def _page_key(png_bytes: bytes) -> str:
+    return hashlib.sha256(png_bytes + TESSERACT_CONFIG.encode('ascii')).hexdigest()
+
+
+def ocr_images(images: list[bytes]) -> list[str]:
+    """
+    OCR rendered page images, in parallel and through the per-page cache.
+
+    Args:
+        images: PNG bytes per page
+
+    Returns:
+        Text per page, in the same order ('' where OCR failed)
+    """
+    if not images:
+        return []
+    timeout = _setting('INVOICE_OCR_CACHE_SECONDS', 7 * 24 * 3600)
+    keys = [_page_key(png) for png in images]
+    cached = {key: shared_cache.get(CACHE_NAMESPACE, key) for key in set(keys)}
+    # One OCR run per distinct page image, even when a document repeats a page
+    missing = sorted({keys.index(key) for key, text in cached.items() if text is None})
+    if not missing:
+        return [cached[key] for key in keys]
+
+    workers = _worker_count(len(missing))
+    if workers == 1:
+        results = []
+        for i in missing:
+            try:
+                results.append(_ocr_png(images[i]))
+            except Exception as e:
+                logger.warning(f"OCR failed for page {i + 1}: {e}")
+                results.append(None)
+    else:
+        pool = _get_pool()
+        results = []
+        try:
+            futures = [pool.submit(_ocr_png, images[i]) for i in missing]
+        except BrokenProcessPool as e:
+            _discard_pool(pool)
+            logger.warning(f"OCR pool unavailable: {e}")
+            futures = []
+            results = [None] * len(missing)
+        for i, future in zip(missing, futures):
+            try:
+                results.append(future.result())
+            except BrokenProcessPool as e:
+                _discard_pool(pool)
+                logger.warning(f"OCR failed for page {i + 1}: {e}")
+                results.append(None)
+            except Exception as e:
+                logger.warning(f"OCR failed for page {i + 1}: {e}")
+                results.append(None)
+
+    for i, text in zip(missing, results):
+        cached[keys[i]] = text or ''
+        if text is not None:
+            shared_cache.set(CACHE_NAMESPACE, keys[i], text, timeout=timeout)
+    return [cached[key] for key in keys]
+
+
+def render_page(page, dpi: int | None = None) -> bytes:
+    """Render a PDF page to grayscale PNG bytes for OCR."""
+    dpi = dpi or _setting('INVOICE_OCR_DPI', 300)
+    return page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY).tobytes('png')
+
+
+def ocr_pdf_pages(doc, page_indexes: list[int], dpi: int | None = None) -> dict[int, str]:
+    """
+    OCR the given pages of an open PyMuPDF document.
+
+    Returns:
+        Dict of page index -> recognised text
+    """
+    if not page_indexes or not ocr_available():
+        return {}
+    images = [render_page(doc[i], dpi) for i in page_indexes]
+    return dict(zip(page_indexes, ocr_images(images)))
+
+
+def ocr_image_bytes(file_bytes) -> str:
+    """OCR an uploaded photo or scan (JPEG, PNG, TIFF...), given as bytes or a path."""
+    if not ocr_available():
+        return ''
+    from PIL import Image
+
+    source = file_bytes if isinstance(file_bytes, (str, os.PathLike)) else io.BytesIO(file_bytes)
+    buffer = io.BytesIO()
+    Image.open(source).convert('RGB').save(buffer, format='PNG')
+    return ocr_images([buffer.getvalue()])[0]
@@ -0,0 +1,260 @@
+"""
+Keyset (cursor) pagination for large list views.
+
+OFFSET pagination makes the database walk and discard every earlier row, so page 500
+costs 500 times page 1, and Paginator adds a COUNT(*) over the same joins on every
+request. Keyset pagination filters on the sort key of the last row shown instead:
+
+    WHERE created_at < :last_created_at OR (created_at = :last_created_at AND id < :last_id)
+    ORDER BY created_at DESC, id DESC LIMIT 21
+
+which an index on the sort columns answers in the same time at any depth.
+
+Pages are addressed with opaque ``?after=<cursor>`` / ``?before=<cursor>`` parameters
+(``?page=last`` jumps to the end); ``?page=N`` still works as an explicit OFFSET
+fallback for old links and bookmarks. Totals come from a short-lived shared cache
+entry rather than a COUNT per page view, so they may lag new rows by up to
+COUNT_TIMEOUT seconds.
+
+The ordering must end with a unique column (normally ``id``) and use non-null columns.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import math
+
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.db.models import Q
+from django.http import QueryDict
+from django.utils.functional import cached_property
+
+from . import shared_cache
+
+
+COUNT_TIMEOUT = 120
+CURSOR_PARAMS = ('page', 'after', 'before')
+
+
+def cached_count(queryset, timeout: int = COUNT_TIMEOUT) -> int:
+    """COUNT(*) for a queryset, shared between workers for ``timeout`` seconds."""
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.sha1(f'{sql}|{params!r}'.encode('utf-8')).hexdigest()
+    return shared_cache.get_or_compute('counts', digest, queryset.count, timeout=timeout)
+
+
+def _json_default(value):
+    # Full isoformat keeps microseconds, which the seek comparison needs to be exact
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(values, number: int) -> str:
+    raw = json.dumps({'k': list(values), 'n': number}, default=_json_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str) -> tuple[list, int] | None:
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        data = json.loads(raw)
+        return list(data['k']), max(1, int(data.get('n') or 1))
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
+class KeysetPaginator:
+    """Paginator-like object ordering ``queryset`` by ``ordering`` and seeking by cursor."""
+
+    def __init__(self, queryset, per_page: int, ordering=('-created_at', '-id')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self._keys = [(o.lstrip('-'), o.startswith('-')) for o in self.ordering]
+
+    @cached_property
+    def count(self) -> int:
+        return cached_count(self.queryset)
+
+    @property
+    def num_pages(self) -> int:
+        return max(1, math.ceil(self.count / self.per_page))
+
+    def _reversed_ordering(self):
+        return [o[1:] if o.startswith('-') else f'-{o}' for o in self.ordering]
+
+    def _parse_values(self, values):
+        if len(values) != len(self._keys):
+            raise ValueError('cursor does not match ordering')
+        model = self.queryset.model
+        parsed = [model._meta.get_field(name).to_python(v) for (name, _), v in zip(self._keys, values)]
+        if any(v is None for v in parsed):
+            raise ValueError('cursor contains null sort key')
+        return parsed
+
+    def _seek(self, values, forward: bool):
+        """Rows strictly after (forward) or before the given sort-key values."""
+        condition = Q()
+        equal = {}
+        for (name, desc), value in zip(self._keys, values):
+            op = 'lt' if desc == forward else 'gt'
+            condition |= Q(**equal, **{f'{name}__{op}': value})
+            equal[name] = value
+        return self.queryset.filter(condition)
+
+    def cursor_for(self, obj, number: int) -> str:
+        if isinstance(obj, dict):
+            values = [obj[name] for name, _ in self._keys]
+        else:
+            values = [getattr(obj, name) for name, _ in self._keys]
+        return encode_cursor(values, number)
+
+    def first(self) -> 'KeysetPage':
+        rows = list(self.queryset.order_by(*self.ordering)[:self.per_page + 1])
+        return KeysetPage(self, rows[:self.per_page], 1, len(rows) > self.per_page, False)
+
+    def last(self) -> 'KeysetPage':
+        rows = list(self.queryset.order_by(*self._reversed_ordering())[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        number = self.num_pages if has_previous else 1
+        return KeysetPage(self, rows[:self.per_page][::-1], number, False, has_previous)
+
+    def after(self, token: str) -> 'KeysetPage':
+        decoded = decode_cursor(token)
+        try:
+            values = self._parse_values(decoded[0]) if decoded else None
+        except Exception:
+            values = None
+        if values is None:
+            return self.first()
+        qs = self._seek(values, forward=True).order_by(*self.ordering)
+        rows = list(qs[:self.per_page + 1])
+        return KeysetPage(self, rows[:self.per_page], decoded[1], len(rows) > self.per_page, True)
+
+    def before(self, token: str) -> 'KeysetPage':
+        decoded = decode_cursor(token)
+        try:
+            values = self._parse_values(decoded[0]) if decoded else None
+        except Exception:
+            values = None
+        if values is None:
+            return self.first()
+        qs = self._seek(values, forward=False).order_by(*self._reversed_ordering())
+        rows = list(qs[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        number = decoded[1] if has_previous else 1
+        return KeysetPage(self, rows[:self.per_page][::-1], number, True, has_previous)
+
+    def offset_page(self, number) -> 'KeysetPage':
+        """Explicit ?page=N fallback: OFFSET query, but links onward are cursors again."""
+        paginator = Paginator(self.queryset.order_by(*self.ordering), self.per_page)
+        # Reuse the cached total instead of Paginator's own COUNT
+        paginator.__dict__['count'] = self.count
+        try:
+            page = paginator.page(number)
+        except PageNotAnInteger:
+            page = paginator.page(1)
+        except EmptyPage:
+            page = paginator.page(paginator.num_pages)
+        return KeysetPage(self, list(page.object_list), page.number, page.has_next(), page.has_previous())
+
+
+class KeysetPage:
+    """A page of rows with the Page API the list templates use, plus cursor links."""
+
+    def __init__(self, paginator: KeysetPaginator, object_list, number, has_next, has_previous):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.number = number
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.query_params = None
+
+    def __repr__(self):
+        return f'<KeysetPage {self.number}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+    def start_index(self) -> int:
+        if not self.object_list:
+            return 0
+        return (self.number - 1) * self.paginator.per_page + 1
+
+    def end_index(self) -> int:
+        return self.start_index() + len(self.object_list) - 1 if self.object_list else 0
+
+    @property
+    def next_cursor(self) -> str | None:
+        if not (self._has_next and self.object_list):
+            return None
+        return self.paginator.cursor_for(self.object_list[-1], self.number + 1)
+
+    @property
+    def previous_cursor(self) -> str | None:
+        if not (self._has_previous and self.object_list):
+            return None
+        return self.paginator.cursor_for(self.object_list[0], max(1, self.number - 1))
+
+    def _query(self, **extra) -> str:
+        params = self.query_params.copy() if self.query_params is not None else QueryDict(mutable=True)
+        for key in CURSOR_PARAMS:
+            params.pop(key, None)
+        for key, value in extra.items():
+            params[key] = value
+        return params.urlencode()
+
+    @property
+    def first_query(self) -> str:
+        return self._query()
+
+    @property
+    def last_query(self) -> str:
+        return self._query(page='last')
+
+    @property
+    def next_query(self) -> str:
+        cursor = self.next_cursor
+        return self._query(after=cursor) if cursor else ''
+
+    @property
+    def previous_query(self) -> str:
+        cursor = self.previous_cursor
+        return self._query(before=cursor) if cursor else ''
+
+
+def paginate(request, queryset, per_page: int, ordering=('-created_at', '-id')) -> KeysetPage:
+    """Return the requested page of ``queryset`` from ?after= / ?before= / ?page= parameters."""
+    paginator = KeysetPaginator(queryset, per_page, ordering)
+    params = request.GET
+    page_param = (params.get('page') or '').strip()
+    if params.get('after'):
+        page = paginator.after(params['after'])
+    elif params.get('before'):
+        page = paginator.before(params['before'])
+    elif page_param == 'last':
+        page = paginator.last()
+    elif page_param and page_param != '1':
+        page = paginator.offset_page(page_param)
+    else:
+        page = paginator.first()
+    page.query_params = params.copy()
+    return page
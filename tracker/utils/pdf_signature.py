@@ -3,18 +3,25 @@ from __future__ import annotations
 import math
 from io import BytesIO
 from pathlib import Path
-from typing import Tuple, Optional, Dict, Any
+from typing import TYPE_CHECKING, Tuple, Optional, Dict, Any
 
-from PIL import Image, ImageOps, ImageFilter, ImageEnhance
-from PyPDF2 import PdfReader, PdfWriter
-from reportlab.lib.utils import ImageReader
-from reportlab.pdfgen import canvas
+# Pillow, PyPDF2 and reportlab are imported where a document is signed, not at import
+# time: views import this module, and most requests never sign anything.
+if TYPE_CHECKING:
+    from PIL import Image
 
 
 class SignatureEmbedError(Exception):
     """Raised when a signature cannot be embedded into the provided PDF."""
 
 
+def _document_source(document):
+    """Readers take the document as bytes or, for spooled uploads, as a path on disk."""
+    if isinstance(document, (str, Path)):
+        return str(document)
+    return BytesIO(document)
+
+
 def _scale_dimensions(
     page_width: float,
     page_height: float,
@@ -65,6 +72,8 @@ def _calculate_signature_position(
 
 def _convert_to_blue_ink(signature_image: Image.Image) -> Image.Image:
     """Convert signature to look like real blue ink pen writing."""
+    from PIL import Image
+
     # Convert to RGBA if not already
     if signature_image.mode != 'RGBA':
         signature_image = signature_image.convert('RGBA')
@@ -110,6 +119,8 @@ def _convert_to_blue_ink(signature_image: Image.Image) -> Image.Image:
 
 def _enhance_signature_for_pen_effect(signature_image: Image.Image) -> Image.Image:
     """Enhance signature to make it look more like pen writing."""
+    from PIL import Image, ImageEnhance, ImageFilter
+
     # Increase contrast to make signature more defined
     if signature_image.mode == 'RGBA':
         # Separate alpha channel
@@ -131,7 +142,7 @@ def _enhance_signature_for_pen_effect(signature_image: Image.Image) -> Image.Ima
 
 
 def embed_signature_in_pdf(
-    pdf_bytes: bytes,
+    pdf_bytes: bytes | str | Path,
     signature_bytes: bytes,
     *,
     position_type: str = "customer",
@@ -141,13 +152,18 @@ def embed_signature_in_pdf(
     preset: Optional[str] = None,
 ) -> bytes:
     """Return a PDF with blue ink signature embedded."""
+    from PIL import Image
+    from PyPDF2 import PdfReader, PdfWriter
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
     if not pdf_bytes:
         raise SignatureEmbedError("No PDF content provided.")
     if not signature_bytes:
         raise SignatureEmbedError("No signature content provided.")
 
     try:
-        reader = PdfReader(BytesIO(pdf_bytes))
+        reader = PdfReader(_document_source(pdf_bytes))
     except Exception as exc:
         raise SignatureEmbedError("Could not read the provided PDF document.") from exc
 
@@ -230,7 +246,7 @@ def embed_signature_in_pdf(
 
 
 def embed_signature_in_image(
-    image_bytes: bytes,
+    image_bytes: bytes | str | Path,
     signature_bytes: bytes,
     *,
     position_type: str = "customer",
@@ -241,13 +257,15 @@ def embed_signature_in_image(
     preset: Optional[str] = None,
 ) -> bytes:
     """Overlay blue ink signature onto the image."""
+    from PIL import Image
+
     if not image_bytes:
         raise SignatureEmbedError("No image content provided.")
     if not signature_bytes:
         raise SignatureEmbedError("No signature content provided.")
 
     try:
-        base_img = Image.open(BytesIO(image_bytes))
+        base_img = Image.open(_document_source(image_bytes))
     except Exception as exc:
         raise SignatureEmbedError("Could not read the provided image document.") from exc
 
@@ -5,6 +5,7 @@ CORRECTED VERSION: Proper line item extraction without payment information in de
 
 import io
 import logging
+import os
 import re
 from decimal import Decimal
 from datetime import datetime
@@ -20,17 +21,31 @@ try:
 except ImportError:
     PyPDF2 = None
 
+from . import ocr_engine
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _is_path(source) -> bool:
+    return isinstance(source, (str, os.PathLike))
+
+
 def extract_text_from_pdf(file_bytes) -> list:
-    """Extract text from PDF file with page separation for multi-page handling."""
+    """Extract text from PDF file with page separation for multi-page handling.
+
+    Accepts the PDF as bytes or as a path; a path is opened in place, so pages are
+    read from disk as needed instead of from an in-memory copy.
+    """
     pages_data = []
     
     if fitz is not None:
         try:
-            doc = fitz.open(stream=file_bytes, filetype="pdf")
+            if _is_path(file_bytes):
+                doc = fitz.open(file_bytes, filetype="pdf")
+            else:
+                doc = fitz.open(stream=file_bytes, filetype="pdf")
+            scanned = []
             for page_num, page in enumerate(doc):
                 page_text = page.get_text("text", sort=True)
                 if page_text and page_text.strip():
@@ -39,6 +54,20 @@ def extract_text_from_pdf(file_bytes) -> list:
                         'text': page_text,
                         'lines': [line.strip() for line in page_text.split('\n') if line.strip()]
                     })
+                else:
+                    scanned.append(page_num)
+            # Image-only pages (scans): OCR them in parallel and slot them back in page order
+            if scanned and ocr_engine.ocr_available():
+                for page_num, page_text in ocr_engine.ocr_pdf_pages(doc, scanned).items():
+                    if page_text.strip():
+                        pages_data.append({
+                            'page_num': page_num + 1,
+                            'text': page_text,
+                            'lines': [line.strip() for line in page_text.split('\n') if line.strip()],
+                            'ocr': True,
+                        })
+                pages_data.sort(key=lambda p: p['page_num'])
+                logger.info(f"OCR processed {len(scanned)} image-only page(s)")
             doc.close()
 
             if pages_data:
@@ -51,7 +80,7 @@ def extract_text_from_pdf(file_bytes) -> list:
 
     if PyPDF2 is not None and not pages_data:
         try:
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
+            pdf_reader = PyPDF2.PdfReader(file_bytes if _is_path(file_bytes) else io.BytesIO(file_bytes))
             for page_num, page in enumerate(pdf_reader.pages):
                 page_text = page.extract_text()
                 if page_text and page_text.strip():
@@ -70,9 +99,11 @@ def extract_text_from_pdf(file_bytes) -> list:
     raise RuntimeError('PDF extraction failed with both PyMuPDF and PyPDF2')
 
 def extract_text_from_image(file_bytes) -> str:
-    """Extract text from image file."""
-    logger.info("Image file detected. OCR not available. Manual entry required.")
-    return ""
+    """Extract text from image file with OCR ('' when OCR is not available)."""
+    if not ocr_engine.ocr_available():
+        logger.info("Image file detected. OCR not available. Manual entry required.")
+        return ""
+    return ocr_engine.ocr_image_bytes(file_bytes)
 
 def parse_invoice_data(pages_data: list) -> dict:
     """Parse invoice data from extracted pages with multi-page support."""
@@ -794,6 +825,15 @@ def extract_monetary_value(lines, patterns):
                     pass
     return None
 
+def extract_from_path(path, filename: str = '') -> dict:
+    """Same as extract_from_bytes for a file on disk (e.g. a spooled upload), without reading it into memory."""
+    if not os.path.getsize(path):
+        return extract_from_bytes(b'', filename)
+    with open(path, 'rb') as fh:
+        head = fh.read(4)
+    return _extract(os.fspath(path), filename or os.path.basename(path), head)
+
+
 def extract_from_bytes(file_bytes, filename: str = '') -> dict:
     """Main entry point: extract text from file and parse invoice data."""
     if not file_bytes:
@@ -801,40 +841,60 @@ def extract_from_bytes(file_bytes, filename: str = '') -> dict:
             'success': False, 'error': 'empty_file', 'message': 'File is empty.',
             'ocr_available': False, 'header': {}, 'items': [], 'raw_text': ''
         }
+    return _extract(file_bytes, filename, file_bytes[:4])
 
-    is_pdf = filename.lower().endswith('.pdf') or (len(file_bytes) > 4 and file_bytes[:4] == b'%PDF')
+
+def _extract(file_bytes, filename: str, head: bytes) -> dict:
+    """Extract and parse a document given as bytes or a path; head is its first bytes."""
+    is_pdf = filename.lower().endswith('.pdf') or head == b'%PDF'
     is_image = filename.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.tiff', '.bmp'))
 
+    ocr_ready = ocr_engine.ocr_available()
+
     if is_image:
-        return {
-            'success': False, 'error': 'image_file_not_supported', 
-            'message': 'Image files are not supported.', 'ocr_available': False,
-            'header': {}, 'items': [], 'raw_text': ''
-        }
+        if not ocr_ready:
+            return {
+                'success': False, 'error': 'image_file_not_supported',
+                'message': 'Image files are not supported.', 'ocr_available': ocr_ready,
+                'header': {}, 'items': [], 'raw_text': ''
+            }
+        # Photo or scan: OCR it and parse the text like a single-page PDF
+        try:
+            all_text = extract_text_from_image(file_bytes)
+        except Exception as e:
+            logger.error(f"Image OCR failed: {e}")
+            return {
+                'success': False, 'error': 'ocr_failed',
+                'message': f'Could not read text from image: {str(e)}', 'ocr_available': ocr_ready,
+                'header': {}, 'items': [], 'raw_text': ''
+            }
+        lines = [line.strip() for line in all_text.split('\n') if line.strip()]
+        pages_data = [{'page_num': 1, 'text': all_text, 'lines': lines, 'ocr': True}] if lines else []
 
-    if not is_pdf:
+    elif not is_pdf:
         return {
             'success': False, 'error': 'unsupported_file_type',
-            'message': 'Please upload a PDF file.', 'ocr_available': False,
+            'message': 'Please upload a PDF file.', 'ocr_available': ocr_ready,
             'header': {}, 'items': [], 'raw_text': ''
         }
 
-    # Extract text from PDF with page separation
-    try:
-        pages_data = extract_text_from_pdf(file_bytes)
-        all_text = '\n'.join([page['text'] for page in pages_data])
-    except Exception as e:
-        logger.error(f"PDF text extraction failed: {e}")
-        return {
-            'success': False, 'error': 'pdf_extraction_failed',
-            'message': f'Could not extract text from PDF: {str(e)}', 'ocr_available': False,
-            'header': {}, 'items': [], 'raw_text': ''
-        }
+    else:
+        # Extract text from PDF with page separation (image-only pages go through OCR)
+        try:
+            pages_data = extract_text_from_pdf(file_bytes)
+            all_text = '\n'.join([page['text'] for page in pages_data])
+        except Exception as e:
+            logger.error(f"PDF text extraction failed: {e}")
+            return {
+                'success': False, 'error': 'pdf_extraction_failed',
+                'message': f'Could not extract text from PDF: {str(e)}', 'ocr_available': ocr_ready,
+                'header': {}, 'items': [], 'raw_text': ''
+            }
 
     if not pages_data:
         return {
             'success': False, 'error': 'no_text_extracted',
-            'message': 'No readable text found in PDF.', 'ocr_available': False,
+            'message': 'No readable text found in file.', 'ocr_available': ocr_ready,
             'header': {}, 'items': [], 'raw_text': ''
         }
 
@@ -927,7 +987,7 @@ def extract_from_bytes(file_bytes, filename: str = '') -> dict:
                 'header': header,
                 'items': formatted_items,
                 'raw_text': all_text,
-                'ocr_available': False,
+                'ocr_available': ocr_ready,
                 'message': 'Invoice data extracted successfully - CORRECTED LINE ITEMS'
             }
         else:
@@ -935,7 +995,7 @@ def extract_from_bytes(file_bytes, filename: str = '') -> dict:
                 'success': False,
                 'error': 'parsing_failed',
                 'message': 'Could not extract structured data from PDF.',
-                'ocr_available': False,
+                'ocr_available': ocr_ready,
                 'header': {},
                 'items': [],
                 'raw_text': all_text
@@ -947,7 +1007,7 @@ def extract_from_bytes(file_bytes, filename: str = '') -> dict:
             'success': False,
             'error': 'parsing_failed',
             'message': 'Could not extract structured data from PDF.',
-            'ocr_available': False,
+            'ocr_available': ocr_ready,
             'header': {},
             'items': [],
             'raw_text': all_text
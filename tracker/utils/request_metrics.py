@@ -0,0 +1,234 @@
+"""
+Per-request instrumentation: query count, DB time, total time and response size.
+
+Samples are aggregated per URL name (e.g. "tracker:orders_list") into a rolling
+window. By default the window lives in process memory; when
+REQUEST_METRICS_DB_PATH is set, samples are written to a local SQLite file instead
+so every gunicorn worker feeds the same report.
+
+Settings (all optional):
+  - REQUEST_METRICS_ENABLED: turn recording on/off (default True)
+  - REQUEST_METRICS_SAMPLE_RATE: fraction of requests recorded, 0.0-1.0 (default 1.0)
+  - REQUEST_METRICS_WINDOW: samples kept per endpoint (default 500)
+  - REQUEST_METRICS_DB_PATH: SQLite file shared across workers (default: memory only)
+  - REQUEST_METRICS_EXCLUDE_PATHS: path prefixes never recorded (default static/media)
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+
+
+DEFAULT_WINDOW = 500
+DEFAULT_EXCLUDE_PATHS = ('/static/', '/media/', '/favicon.ico')
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def is_enabled() -> bool:
+    return bool(_setting('REQUEST_METRICS_ENABLED', True))
+
+
+def should_sample(path: str = '') -> bool:
+    """Return True when the current request should be recorded."""
+    if not is_enabled():
+        return False
+    for prefix in _setting('REQUEST_METRICS_EXCLUDE_PATHS', DEFAULT_EXCLUDE_PATHS):
+        if path.startswith(prefix):
+            return False
+    try:
+        rate = float(_setting('REQUEST_METRICS_SAMPLE_RATE', 1.0))
+    except (TypeError, ValueError):
+        rate = 1.0
+    if rate >= 1.0:
+        return True
+    if rate <= 0.0:
+        return False
+    return random.random() < rate
+
+
+class QueryTimer:
+    """Execute wrapper counting queries and accumulated DB time.
+
+    Install with ``connection.execute_wrapper(timer)``; works with DEBUG off.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already-sorted list."""
+    if not values:
+        return 0.0
+    k = max(0, min(len(values) - 1, math.ceil(pct / 100.0 * len(values)) - 1))
+    return values[k]
+
+
+def summarize(endpoint: str, samples: list) -> dict:
+    """Aggregate raw (total_ms, db_ms, queries, size, status) samples for one endpoint."""
+    n = len(samples)
+    totals = sorted(s[0] for s in samples)
+    queries = [s[2] for s in samples]
+    return {
+        'endpoint': endpoint,
+        'count': n,
+        'p50_ms': round(percentile(totals, 50), 1),
+        'p95_ms': round(percentile(totals, 95), 1),
+        'max_ms': round(totals[-1], 1) if totals else 0.0,
+        'avg_db_ms': round(sum(s[1] for s in samples) / n, 1) if n else 0.0,
+        'avg_queries': round(sum(queries) / n, 1) if n else 0.0,
+        'max_queries': max(queries) if queries else 0,
+        'avg_size_kb': round(sum(s[3] for s in samples) / n / 1024.0, 1) if n else 0.0,
+        'errors': sum(1 for s in samples if s[4] >= 500),
+    }
+
+
+class MemoryMetricsStore:
+    """Rolling per-endpoint window kept in process memory (one per worker)."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+
+    def record(self, endpoint: str, sample: tuple) -> None:
+        with self._lock:
+            self._samples[endpoint].append(sample)
+
+    def samples(self) -> dict:
+        with self._lock:
+            return {k: list(v) for k, v in self._samples.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+
+class SqliteMetricsStore:
+    """Rolling per-endpoint window in a local SQLite file shared by all workers."""
+
+    PRUNE_EVERY = 200
+
+    def __init__(self, path: str, window: int = DEFAULT_WINDOW):
+        self.path = str(path)
+        self.window = window
+        self._local = threading.local()
+        self._writes = 0
+        self._ensure_schema()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _ensure_schema(self) -> None:
+        conn = self._conn()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS request_metrics ('
+            ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+            ' endpoint TEXT NOT NULL,'
+            ' total_ms REAL NOT NULL, db_ms REAL NOT NULL,'
+            ' queries INTEGER NOT NULL, size INTEGER NOT NULL, status INTEGER NOT NULL,'
+            ' recorded_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_request_metrics_endpoint ON request_metrics (endpoint, id)')
+        conn.commit()
+
+    def record(self, endpoint: str, sample: tuple) -> None:
+        conn = self._conn()
+        conn.execute(
+            'INSERT INTO request_metrics (endpoint, total_ms, db_ms, queries, size, status, recorded_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (endpoint, *sample, time.time()),
+        )
+        conn.commit()
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self) -> None:
+        """Drop samples beyond the rolling window of each endpoint."""
+        conn = self._conn()
+        conn.execute(
+            'DELETE FROM request_metrics WHERE id IN ('
+            ' SELECT id FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY endpoint ORDER BY id DESC) AS rn'
+            '                 FROM request_metrics) WHERE rn > ?)',
+            (self.window,),
+        )
+        conn.commit()
+
+    def samples(self) -> dict:
+        rows = self._conn().execute(
+            'SELECT endpoint, total_ms, db_ms, queries, size, status FROM ('
+            ' SELECT *, ROW_NUMBER() OVER (PARTITION BY endpoint ORDER BY id DESC) AS rn FROM request_metrics'
+            ') WHERE rn <= ?',
+            (self.window,),
+        ).fetchall()
+        out = defaultdict(list)
+        for endpoint, *sample in rows:
+            out[endpoint].append(tuple(sample))
+        return dict(out)
+
+    def reset(self) -> None:
+        conn = self._conn()
+        conn.execute('DELETE FROM request_metrics')
+        conn.commit()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the process-wide metrics store, created lazily from settings."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                window = int(_setting('REQUEST_METRICS_WINDOW', DEFAULT_WINDOW) or DEFAULT_WINDOW)
+                path = _setting('REQUEST_METRICS_DB_PATH', None)
+                _store = SqliteMetricsStore(path, window) if path else MemoryMetricsStore(window)
+    return _store
+
+
+def record(endpoint: str, total_ms: float, db_ms: float, queries: int, size: int, status: int) -> None:
+    try:
+        get_store().record(endpoint, (float(total_ms), float(db_ms), int(queries), int(size), int(status)))
+    except Exception:
+        # Instrumentation must never break the request pipeline
+        pass
+
+
+def get_report(sort: str = 'p95', limit: int = 25) -> list[dict]:
+    """Summaries for every endpoint, sorted by p95 latency or average queries."""
+    rows = [summarize(endpoint, samples) for endpoint, samples in get_store().samples().items() if samples]
+    key = 'avg_queries' if sort == 'queries' else 'p95_ms'
+    rows.sort(key=lambda r: r[key], reverse=True)
+    return rows[:limit] if limit else rows
+
+
+def reset() -> None:
+    get_store().reset()
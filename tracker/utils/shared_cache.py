@@ -0,0 +1,260 @@
+"""
+Shared cache tier used by every worker on the box.
+
+Wraps Django's default cache (configured in settings as a file-based cache, so all
+gunicorn workers see the same entries and they survive restarts) with:
+
+  - namespaced, versioned keys: ``bump(namespace)`` invalidates every key in a
+    namespace at once, including keys built from arbitrary parts such as item names;
+  - single-flight recomputation: ``get_or_compute`` lets one caller rebuild a missing
+    value while concurrent callers wait for it instead of hitting the database too;
+  - hit/miss counters per namespace, aggregated across workers (``get_stats``);
+  - ``append``: a capped list (the audit log) that concurrent writers extend safely.
+
+Namespace versions are unique timestamps rather than a counter starting at 1, so a
+version key evicted by the cache (FileBasedCache culls at random once MAX_ENTRIES is
+reached, including keys stored without a timeout) is re-seeded with a value that no
+older entry can carry.
+
+FileBasedCache has no atomic incr/add: both read the file and write it back. The
+read-modify-write steps here (counters, ``append``, ``add``) therefore run under
+``_atomic()``, a thread lock plus an flock on a file in the cache directory.
+Single-flight locks in ``get_or_compute`` stay best-effort across workers on that
+backend (two workers can both win ``add``); at worst a value is computed twice. Where
+flock is unavailable (Windows) only threads of one worker are serialised and
+concurrent workers can lose counter increments or audit entries; point CACHE_BACKEND
+at memcached or redis for atomic operations.
+
+Usage:
+    data = shared_cache.get_or_compute('inventory', ('brands', name), build, timeout=120)
+    shared_cache.bump('inventory')
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+KEY_PREFIX = 'sc'
+STATS_FLUSH_EVERY = 50
+_MISSING = object()
+
+
+# ---- Cross-worker lock ----------------------------------------------------
+
+_thread_lock = threading.RLock()
+
+
+@contextmanager
+def _atomic():
+    """Serialise a read-modify-write on the cache across threads and, for a file cache, workers."""
+    with _thread_lock:
+        directory = getattr(cache, '_dir', None)
+        if fcntl is None or not directory:
+            yield
+            return
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f'{KEY_PREFIX}.lock'), 'a') as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+# ---- Keys -----------------------------------------------------------------
+
+def _new_version(current=None) -> int:
+    version = time.time_ns()
+    return version if current is None or version > current else current + 1
+
+
+def _version(namespace: str) -> int:
+    key = f'{KEY_PREFIX}:ns:{namespace}'
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key) or _new_version()
+    return version
+
+
+def make_key(namespace: str, parts=()) -> str:
+    """Build ``sc:<namespace>:v<version>:<parts>``; long or unsafe parts are hashed."""
+    if not isinstance(parts, (tuple, list)):
+        parts = (parts,)
+    raw = ':'.join(str(p) for p in parts)
+    if len(raw) > 120 or any(c.isspace() or ord(c) < 33 for c in raw):
+        raw = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return f'{KEY_PREFIX}:{namespace}:v{_version(namespace)}:{raw}'
+
+
+def bump(namespace: str) -> None:
+    """Invalidate every key in ``namespace`` by moving it to a new version."""
+    key = f'{KEY_PREFIX}:ns:{namespace}'
+    with _atomic():
+        cache.set(key, _new_version(cache.get(key)), None)
+
+
+# ---- Hit/miss counters ----------------------------------------------------
+
+_local_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(namespace: str, outcome: str) -> None:
+    with _stats_lock:
+        _local_stats[(namespace, outcome)] += 1
+        if sum(_local_stats.values()) < STATS_FLUSH_EVERY:
+            return
+        pending = dict(_local_stats)
+        _local_stats.clear()
+    _flush(pending)
+
+
+def _flush(pending: dict) -> None:
+    """Add process-local counts to the shared totals."""
+    try:
+        with _atomic():
+            for (namespace, outcome), n in pending.items():
+                key = f'{KEY_PREFIX}:stats:{namespace}:{outcome}'
+                if not cache.add(key, n, None):
+                    cache.incr(key, n)
+            namespaces = cache.get(f'{KEY_PREFIX}:stats:namespaces') or []
+            new = sorted({*namespaces, *(ns for ns, _ in pending)})
+            if new != namespaces:
+                cache.set(f'{KEY_PREFIX}:stats:namespaces', new, None)
+    except Exception:
+        pass
+
+
+def get_stats() -> list[dict]:
+    """Hit/miss totals per namespace across all workers."""
+    with _stats_lock:
+        pending = dict(_local_stats)
+        _local_stats.clear()
+    if pending:
+        _flush(pending)
+    rows = []
+    for namespace in cache.get(f'{KEY_PREFIX}:stats:namespaces') or []:
+        hits = cache.get(f'{KEY_PREFIX}:stats:{namespace}:hit') or 0
+        misses = cache.get(f'{KEY_PREFIX}:stats:{namespace}:miss') or 0
+        total = hits + misses
+        rows.append({
+            'namespace': namespace, 'hits': hits, 'misses': misses,
+            'hit_rate': round(hits / total * 100, 1) if total else 0.0,
+        })
+    return rows
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        _local_stats.clear()
+    namespaces = cache.get(f'{KEY_PREFIX}:stats:namespaces') or []
+    cache.delete_many(
+        [f'{KEY_PREFIX}:stats:{ns}:{o}' for ns in namespaces for o in ('hit', 'miss')]
+        + [f'{KEY_PREFIX}:stats:namespaces']
+    )
+
+
+# ---- Get / set ------------------------------------------------------------
+
+def get(namespace: str, parts=(), default=None):
+    value = cache.get(make_key(namespace, parts), _MISSING)
+    _count(namespace, 'miss' if value is _MISSING else 'hit')
+    return default if value is _MISSING else value
+
+
+def set(namespace: str, parts=(), value=None, timeout=300) -> None:
+    cache.set(make_key(namespace, parts), value, timeout)
+
+
+def add(namespace: str, parts=(), value=None, timeout=300) -> bool:
+    """Set the key only if it is missing; True when this caller set it (a claim)."""
+    with _atomic():
+        return cache.add(make_key(namespace, parts), value, timeout)
+
+
+def delete(namespace: str, parts=()) -> None:
+    cache.delete(make_key(namespace, parts))
+
+
+def append(namespace: str, parts, item, limit: int, timeout=None) -> None:
+    """Append ``item`` to the list cached under the key, keeping the last ``limit`` items."""
+    key = make_key(namespace, parts)
+    with _atomic():
+        items = cache.get(key) or []
+        items.append(item)
+        cache.set(key, items[-limit:], timeout)
+
+
+_flight_locks = {}
+_flight_guard = threading.Lock()
+
+
+@contextmanager
+def _flight_lock(key: str):
+    """Per-worker lock for one key; the entry is dropped once its last user leaves."""
+    with _flight_guard:
+        entry = _flight_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _flight_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                _flight_locks.pop(key, None)
+
+
+def get_or_compute(namespace: str, parts, compute, timeout=300, lock_timeout=30, wait=10.0):
+    """Return the cached value, or compute it once while other callers wait.
+
+    Threads in this worker queue on a local lock; other workers see a short-lived
+    lock entry in the shared cache and poll for the value for up to ``wait`` seconds
+    before computing it themselves. Only the caller that added the lock entry
+    removes it.
+    """
+    key = make_key(namespace, parts)
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        _count(namespace, 'hit')
+        return value
+
+    with _flight_lock(key):
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            _count(namespace, 'hit')
+            return value
+        _count(namespace, 'miss')
+
+        lock_key = f'{key}:lock'
+        owner = cache.add(lock_key, 1, lock_timeout)
+        if not owner:
+            deadline = time.monotonic() + wait
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                value = cache.get(key, _MISSING)
+                if value is not _MISSING:
+                    return value
+                if not cache.get(lock_key):
+                    break
+        try:
+            value = compute()
+            cache.set(key, value, timeout)
+            return value
+        finally:
+            if owner:
+                cache.delete(lock_key)
@@ -0,0 +1,137 @@
+"""
+Database-backed system settings with a process-local snapshot.
+
+Settings live in the SystemSetting table (one row per key), so they are durable and
+identical in every worker. Each process keeps an immutable snapshot and checks the
+table's version (row count + latest updated_at) at most once every
+SYSTEM_SETTINGS_REFRESH_SECONDS (default 5), so a read is normally an attribute lookup:
+
+    from tracker.utils.system_settings import get_settings
+    if get_settings().allow_order_without_vehicle:
+        ...
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from types import MappingProxyType
+
+from django.conf import settings as django_settings
+from django.db import transaction
+from django.db.models import Count, Max
+
+
+DEFAULTS = {
+    'company_name': '',
+    'default_priority': 'medium',
+    'enable_unbranded_alias': True,
+    'allow_order_without_vehicle': True,
+    'sms_provider': 'none',
+}
+
+
+class SettingsSnapshot:
+    """Immutable view of the settings; values are attributes or mapping items."""
+
+    __slots__ = ('_values', 'version')
+
+    def __init__(self, values: dict, version=None):
+        object.__setattr__(self, '_values', MappingProxyType({**DEFAULTS, **values}))
+        object.__setattr__(self, 'version', version)
+
+    def __getattr__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError('SettingsSnapshot is read-only')
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def as_dict(self) -> dict:
+        return dict(self._values)
+
+
+_snapshot = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _refresh_seconds() -> float:
+    return float(getattr(django_settings, 'SYSTEM_SETTINGS_REFRESH_SECONDS', 5))
+
+
+def _current_version():
+    from ..models import SystemSetting
+    agg = SystemSetting.objects.aggregate(n=Count('id'), latest=Max('updated_at'))
+    return agg['n'], agg['latest']
+
+
+def _load(version) -> SettingsSnapshot:
+    from ..models import SystemSetting
+    values = dict(SystemSetting.objects.values_list('key', 'value'))
+    return SettingsSnapshot(values, version)
+
+
+def get_settings() -> SettingsSnapshot:
+    """Return the current settings snapshot, reloading it if another worker changed them."""
+    global _snapshot, _checked_at
+    now = time.monotonic()
+    snap = _snapshot
+    if snap is not None and now - _checked_at < _refresh_seconds():
+        return snap
+    with _lock:
+        if _snapshot is not None and time.monotonic() - _checked_at < _refresh_seconds():
+            return _snapshot
+        try:
+            version = _current_version()
+            if _snapshot is None or _snapshot.version != version:
+                _snapshot = _load(version)
+        except Exception:
+            # Table missing or DB unavailable: fall back to defaults without caching them
+            return _snapshot or SettingsSnapshot({})
+        _checked_at = time.monotonic()
+        return _snapshot
+
+
+def invalidate() -> None:
+    """Force the next get_settings() call in this process to check the database."""
+    global _checked_at
+    _checked_at = 0.0
+
+
+def update_settings(values: dict, user=None) -> None:
+    """Create or update the given keys."""
+    from ..models import SystemSetting
+    with transaction.atomic():
+        for key, value in values.items():
+            SystemSetting.objects.update_or_create(key=key, defaults={'value': value, 'updated_by': user})
+    invalidate()
+
+
+def replace_settings(values: dict, user=None) -> None:
+    """Replace every stored setting with ``values`` (used by restore)."""
+    from ..models import SystemSetting
+    with transaction.atomic():
+        SystemSetting.objects.exclude(key__in=list(values)).delete()
+        update_settings(values, user)
+
+
+def reset_settings() -> None:
+    """Delete stored settings so every key falls back to its default."""
+    from ..models import SystemSetting
+    SystemSetting.objects.all().delete()
+    invalidate()
+
+
+def export_settings() -> dict:
+    """Stored settings as a plain dict for backups."""
+    from ..models import SystemSetting
+    return dict(SystemSetting.objects.values_list('key', 'value'))
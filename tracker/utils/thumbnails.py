@@ -0,0 +1,125 @@
+"""
+First-page thumbnails of stored documents (attachments, signed copies, completion documents).
+
+Detail pages used to embed every PDF in an iframe, downloading each document in full on
+every view. They now show a small WebP of the first page (PDF via PyMuPDF, images via
+Pillow) and fetch the full document only when it is opened.
+
+Thumbnails are cached under THUMBNAIL_CACHE_DIR (default MEDIA_ROOT/thumbnails/) by
+content hash and width, so identical documents share a thumbnail and a replaced document
+gets a new one. The hash of a stored file is itself cached in the shared cache, keyed by
+the file's inode, size and mtime, so a cached thumbnail is served after a stat() and a
+cache lookup, without reading the document.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+from . import shared_cache
+
+try:
+    import fitz
+except ImportError:
+    fitz = None
+
+CACHE_NAMESPACE = 'thumbnails'
+WIDTHS = (160, 480)
+PDF_EXTS = {'.pdf'}
+IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.tif', '.tiff'}
+
+
+def cache_dir() -> Path:
+    return Path(getattr(settings, 'THUMBNAIL_CACHE_DIR', None) or Path(settings.MEDIA_ROOT) / 'thumbnails')
+
+
+def supports(name: str) -> bool:
+    ext = os.path.splitext(name or '')[1].lower()
+    return ext in IMAGE_EXTS or (ext in PDF_EXTS and fitz is not None)
+
+
+def clamp_width(width) -> int:
+    """Snap a requested width to one of WIDTHS so the cache holds a bounded set of sizes."""
+    try:
+        width = int(width)
+    except (TypeError, ValueError):
+        return WIDTHS[0]
+    return next((w for w in WIDTHS if w >= width), WIDTHS[-1])
+
+
+def content_hash(path: str) -> str:
+    st = os.stat(path)
+
+    def compute():
+        digest = hashlib.sha256()
+        with open(path, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(256 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    return shared_cache.get_or_compute(
+        CACHE_NAMESPACE, (path, st.st_ino, st.st_size, st.st_mtime_ns), compute, timeout=30 * 24 * 3600
+    )
+
+
+def render_thumbnail(path: str, width: int) -> bytes:
+    """Render the first page of a PDF, or an image, to WebP bytes `width` pixels wide."""
+    from PIL import Image, ImageOps
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext in PDF_EXTS:
+        with fitz.open(path) as doc:
+            page = doc[0]
+            zoom = width / page.rect.width
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            image = Image.frombytes('RGB', (pix.width, pix.height), pix.samples)
+    else:
+        with Image.open(path) as source:
+            source.draft('RGB', (width, width * 4))
+            image = ImageOps.exif_transpose(source).convert('RGB')
+        image.thumbnail((width, width * 4))
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='WEBP', quality=80, method=4)
+    return buffer.getvalue()
+
+
+def get_or_render(field_file, width: int) -> Path:
+    """
+    Return the cached thumbnail of a stored file, rendering it on first use.
+
+    Args:
+        field_file: FieldFile of a PDF or image (see supports())
+        width: Thumbnail width; snapped to WIDTHS
+
+    Returns:
+        Path of the WebP thumbnail
+    """
+    source = field_file.path
+    width = clamp_width(width)
+    sha256 = content_hash(source)
+    path = cache_dir() / sha256[:2] / f'{sha256}-{width}.webp'
+    if path.exists():
+        return path
+
+    data = render_thumbnail(source, width)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write atomically so concurrent readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return path
@@ -3,7 +3,7 @@ Time utilities for calculating order duration and overdue status.
 Overdue threshold: 2 calendar hours (simple calculation).
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime, time as dtime, timedelta
 from django.utils import timezone
 
 
@@ -143,11 +143,45 @@ def estimate_completion_time(started_at: datetime, estimated_minutes: int = None
     }
 
 
+def _local_wall_clock(value: datetime, tz) -> datetime:
+    """Naive local wall-clock time of a datetime (naive inputs are already local)."""
+    if timezone.is_naive(value):
+        return value
+    return timezone.localtime(value, tz).replace(tzinfo=None)
+
+
+def _working_seconds(start: datetime, end: datetime, work_start_hour: int, work_end_hour: int) -> float:
+    """
+    Seconds of [start, end) inside the daily working window, in closed form.
+
+    Both arguments are naive local wall-clock datetimes. The result is the partial
+    first day, plus whole days times the window, plus the partial last day, so the
+    cost does not depend on how many days the interval spans.
+    """
+    window_start = work_start_hour * 3600
+    window_end = work_end_hour * 3600
+    if end <= start or window_end <= window_start:
+        return 0
+
+    def clamp(dt):
+        seconds = dt.hour * 3600 + dt.minute * 60 + dt.second + dt.microsecond / 1e6
+        return min(max(seconds, window_start), window_end)
+
+    first_day, last_day = start.date(), end.date()
+    if first_day == last_day:
+        return max(0, clamp(end) - clamp(start))
+    whole_days = (last_day - first_day).days - 1
+    return (window_end - clamp(start)) + whole_days * (window_end - window_start) + (clamp(end) - window_start)
+
+
 def calculate_estimated_duration(started_at: datetime, completed_at: datetime, work_start_hour: int = 8, work_end_hour: int = 17) -> int | None:
     """
     Calculate duration in minutes between two datetimes, counting ONLY working hours.
 
     Working window: [work_start_hour:00, work_end_hour:00) local time (default 08:00-17:00).
+    Computed in closed form on local wall-clock time, so an order open for months costs
+    the same as one open for an hour. A DST change that falls inside the working window
+    is not accounted for (transitions happen at night in practice).
 
     Args:
         started_at: Start datetime
@@ -161,7 +195,111 @@ def calculate_estimated_duration(started_at: datetime, completed_at: datetime, w
     if not started_at or not completed_at:
         return None
 
-    # Ensure timezone-aware and use current timezone for working-window boundaries
+    tz = timezone.get_current_timezone()
+    start = _local_wall_clock(started_at, tz)
+    end = _local_wall_clock(completed_at, tz)
+    return int(_working_seconds(start, end, work_start_hour, work_end_hour) // 60)
+
+
+def calculate_working_minutes_batch(started_at, completed_at, work_start_hour: int = 8, work_end_hour: int = 17):
+    """
+    Vectorized calculate_estimated_duration for many intervals at once.
+
+    Args:
+        started_at: Sequence of start datetimes (aware, naive local, or None), or a
+            numpy datetime64 array of UTC instants (NaT for missing)
+        completed_at: Sequence or array of end datetimes, same length
+        work_start_hour: Start of working day (hour, 0-23)
+        work_end_hour: End of working day (hour, 0-23)
+
+    Returns:
+        numpy int64 array of working minutes; -1 where either side is missing.
+    """
+    import numpy as np
+
+    tz = timezone.get_current_timezone()
+    starts = _to_local_datetime64(started_at, tz)
+    ends = _to_local_datetime64(completed_at, tz)
+    if starts.shape != ends.shape:
+        raise ValueError('started_at and completed_at must have the same length')
+
+    missing = np.isnat(starts) | np.isnat(ends)
+    one_second = np.timedelta64(1, 's')
+    window_start = np.timedelta64(work_start_hour * 3600, 's')
+    window_end = np.timedelta64(work_end_hour * 3600, 's')
+
+    first_day = starts.astype('datetime64[D]')
+    last_day = ends.astype('datetime64[D]')
+    clamped_start = np.clip(starts - first_day, window_start, window_end)
+    clamped_end = np.clip(ends - last_day, window_start, window_end)
+    whole_days = (last_day - first_day).astype('int64') - 1
+
+    same_day = np.maximum(clamped_end - clamped_start, np.timedelta64(0, 'us'))
+    multi_day = (window_end - clamped_start) + whole_days * (window_end - window_start) + (clamped_end - window_start)
+    seconds = np.where(first_day == last_day, same_day, multi_day) / one_second
+    seconds = np.where(missing | (ends <= starts) | (work_end_hour <= work_start_hour), 0, seconds)
+
+    minutes = np.floor_divide(seconds, 60).astype('int64')
+    minutes[missing] = -1
+    return minutes
+
+
+def _to_local_datetime64(values, tz):
+    """
+    Local wall-clock datetime64[us] array from datetimes or a UTC datetime64 array.
+
+    Aware values are converted to local time for the whole array at once with
+    pandas (tz_convert applies each instant's own UTC offset, so DST is handled);
+    naive values are already local and are kept as they are.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.datetime64):
+        utc = pd.DatetimeIndex(values.astype('datetime64[ns]')).tz_localize('UTC')
+        return utc.tz_convert(tz).tz_localize(None).to_numpy().astype('datetime64[us]')
+
+    values = list(values)
+    naive = [i for i, v in enumerate(values) if v is not None and timezone.is_naive(v)]
+    if naive:
+        naive_values = {i: values[i] for i in naive}
+        values = [None if i in naive_values else v for i, v in enumerate(values)]
+    utc = pd.DatetimeIndex(pd.to_datetime(values, utc=True) if values else [], tz='UTC')
+    local = utc.tz_convert(tz).tz_localize(None).to_numpy().astype('datetime64[us]')
+    for i in naive:
+        local[i] = np.datetime64(naive_values[i], 'us')
+    return local
+
+
+def working_minutes_for_orders(queryset, start_field: str = 'started_at', end_field: str = 'completed_at', **hours) -> dict:
+    """
+    Working-hours duration of every order in a queryset with one query.
+
+    Args:
+        queryset: Order queryset
+        start_field / end_field: Timestamp fields bounding the interval
+        **hours: Optional work_start_hour / work_end_hour
+
+    Returns:
+        Dict of order id -> working minutes (None where a timestamp is missing)
+    """
+    rows = list(queryset.values_list('pk', start_field, end_field))
+    if not rows:
+        return {}
+    ids, starts, ends = zip(*rows)
+    minutes = calculate_working_minutes_batch(starts, ends, **hours)
+    return {pk: (None if m < 0 else int(m)) for pk, m in zip(ids, minutes.tolist())}
+
+
+def _calculate_duration_by_day(started_at: datetime, completed_at: datetime, work_start_hour: int = 8, work_end_hour: int = 17) -> int | None:
+    """
+    Reference day-by-day implementation of calculate_estimated_duration.
+
+    Kept for the property tests and the benchmark_working_hours command.
+    """
+    if not started_at or not completed_at:
+        return None
+
     tz = timezone.get_current_timezone()
 
     if timezone.is_naive(started_at):
@@ -174,34 +312,19 @@ def calculate_estimated_duration(started_at: datetime, completed_at: datetime, w
     else:
         completed_at = timezone.localtime(completed_at, tz)
 
-    # If end precedes start, return zero minutes
     if completed_at <= started_at:
         return 0
 
-    # Iterate day by day and sum overlap with working window
     total_seconds = 0
-
     current_day = started_at.date()
     end_day = completed_at.date()
-
-    # Helper to build aware datetime for a specific day and hour
-    from datetime import time as dtime
-
     while current_day <= end_day:
-        day_start_naive = datetime.combine(current_day, dtime(hour=work_start_hour, minute=0))
-        day_end_naive = datetime.combine(current_day, dtime(hour=work_end_hour, minute=0))
-        day_start = timezone.make_aware(day_start_naive, tz)
-        day_end = timezone.make_aware(day_end_naive, tz)
-
-        # Determine overlap interval for this day
+        day_start = timezone.make_aware(datetime.combine(current_day, dtime(hour=work_start_hour)), tz)
+        day_end = timezone.make_aware(datetime.combine(current_day, dtime(hour=work_end_hour)), tz)
         interval_start = max(started_at, day_start)
         interval_end = min(completed_at, day_end)
-
         if interval_end > interval_start:
             total_seconds += (interval_end - interval_start).total_seconds()
-
-        # Next day
         current_day = current_day + timedelta(days=1)
 
-    # Convert to whole minutes
     return int(total_seconds // 60)
@@ -0,0 +1,102 @@
+"""
+Uploads on local disk, hashed while streaming.
+
+Django writes uploads larger than FILE_UPLOAD_MAX_MEMORY_SIZE to a temporary file
+(TemporaryFileUploadHandler); smaller ones are kept in memory. spool_upload() gives both
+the same shape: a file on disk whose SHA-256 was computed chunk by chunk while it was
+written (or, for an already spooled upload, read once), so callers never hold the
+whole document in memory:
+
+    with spool_upload(request.FILES['file']) as upload:
+        extracted = extract_from_path(upload.path, upload.name)
+        invoice.document.save(upload.name, upload, save=True)   # moved, not copied
+
+SpooledUpload exposes temporary_file_path(), which FileSystemStorage uses to move the
+file into MEDIA_ROOT with a rename instead of rewriting it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+
+CHUNK_SIZE = 256 * 1024
+
+
+class SpooledUpload(File):
+    """An uploaded file on local disk, with its size and SHA-256."""
+
+    def __init__(self, file, name, sha256, size, owned):
+        super().__init__(file, name)
+        self.sha256 = sha256
+        self.size = size
+        self._owned = owned
+
+    @property
+    def path(self) -> str:
+        return self.file.name
+
+    def temporary_file_path(self) -> str:
+        return self.file.name
+
+    def close(self):
+        # Django's own temporary upload files are closed and removed with the request
+        if not self._owned:
+            return
+        self.file.close()
+        try:
+            os.remove(self.file.name)
+        except FileNotFoundError:
+            # Already moved into storage
+            pass
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def __del__(self):
+        # Views with many return paths may rely on this instead of a with block
+        self.close()
+
+
+def spool_upload(uploaded, chunk_size: int = CHUNK_SIZE) -> SpooledUpload:
+    """
+    Put an uploaded file on disk and hash it, in one streaming pass.
+
+    Args:
+        uploaded: Django UploadedFile (in memory or already in a temporary file)
+        chunk_size: Bytes per read
+
+    Returns:
+        SpooledUpload; closing it (or leaving a with block) removes a temporary file
+        that was not moved into storage
+    """
+    digest = hashlib.sha256()
+    name = os.path.basename(uploaded.name or 'upload')
+
+    if hasattr(uploaded, 'temporary_file_path'):
+        for chunk in uploaded.chunks(chunk_size):
+            digest.update(chunk)
+        uploaded.seek(0)
+        return SpooledUpload(uploaded.file, name, digest.hexdigest(), uploaded.size, owned=False)
+
+    suffix = os.path.splitext(name)[1].lower()
+    tmp = tempfile.NamedTemporaryFile(
+        suffix=f'.upload{suffix}', dir=getattr(settings, 'FILE_UPLOAD_TEMP_DIR', None), delete=False
+    )
+    size = 0
+    try:
+        for chunk in uploaded.chunks(chunk_size):
+            digest.update(chunk)
+            tmp.write(chunk)
+            size += len(chunk)
+        tmp.flush()
+        tmp.seek(0)
+    except Exception:
+        tmp.close()
+        os.remove(tmp.name)
+        raise
+    return SpooledUpload(tmp, name, digest.hexdigest(), size, owned=True)
@@ -15,7 +15,6 @@ from datetime import timedelta
 from .forms import ProfileForm, CustomerStep1Form, CustomerStep2Form, CustomerStep3Form, CustomerStep4Form, VehicleForm, OrderForm, CustomerEditForm, SystemSettingsForm, BrandForm, InquiryCreationForm, InquiryNoteForm
 from django.urls import reverse
 from django.contrib import messages
-from django.core.cache import cache
 from django.core.files.base import ContentFile
 import base64
 import json
@@ -27,8 +26,12 @@ from django.views.decorators.csrf import csrf_exempt
 from django.core.exceptions import ValidationError
 from .models import Profile, Customer, Order, Vehicle, InventoryItem, CustomerNote, Brand, Branch, OrderAttachment, OrderAttachmentSignature, ServiceType, ServiceAddon, InquiryNote
 from django.core.paginator import Paginator
-from .utils import add_audit_log, get_audit_logs, clear_audit_logs, scope_queryset, get_user_branch
+from .utils import add_audit_log, get_audit_logs, clear_audit_logs, scope_queryset, get_user_branch, normalize_plate
+from .utils import shared_cache
+from .utils.pagination import paginate
 from .services import OrderService
+from .db_compat import in_date_range, on_date
+from .db_router import read_replica
 from .utils.pdf_signature import (
     embed_signature_in_pdf,
     SignatureEmbedError,
@@ -56,12 +59,16 @@ def _mark_overdue_orders():
 
         now = timezone.now()
         # Ensure inquiries are treated as completed (retroactively normalize existing data)
-        Order.objects.filter(type='inquiry').exclude(status='completed').update(status='completed', completed_at=now, completion_date=now)
+        updated = Order.objects.filter(type='inquiry').exclude(status='completed').update(status='completed', completed_at=now, completion_date=now)
 
         # Auto progress: created -> in_progress after 10 minutes (exclude inquiries)
         # Set started_at to created_at when auto-progressing
         created_cutoff = now - timedelta(minutes=10)
-        Order.objects.filter(status="created", created_at__lte=created_cutoff).exclude(type='inquiry').update(status="in_progress", started_at=F('created_at'))
+        updated += Order.objects.filter(status="created", created_at__lte=created_cutoff).exclude(type='inquiry').update(status="in_progress", started_at=F('created_at'))
+        if updated:
+            # Bulk updates bypass the post_save KPI invalidation
+            from .services import OrderKpiService
+            OrderKpiService.invalidate()
 
         # Mark orders as overdue if they've been active for 9+ calendar hours
         # Check in_progress orders with started_at set
@@ -180,11 +187,10 @@ def api_orders_statuses(request: HttpRequest):
 def api_order_invoice_totals(request: HttpRequest, pk: int):
     """
     Get aggregated invoice totals for an order.
-    Sums VAT, NET (subtotal), and Gross amounts from all linked invoices.
+    Totals come from the order row (maintained by OrderInvoiceTotalsService);
+    the linked invoices are listed alongside.
     """
     from .models import Order, OrderInvoiceLink
-    from decimal import Decimal
-    from django.db.models import Sum
 
     orders_qs = scope_queryset(Order.objects.all(), request.user, request)
 
@@ -193,48 +199,33 @@ def api_order_invoice_totals(request: HttpRequest, pk: int):
     except Order.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Order not found'}, status=404)
 
-    # Get all linked invoices for this order
-    invoice_links = OrderInvoiceLink.objects.filter(order=order).select_related('invoice')
-
-    # Initialize totals
-    total_net = Decimal('0')
-    total_vat = Decimal('0')
-    total_gross = Decimal('0')
-    invoice_count = 0
-
-    # Sum amounts from all linked invoices
-    invoices_data = []
-    for link in invoice_links:
-        invoice = link.invoice
-        subtotal = invoice.subtotal or Decimal('0')
-        tax = invoice.tax_amount or Decimal('0')
-        gross = invoice.total_amount or Decimal('0')
-
-        total_net += subtotal
-        total_vat += tax
-        total_gross += gross
-        invoice_count += 1
-
-        invoices_data.append({
-            'id': invoice.id,
-            'invoice_number': invoice.invoice_number,
-            'invoice_date': invoice.invoice_date.isoformat() if invoice.invoice_date else None,
-            'subtotal': float(subtotal),
-            'vat': float(tax),
-            'total': float(gross),
-            'is_primary': link.is_primary,
-            'linked_at': link.linked_at.isoformat(),
-        })
+    invoice_links = OrderInvoiceLink.objects.filter(order=order).values(
+        'is_primary', 'linked_at', 'invoice_id', 'invoice__invoice_number', 'invoice__invoice_date',
+        'invoice__subtotal', 'invoice__tax_amount', 'invoice__total_amount',
+    )
+    invoices_data = [
+        {
+            'id': link['invoice_id'],
+            'invoice_number': link['invoice__invoice_number'],
+            'invoice_date': link['invoice__invoice_date'].isoformat() if link['invoice__invoice_date'] else None,
+            'subtotal': float(link['invoice__subtotal'] or 0),
+            'vat': float(link['invoice__tax_amount'] or 0),
+            'total': float(link['invoice__total_amount'] or 0),
+            'is_primary': link['is_primary'],
+            'linked_at': link['linked_at'].isoformat(),
+        }
+        for link in invoice_links
+    ]
 
     return JsonResponse({
         'success': True,
         'order_id': order.id,
         'order_number': order.order_number,
-        'invoice_count': invoice_count,
+        'invoice_count': order.invoice_count,
         'aggregated_totals': {
-            'net': float(total_net),
-            'vat': float(total_vat),
-            'gross': float(total_gross),
+            'net': float(order.invoice_net),
+            'vat': float(order.invoice_vat),
+            'gross': float(order.invoice_gross),
         },
         'invoices': invoices_data,
     })
@@ -269,7 +260,7 @@ def api_service_distribution(request: HttpRequest):
 
         orders_qs = scope_queryset(Order.objects.all(), request.user, request)
         # Filter by created_at date range (inclusive)
-        filtered = orders_qs.filter(created_at__date__gte=start_date, created_at__date__lte=today)
+        filtered = orders_qs.filter(in_date_range('created_at', start_date, today))
         rows = filtered.values('type').annotate(c=Count('id'))
         counts = {r['type']: r['c'] for r in rows}
         # Ensure consistent order of labels
@@ -286,10 +277,10 @@ def api_service_distribution(request: HttpRequest):
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 @login_required
+@read_replica
 def dashboard(request: HttpRequest):
     # Normalize statuses before computing metrics
     _mark_overdue_orders()
-    # Always calculate fresh metrics for accurate data
     today = timezone.localdate()
 
     # Import aggregation functions and datetime utilities at the top of the function to avoid UnboundLocalError
@@ -320,10 +311,7 @@ def dashboard(request: HttpRequest):
             phone__startswith='PLATE_'
         )
 
-    # Remove caching to ensure fresh data
-    metrics = None
-
-    if True:  # Always recalculate
+    def build_metrics():
         total_orders = orders_qs.count()
         total_customers = customers_qs.count()
 
@@ -389,9 +377,8 @@ def dashboard(request: HttpRequest):
         # Upcoming appointments (next 7 days) based on active orders
         upcoming_appointments = (
             orders_qs.filter(
+                in_date_range("created_at", today, today + timedelta(days=7)),
                 status__in=["created", "in_progress"],
-                created_at__date__gte=today,
-                created_at__date__lte=today + timedelta(days=7),
             )
             .select_related("customer")
             .order_by("created_at")[:5]
@@ -638,8 +625,22 @@ def dashboard(request: HttpRequest):
                 'out_of_stock_count': out_of_stock_count,
             }
         }
-        # Don't cache metrics to ensure fresh data
-        # cache.set(cache_key, metrics, 60)
+        return metrics
+
+    # Cached briefly per branch scope; concurrent loads compute the metrics once
+    # (order and invoice changes bump the namespace, see tracker/signals.py)
+    if orders_qs.query.is_empty():
+        metrics = build_metrics()
+    else:
+        import hashlib
+        from django.conf import settings
+        scope = hashlib.sha1(repr([
+            qs.query.sql_with_params() for qs in (orders_qs, customers_qs)
+        ]).encode('utf-8')).hexdigest()
+        metrics = shared_cache.get_or_compute(
+            'dashboard', (scope, today.isoformat()), build_metrics,
+            timeout=getattr(settings, 'DASHBOARD_CACHE_SECONDS', 30),
+        )
 
     # Always fresh data for fast-updating sections
     recent_orders = list(
@@ -663,7 +664,7 @@ def dashboard(request: HttpRequest):
     # Use completed_today from metrics if available, otherwise calculate fresh
     completed_today_final = metrics.get('completed_today', completed_today)
     
-    context = {**metrics, "recent_orders": recent_orders, "completed_today": completed_today_final, "current_time": timezone.now(), "revenue_by_branch_tsh": revenue_by_branch_tsh}
+    context = {**metrics, "recent_orders": recent_orders, "completed_today": completed_today_final, "current_time": timezone.now()}
     # render after charts
 
     # Build sales_chart_json (monthly Orders vs Completed for last 12 months)
@@ -684,8 +685,8 @@ def dashboard(request: HttpRequest):
         # Get orders from last 12 months without complex date truncation
         twelve_months_ago = today - timedelta(days=365)
         
-        total_orders = orders_qs.filter(type="sales", created_at__date__gte=twelve_months_ago).count()
-        completed_orders = orders_qs.filter(type="sales", status="completed", created_at__date__gte=twelve_months_ago).count()
+        total_orders = orders_qs.filter(in_date_range("created_at", twelve_months_ago), type="sales").count()
+        completed_orders = orders_qs.filter(in_date_range("created_at", twelve_months_ago), type="sales", status="completed").count()
         
         # Use current month as key for simplicity
         current_month = today.replace(day=1)
@@ -713,8 +714,8 @@ def dashboard(request: HttpRequest):
     
     try:
         # Get today's data without complex date truncation
-        today_total = orders_qs.filter(type="sales", created_at__date=today).count()
-        today_completed = orders_qs.filter(type="sales", status="completed", created_at__date=today).count()
+        today_total = orders_qs.filter(on_date("created_at", today), type="sales").count()
+        today_completed = orders_qs.filter(on_date("created_at", today), type="sales", status="completed").count()
         
         daily_total_prev_map[today] = today_total
         daily_completed_prev_map[today] = today_completed
@@ -735,8 +736,8 @@ def dashboard(request: HttpRequest):
         # Get last 7 days data
         for i in range(7):
             date = today - timedelta(days=i)
-            total = orders_qs.filter(type="sales", created_at__date=date).count()
-            completed = orders_qs.filter(type="sales", status="completed", created_at__date=date).count()
+            total = orders_qs.filter(on_date("created_at", date), type="sales").count()
+            completed = orders_qs.filter(on_date("created_at", date), type="sales", status="completed").count()
             daily_total_map[date] = total
             daily_completed_map[date] = completed
     except Exception:
@@ -748,8 +749,8 @@ def dashboard(request: HttpRequest):
     }
 
     from django.db.models.functions import TruncHour
-    hourly_total_qs = orders_qs.filter(type="sales", created_at__date=today).annotate(h=TruncHour("created_at")).values("h").annotate(c=Count("id"))
-    hourly_completed_qs = orders_qs.filter(type="sales", status="completed", completed_at__date=today).annotate(h=TruncHour("completed_at")).values("h").annotate(c=Count("id"))
+    hourly_total_qs = orders_qs.filter(on_date("created_at", today), type="sales").annotate(h=TruncHour("created_at")).values("h").annotate(c=Count("id"))
+    hourly_completed_qs = orders_qs.filter(on_date("completed_at", today), type="sales", status="completed").annotate(h=TruncHour("completed_at")).values("h").annotate(c=Count("id"))
     hourly_total_map = {row["h"].hour: row["c"] for row in hourly_total_qs if row["h"]}
     hourly_completed_map = {row["h"].hour: row["c"] for row in hourly_completed_qs if row["h"]}
     hours = list(range(0, 24))
@@ -783,7 +784,7 @@ def dashboard(request: HttpRequest):
     for p in ["today", "yesterday", "last_week", "last_month"]:
         start_d, end_d = _period_range(p)
         rows = (
-            orders_qs.filter(created_at__date__gte=start_d, created_at__date__lte=end_d)
+            orders_qs.filter(in_date_range("created_at", start_d, end_d))
             .values("customer__full_name")
             .annotate(c=Count("id"))
             .order_by("-c")[:5]
@@ -839,7 +840,7 @@ def customers_list(request: HttpRequest):
     # Apply status filters based on today's activity and visit history
     if f_status == 'active':
         # Active today: customers who visited today (based on last_visit date)
-        qs = qs.filter(last_visit__date=today_date)
+        qs = qs.filter(on_date('last_visit', today_date))
     elif f_status == 'inactive':
         # Inactive: customers who have never visited or didn't visit today
         qs = qs.filter(total_visits=0)
@@ -848,13 +849,11 @@ def customers_list(request: HttpRequest):
         qs = qs.filter(total_visits__gt=1)
 
     # KPI calculations for header
-    active_customers = customers_qs.filter(last_visit__date=today_date).count()
-    new_customers_today = customers_qs.filter(registration_date__date=today_date).count()
+    active_customers = customers_qs.filter(on_date('last_visit', today_date)).count()
+    new_customers_today = customers_qs.filter(on_date('registration_date', today_date)).count()
     returning_customers = customers_qs.filter(total_visits__gt=1).count()
 
-    paginator = Paginator(qs, 20)
-    page = request.GET.get('page')
-    customers = paginator.get_page(page)
+    customers = paginate(request, qs, 20, ordering=('-registration_date', '-id'))
     branches = list(Branch.objects.filter(is_active=True).order_by('name').values_list('name', flat=True))
     return render(request, "tracker/customers_list.html", {
         "customers": customers,
@@ -888,8 +887,9 @@ def customers_search(request: HttpRequest):
         results = customers_qs.order_by('-last_visit', '-registration_date')[:10]
     elif q:
         q_upper = q.upper()
-        exact_plate_qs = customers_qs.filter(vehicles__plate_number__iexact=q_upper)
-        if exact_plate_qs.exists():
+        plate_key = normalize_plate(q)
+        exact_plate_qs = customers_qs.filter(vehicles__plate_key=plate_key)
+        if plate_key and exact_plate_qs.exists():
             results = exact_plate_qs.order_by('-last_visit', '-registration_date')[:10]
         else:
             results = customers_qs.filter(
@@ -956,8 +956,20 @@ def api_customers_summary(request: HttpRequest):
 
 @login_required
 def api_customers_list(request: HttpRequest):
-    """API endpoint to get all customers for dropdown selection (e.g., inquiries)"""
+    """API endpoint to get all customers for dropdown selection (e.g., inquiries).
+
+    Pass ?limit=N (and then ?after=<next_cursor>) to page through by (full_name, id)
+    instead of loading every customer.
+    """
     qs = scope_queryset(Customer.objects.all().order_by('full_name'), request.user, request)
+    next_cursor = None
+    if request.GET.get('limit') or request.GET.get('after'):
+        try:
+            limit = min(max(int(request.GET.get('limit') or 50), 1), 500)
+        except ValueError:
+            limit = 50
+        page = paginate(request, qs, limit, ordering=('full_name', 'id'))
+        qs, next_cursor = page.object_list, page.next_cursor
     customers = [
         {
             'id': c.id,
@@ -967,7 +979,7 @@ def api_customers_list(request: HttpRequest):
         }
         for c in qs
     ]
-    return JsonResponse({'success': True, 'customers': customers})
+    return JsonResponse({'success': True, 'customers': customers, 'next_cursor': next_cursor})
 
 
 @login_required
@@ -2159,6 +2171,7 @@ def create_order_for_customer(request: HttpRequest, pk: int):
 
 
 @login_required
+@read_replica
 def customer_groups(request: HttpRequest):
     """Advanced customer groups page with detailed analytics and insights"""
     from django.db.models import Count, Sum, Avg, Max, Min, Q, F
@@ -2171,10 +2184,10 @@ def customer_groups(request: HttpRequest):
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest' and request.GET.get('load_group') != '1':
         return customer_groups_data(request)
         
-    # Optional server-side chart generation (matplotlib may be unavailable in some envs)
-    try:
-        from tracker.utils.chart_utils import generate_monthly_trend_chart
-    except Exception:
+    # Optional server-side chart generation (matplotlib may be unavailable in some envs);
+    # charts are cached by their data, so unchanged trends are not re-rendered
+    from tracker.utils.chart_utils import charts_available, generate_monthly_trend_chart
+    if not charts_available():
         generate_monthly_trend_chart = None
     
     # Get filter parameters
@@ -2217,17 +2230,10 @@ def customer_groups(request: HttpRequest):
     else:
         start_date = today - timedelta(days=180)  # default
     
-    # Base customer queryset with annotations
-    customers_base = scope_queryset(Customer.objects.all(), request.user, request).annotate(
-        recent_orders_count=Count('orders', filter=Q(orders__created_at__date__gte=start_date)),
-        last_order_date=Max('orders__created_at'),
-        first_order_date=Min('orders__created_at'),
-        service_orders=Count('orders', filter=Q(orders__type='service', orders__created_at__date__gte=start_date)),
-        sales_orders=Count('orders', filter=Q(orders__type='sales', orders__created_at__date__gte=start_date)),
-        inquiry_orders=Count('orders', filter=Q(orders__type='inquiry', orders__created_at__date__gte=start_date)),
-        completed_orders=Count('orders', filter=Q(orders__status='completed', orders__created_at__date__gte=start_date)),
-        cancelled_orders=Count('orders', filter=Q(orders__status='cancelled', orders__created_at__date__gte=start_date)),
-        vehicles_count=Count('vehicles', distinct=True)
+    # Base customer queryset with lifetime stats (one join on CustomerStats) and period order counts
+    from .services import CustomerStatsService
+    customers_base = CustomerStatsService.with_stats(
+        scope_queryset(Customer.objects.all(), request.user, request), since=start_date
     )
     
     # Get all defined customer types from the model
@@ -2347,7 +2353,7 @@ def customer_groups(request: HttpRequest):
         mixed_preference = total_customers - service_preference - sales_preference if total_customers > 0 else 0
         
         # Recent activity trends
-        recent_new_customers = group_customers.filter(registration_date__date__gte=start_date).count()
+        recent_new_customers = group_customers.filter(in_date_range('registration_date', start_date)).count()
         returning_customers = group_customers.filter(total_visits__gt=1).count()
         
         # Calculate completion rate (completed orders / (completed + cancelled))
@@ -2392,7 +2398,7 @@ def customer_groups(request: HttpRequest):
     # Overall statistics - use base queryset without any filters for accurate totals
     overall_stats = {
         'total_revenue': customers_base.aggregate(total=Sum('total_spent'))['total'] or 0,
-        'total_orders': customers_base.aggregate(total=Count('orders'))['total'] or 0,
+        'total_orders': customers_base.aggregate(total=Sum('total_orders'))['total'] or 0,
     }
     
     # Calculate growth for overall metrics
@@ -2401,7 +2407,7 @@ def customer_groups(request: HttpRequest):
         registration_date__gte=prev_period_start
     ).aggregate(
         total_revenue=Sum('total_spent', default=0),
-        total_orders=Count('orders'),
+        total_orders=Sum('stats__total_orders', default=0),
         total_customers=Count('id')
     )
     
@@ -2445,7 +2451,7 @@ def customer_groups(request: HttpRequest):
     for customer_type, display_name in Customer.TYPE_CHOICES:
         # Get monthly order data
         monthly_data = (Order.objects
-                       .filter(customer__customer_type=customer_type, created_at__date__gte=start_date)
+                       .filter(in_date_range('created_at', start_date), customer__customer_type=customer_type)
                        .annotate(month=TruncMonth('created_at'))
                        .values('month')
                        .annotate(
@@ -2480,7 +2486,7 @@ def customer_groups(request: HttpRequest):
     
     # Initialize variables with default values if not defined
     total_revenue = getattr(customers_base.aggregate(total=Sum('total_spent')), 'total', 0) or 0
-    total_orders = getattr(customers_base.aggregate(total=Count('orders')), 'total', 0) or 0
+    total_orders = getattr(customers_base.aggregate(total=Sum('total_orders')), 'total', 0) or 0
     
     # Calculate growth percentages with proper default values
     revenue_growth = 0
@@ -2559,10 +2565,12 @@ def customer_groups_advanced(request: HttpRequest):
 
 
 @login_required
+@read_replica
 def api_customer_groups_data(request: HttpRequest):
     """Advanced API endpoint for customer groups data"""
-    from django.db.models import Count, Sum, Avg, Q, F, Max, Min
-    from datetime import datetime, timedelta
+    from django.db.models import Count, Sum
+    from datetime import timedelta
+    from .services import CustomerStatsService
     
     # Get parameters
     group = request.GET.get('group', 'all')
@@ -2590,20 +2598,16 @@ def api_customer_groups_data(request: HttpRequest):
     
     for customer_type in customer_types:
         # Get customers for this group
-        customers = Customer.objects.filter(customer_type=customer_type).annotate(
-            total_orders=Count('orders'),
-            recent_orders=Count('orders', filter=Q(orders__created_at__date__gte=start_date)),
-            service_orders=Count('orders', filter=Q(orders__type='service')),
-            sales_orders=Count('orders', filter=Q(orders__type='sales')),
-            inquiry_orders=Count('orders', filter=Q(orders__type='inquiry')),
-            completed_orders=Count('orders', filter=Q(orders__status='completed')),
-            last_order_date=Max('orders__created_at'),
-            vehicles_count=Count('vehicles', distinct=True)
-        )
+        customers = CustomerStatsService.with_stats(Customer.objects.filter(customer_type=customer_type))
         
-        customer_count = customers.count()
-        group_orders = sum(c.total_orders for c in customers) or 0
-        group_revenue = sum(float(c.total_spent or 0) for c in customers) or 0
+        group_totals = customers.aggregate(
+            customer_count=Count('id'),
+            group_orders=Sum('total_orders'),
+            group_revenue=Sum('total_spent'),
+        )
+        customer_count = group_totals['customer_count']
+        group_orders = group_totals['group_orders'] or 0
+        group_revenue = float(group_totals['group_revenue'] or 0)
         
         # Calculate averages
         avg_orders = group_orders / customer_count if customer_count > 0 else 0
@@ -2631,15 +2635,9 @@ def api_customer_groups_data(request: HttpRequest):
     # If specific group requested, get detailed data
     group_details = None
     if group != 'all' and group in customer_types:
-        customers = Customer.objects.filter(customer_type=group).annotate(
-            total_orders=Count('orders'),
-            recent_orders=Count('orders', filter=Q(orders__created_at__date__gte=start_date)),
-            service_orders=Count('orders', filter=Q(orders__type='service')),
-            sales_orders=Count('orders', filter=Q(orders__type='sales')),
-            inquiry_orders=Count('orders', filter=Q(orders__type='inquiry')),
-            completed_orders=Count('orders', filter=Q(orders__status='completed')),
-            last_order_date=Max('orders__created_at'),
-            vehicles_count=Count('vehicles', distinct=True)
+        # Period orders stay a per-row subquery: it only runs for the 50 customers returned
+        customers = CustomerStatsService.with_stats(Customer.objects.filter(customer_type=group)).annotate(
+            recent_orders=CustomerStatsService.period_orders(start_date),
         ).order_by('-total_spent')
         
         group_details = {
@@ -2777,7 +2775,8 @@ def orders_list(request: HttpRequest):
     salesperson_id = request.GET.get("salesperson", "")
 
     # Exclude temporary customers (those with full_name starting with "Plate " and phone starting with "PLATE_")
-    orders = scope_queryset(Order.objects.select_related("customer", "vehicle").order_by("-created_at"), request.user, request).exclude(
+    # Prefetch invoices (and their salesperson) shown in the list rows to avoid a query per row
+    orders = scope_queryset(Order.objects.select_related("customer", "vehicle").prefetch_related("invoices__salesperson").order_by("-created_at"), request.user, request).exclude(
         customer__full_name__startswith='Plate ',
         customer__phone__startswith='PLATE_'
     )
@@ -2804,7 +2803,7 @@ def orders_list(request: HttpRequest):
     dr = (date_range or '').lower()
     if dr in ("daily", "today"):
         today = timezone.localdate()
-        orders = orders.filter(created_at__date=today)
+        orders = orders.filter(on_date('created_at', today))
     elif dr in ("weekly", "week"):
         week_ago = timezone.now() - timedelta(days=7)
         orders = orders.filter(created_at__gte=week_ago)
@@ -2816,26 +2815,13 @@ def orders_list(request: HttpRequest):
         start_year = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
         orders = orders.filter(created_at__gte=start_year)
 
-    # Get counts for stats
-    # Exclude temporary customers (those with full_name starting with "Plate " and phone starting with "PLATE_")
-    base_orders_qs = scope_queryset(Order.objects.all(), request.user, request).exclude(
-        customer__full_name__startswith='Plate ',
-        customer__phone__startswith='PLATE_'
-    )
-    total_orders = base_orders_qs.count()
-    pending_orders = base_orders_qs.filter(status="created").count()
-    active_orders = base_orders_qs.filter(status__in=["created", "in_progress", "overdue"]).count()
-    completed_today = base_orders_qs.filter(status="completed", completed_at__date=timezone.localdate()).count()
-    urgent_orders = base_orders_qs.filter(priority="urgent").count()
-    # Overdue KPI: respect user branch scoping and optional admin branch filter
-    overdue_count = base_orders_qs.filter(status="overdue").count()
+    # KPI strip: one cached aggregate over the scoped orders (temporary customers excluded
+    # from the order-list counts), see OrderKpiService
+    from .services import OrderKpiService
+    kpis = OrderKpiService.get_kpis(request.user, request)
     revenue_today = 0
 
-    # Get started orders KPIs (for the Started Orders view)
     started_orders_qs = scope_queryset(Order.objects.filter(status__in=['created', 'in_progress', 'overdue']), request.user, request)
-    started_total = started_orders_qs.count()
-    started_pending = started_orders_qs.filter(status='in_progress').count()
-    started_completed = scope_queryset(Order.objects.filter(status='completed'), request.user, request).count()
 
     # Calculate documents uploaded (document_scans count)
     documents_uploaded = 0
@@ -2854,7 +2840,7 @@ def orders_list(request: HttpRequest):
         started_status = request.GET.get("status", "all")
         started_sort = request.GET.get("sort_by", "-started_at")
 
-        started_list_qs = started_orders_qs.select_related("customer", "vehicle")
+        started_list_qs = started_orders_qs.select_related("customer", "vehicle").prefetch_related("invoices__salesperson")
 
         if started_status != "all":
             started_list_qs = started_list_qs.filter(status=started_status)
@@ -2876,10 +2862,8 @@ def orders_list(request: HttpRequest):
         page = request.GET.get('page')
         started_orders = paginator.get_page(page)
     else:
-        # For regular view, paginate regular orders
-        paginator = Paginator(orders, 20)
-        page = request.GET.get('page')
-        orders = paginator.get_page(page)
+        # For regular view, paginate regular orders by (created_at, id) cursor
+        orders = paginate(request, orders, 20)
 
     branches = list(Branch.objects.filter(is_active=True).order_by('name').values_list('name', flat=True))
 
@@ -2893,16 +2877,16 @@ def orders_list(request: HttpRequest):
         "order_view_mode": view_mode,
         "status": status,
         "type": type_filter,
-        "total_orders": total_orders,
-        "pending_orders": pending_orders,
-        "active_orders": active_orders,
-        "completed_today": completed_today,
-        "urgent_orders": urgent_orders,
-        "overdue_count": overdue_count,
+        "total_orders": kpis["total_orders"],
+        "pending_orders": kpis["pending_orders"],
+        "active_orders": kpis["active_orders"],
+        "completed_today": kpis["completed_today"],
+        "urgent_orders": kpis["urgent_orders"],
+        "overdue_count": kpis["overdue_count"],
         "revenue_today": revenue_today,
-        "started_total": started_total,
-        "started_pending": started_pending,
-        "started_completed": started_completed,
+        "started_total": kpis["started_total"],
+        "started_pending": kpis["started_pending"],
+        "started_completed": kpis["started_completed"],
         "documents_uploaded": documents_uploaded,
         "branches": branches,
         "salespersons": salespersons,
@@ -3328,16 +3312,24 @@ def order_detail(request: HttpRequest, pk: int):
     except Exception:
         pass
 
+    # Load every linked invoice with its line items up front; the template walks them all
+    from django.db.models import prefetch_related_objects, Prefetch
+    from .models import OrderInvoiceLink
+    prefetch_related_objects([order], Prefetch(
+        'invoice_links',
+        queryset=OrderInvoiceLink.objects.select_related('invoice__salesperson').prefetch_related('invoice__line_items'),
+    ))
+
     # Prefer primary-linked invoice if present; otherwise, fall back to earliest created
     invoice = None
     try:
-      primary_link = order.invoice_links.filter(is_primary=True).select_related('invoice').first()
+      primary_link = next((link for link in order.invoice_links.all() if link.is_primary), None)
       if primary_link:
         invoice = primary_link.invoice
-      elif order.invoices.exists():
-        invoice = order.invoices.order_by('created_at').first()
+      else:
+        invoice = order.invoices.order_by('created_at').prefetch_related('line_items').first()
     except Exception:
-      invoice = order.invoices.order_by('created_at').first() if order.invoices.exists() else None
+      invoice = order.invoices.order_by('created_at').first()
 
     # Extract services from description for better display
     selected_services = []
@@ -3385,11 +3377,11 @@ def order_detail(request: HttpRequest, pk: int):
     line_item_categories = {}
     try:
         codes = []
-        if invoice and invoice.line_items.exists():
+        if invoice:
             codes.extend([li.code for li in invoice.line_items.all() if getattr(li, 'code', None)])
         for link in order.invoice_links.all():
             inv = getattr(link, 'invoice', None)
-            if inv and inv.line_items.exists():
+            if inv:
                 codes.extend([li.code for li in inv.line_items.all() if getattr(li, 'code', None)])
         if codes:
             from tracker.views_invoice_upload import _get_item_code_categories
@@ -3623,15 +3615,13 @@ def complete_order(request: HttpRequest, pk: int):
                 messages.error(request, 'Could not access the signature image for PDF embedding.')
                 return redirect('tracker:order_detail', pk=o.id)
             try:
-                try:
-                    att.seek(0)
-                except Exception:
-                    pass
-                pdf_bytes = att.read()
-                if is_job_card:
-                    signed_pdf_bytes = embed_signature_in_pdf(pdf_bytes, signature_bytes, preset='job_card')
-                else:
-                    signed_pdf_bytes = embed_signature_in_pdf(pdf_bytes, signature_bytes)
+                from .utils.upload_spool import spool_upload
+                # Sign from the spooled file on disk instead of an in-memory copy of the upload
+                with spool_upload(att) as att_upload:
+                    if is_job_card:
+                        signed_pdf_bytes = embed_signature_in_pdf(att_upload.path, signature_bytes, preset='job_card')
+                    else:
+                        signed_pdf_bytes = embed_signature_in_pdf(att_upload.path, signature_bytes)
                 signed_name = build_signed_filename(att.name)
                 signed_attachment = ContentFile(signed_pdf_bytes, name=signed_name)
             except SignatureEmbedError as exc:
@@ -3656,15 +3646,12 @@ def complete_order(request: HttpRequest, pk: int):
                 messages.error(request, 'Could not access the signature image for embedding.')
                 return redirect('tracker:order_detail', pk=o.id)
             try:
-                try:
-                    att.seek(0)
-                except Exception:
-                    pass
-                img_bytes = att.read()
-                if is_job_card:
-                    out_bytes = embed_signature_in_image(img_bytes, signature_bytes, preset='job_card')
-                else:
-                    out_bytes = embed_signature_in_image(img_bytes, signature_bytes)
+                from .utils.upload_spool import spool_upload
+                with spool_upload(att) as att_upload:
+                    if is_job_card:
+                        out_bytes = embed_signature_in_image(att_upload.path, signature_bytes, preset='job_card')
+                    else:
+                        out_bytes = embed_signature_in_image(att_upload.path, signature_bytes)
                 out_name = build_signed_name(att.name)
                 signed_attachment = ContentFile(out_bytes, name=out_name)
             except SignatureEmbedError as exc:
@@ -4121,6 +4108,42 @@ def sign_supporting_documents(request: HttpRequest, pk: int):
         return JsonResponse({'success': False, 'error': 'Could not save the signed document.'}, status=400)
 
 
+@login_required
+@require_http_methods(["GET"])
+def document_thumbnail(request: HttpRequest, kind: str, pk: int):
+    """First-page WebP thumbnail of an order document (?w=160|480).
+
+    kind is 'attachment' (OrderAttachment), 'signed' (OrderAttachmentSignature) or
+    'completion' (the order's completion attachment). Templates add ?v=<file name>, so
+    the response can be cached by the browser for good.
+    """
+    from django.http import FileResponse, Http404
+    from .utils import thumbnails
+
+    orders = scope_queryset(Order.objects.all(), request.user, request)
+    if kind == 'attachment':
+        field_file = get_object_or_404(OrderAttachment, pk=pk, order__in=orders).file
+    elif kind == 'signed':
+        field_file = get_object_or_404(OrderAttachmentSignature, pk=pk, attachment__order__in=orders).signed_file
+    elif kind == 'completion':
+        field_file = get_object_or_404(orders, pk=pk).completion_attachment
+    else:
+        raise Http404()
+    if not field_file or not thumbnails.supports(field_file.name):
+        raise Http404()
+
+    try:
+        path = thumbnails.get_or_render(field_file, request.GET.get('w'))
+    except FileNotFoundError:
+        raise Http404()
+    except Exception as e:
+        logger.warning(f"Thumbnail failed for {kind} {pk}: {e}")
+        raise Http404()
+    response = FileResponse(open(path, 'rb'), content_type='image/webp')
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+
 @login_required
 def delete_order_attachment(request: HttpRequest, att_id: int):
     att = get_object_or_404(OrderAttachment, pk=att_id)
@@ -4326,6 +4349,7 @@ def remove_invoice_link(request: HttpRequest, pk: int):
 
 
 @login_required
+@read_replica
 def customers_export(request: HttpRequest):
     q = request.GET.get('q','').strip()
     qs = scope_queryset(Customer.objects.all().order_by('-registration_date'), request.user, request)
@@ -4341,6 +4365,7 @@ def customers_export(request: HttpRequest):
     return response
 
 @login_required
+@read_replica
 def orders_export(request: HttpRequest):
     status = request.GET.get('status','all')
     type_ = request.GET.get('type','all')
@@ -4359,9 +4384,11 @@ def orders_export(request: HttpRequest):
     return response
 
 @login_required
+@read_replica
 def customer_groups_export(request: HttpRequest):
     """Export filtered customer group data to CSV"""
     from datetime import timedelta
+    from .services import CustomerStatsService
     selected_group = request.GET.get('group', '')
     time_period = request.GET.get('period', '6months')
     today = timezone.now().date()
@@ -4376,14 +4403,8 @@ def customer_groups_export(request: HttpRequest):
     else:
         start_date = today - timedelta(days=180)
 
-    qs = scope_queryset(Customer.objects.all(), request.user, request).annotate(
-        recent_orders_count=Count('orders', filter=Q(orders__created_at__date__gte=start_date)),
-        last_order_date=Max('orders__created_at'),
-        service_orders=Count('orders', filter=Q(orders__type='service', orders__created_at__date__gte=start_date)),
-        sales_orders=Count('orders', filter=Q(orders__type='sales', orders__created_at__date__gte=start_date)),
-        inquiry_orders=Count('orders', filter=Q(orders__type='inquiry', orders__created_at__date__gte=start_date)),
-        completed_orders=Count('orders', filter=Q(orders__status='completed', orders__created_at__date__gte=start_date)),
-        vehicles_count=Count('vehicles', distinct=True),
+    qs = CustomerStatsService.with_stats(
+        scope_queryset(Customer.objects.all(), request.user, request), since=start_date
     )
     if selected_group and selected_group in dict(Customer.TYPE_CHOICES):
         qs = qs.filter(customer_type=selected_group)
@@ -4461,20 +4482,16 @@ def api_check_customer_exists(request: HttpRequest):
         full_name__startswith="Plate "
     ).first()
     
-    # If not found, try with normalized phone numbers
+    # If not found, match on the digits-only phone (indexed with branch)
     if not c:
-        # Remove all non-digit characters for comparison
-        import re
-        clean_phone = re.sub(r'[^0-9]', '', phone)
+        from .utils import normalize_phone
+        clean_phone = normalize_phone(phone)
         if clean_phone:
-            # Try to find customer with similar phone format
             c = Customer.objects.filter(
-                branch=user_branch
+                branch=user_branch,
+                phone_normalized=clean_phone,
             ).exclude(
                 full_name__startswith="Plate "
-            ).extra(
-                where=["REPLACE(REPLACE(REPLACE(phone, ' ', ''), '-', ''), '+', '') = %s"],
-                params=[clean_phone]
             ).first()
 
     if not c:
@@ -4505,7 +4522,13 @@ def api_check_customer_duplicate(request: HttpRequest):
     if not full_name or not phone:
         return JsonResponse({"exists": False})
 
-    qs = Customer.objects.all()
+    from .utils import normalize_phone
+    phone_normalized = normalize_phone(phone)
+    if not phone_normalized:
+        return JsonResponse({"exists": False})
+
+    # Checks every branch; narrow by the phone_normalized index first, the remaining filters are exact
+    qs = Customer.objects.filter(phone_normalized=phone_normalized)
     if customer_type == "personal":
         qs = qs.filter(full_name=full_name, phone=phone, customer_type="personal")
     elif customer_type in ["government", "ngo", "company"]:
@@ -4549,7 +4572,10 @@ def api_check_customer_duplicate(request: HttpRequest):
 
 @login_required
 def api_recent_orders(request: HttpRequest):
-    recents = scope_queryset(Order.objects.select_related("customer", "vehicle").exclude(status="completed").order_by("-created_at"), request.user, request)[:10]
+    qs = scope_queryset(Order.objects.select_related("customer", "vehicle").exclude(status="completed"), request.user, request)
+    # ?after=<next_cursor> continues from the previous response
+    page = paginate(request, qs, 10)
+    recents = page.object_list
     data = [
         {
             "order_number": r.order_number,
@@ -4562,17 +4588,14 @@ def api_recent_orders(request: HttpRequest):
         }
         for r in recents
     ]
-    return JsonResponse({"orders": data})
+    return JsonResponse({"orders": data, "next_cursor": page.next_cursor})
 
 @login_required
 def api_inventory_items(request: HttpRequest):
     """API endpoint to get all inventory items with their brands"""
     from django.db.models import Sum, F
     
-    cache_key = "api_inv_items_v2"
-    data = cache.get(cache_key)
-    
-    if not data:
+    def build():
         # Get items with their brand names and total quantities
         items = (
             InventoryItem.objects
@@ -4592,9 +4615,9 @@ def api_inventory_items(request: HttpRequest):
             for item in items
         ]
         
-        data = {"items": formatted_items}
-        cache.set(cache_key, data, 300)  # Cache for 5 minutes
-        
+        return {"items": formatted_items}
+
+    data = shared_cache.get_or_compute('inventory', 'items', build, timeout=300)
     return JsonResponse(data)
 
 @login_required
@@ -4603,9 +4626,8 @@ def api_inventory_brands(request: HttpRequest):
     name = request.GET.get("name", "").strip()
     if not name:
         return JsonResponse({"brands": []})
-    cache_key = f"api_inv_brands_{name}"
-    data = cache.get(cache_key)
-    if not data:
+
+    def build():
         # Aggregate by brand for this item
         rows = (
             InventoryItem.objects.filter(name=name)
@@ -4634,8 +4656,9 @@ def api_inventory_brands(request: HttpRequest):
                 "quantity": unbranded_qty,
                 "price": str(unbranded_price) if unbranded_price is not None else ""
             })
-        data = {"brands": brands}
-        cache.set(cache_key, data, 120)
+        return {"brands": brands}
+
+    data = shared_cache.get_or_compute('inventory', ('brands', name), build, timeout=120)
     return JsonResponse(data)
 
 @login_required
@@ -4877,8 +4900,8 @@ def api_notifications_summary(request: HttpRequest):
     from django.db.models import Q
     base_customers = scope_queryset(Customer.objects.all(), request.user, request)
     todays_qs = base_customers.filter(
-        Q(registration_date__date=today_date) |
-        Q(orders__created_at__date=today_date)
+        on_date('registration_date', today_date) |
+        on_date('orders__created_at', today_date)
     ).distinct().order_by('-registration_date')
     todays_count = todays_qs.count()
     todays = [{
@@ -4890,7 +4913,7 @@ def api_notifications_summary(request: HttpRequest):
     } for c in todays_qs[:8]]
 
     # Low stock items
-    low_qs = InventoryItem.objects.filter(quantity__lte=stock_threshold).order_by('quantity', 'name')
+    low_qs = InventoryItem.objects.select_related('brand').filter(quantity__lte=stock_threshold).order_by('quantity', 'name')
     low_count = low_qs.count()
     low_stock = [{
         'id': i.id,
@@ -5279,40 +5302,23 @@ def inventory_list(request: HttpRequest):
     
     # Get distinct active brands for filter dropdown
     # Cache this queryset since it's used in the template
-    from django.core.cache import cache
-    cache_key = 'active_brands_list'
-    brands = cache.get(cache_key)
-    
-    if brands is None:
-        brands = list(Brand.objects.filter(is_active=True).order_by('name').values('id', 'name'))
-        # Cache for 1 hour
-        cache.set(cache_key, brands, 3600)
-    
-    # Paginate results
-    items_per_page = 20
-    paginator = Paginator(qs, items_per_page)
-    
-    # Get current page from request
-    page_number = request.GET.get('page')
-    try:
-        page_number = int(page_number) if page_number and page_number.isdigit() else 1
-        items = paginator.page(page_number)
-    except (ValueError, EmptyPage):
-        # If page is not an integer or out of range, deliver first page
-        items = paginator.page(1)
+    brands = shared_cache.get_or_compute(
+        'inventory', 'active_brands',
+        lambda: list(Brand.objects.filter(is_active=True).order_by('name').values('id', 'name')),
+        timeout=3600,
+    )
     
-    # Calculate range of items being displayed
-    start_index = (items.number - 1) * items_per_page + 1
-    end_index = min(start_index + items_per_page - 1, paginator.count)
+    # Paginate results by (created_at, id) cursor
+    items = paginate(request, qs, 20)
     
     context = {
         'items': items,
         'q': q,
         'brands': brands,
         'selected_brand': brand_filter,
-        'total_items': paginator.count,
-        'start_index': start_index,
-        'end_index': end_index,
+        'total_items': items.paginator.count,
+        'start_index': items.start_index(),
+        'end_index': items.end_index(),
     }
     
     # Add HTTP headers for caching
@@ -5410,16 +5416,8 @@ def organization_management(request: HttpRequest):
     if q:
         base = base.filter(Q(full_name__icontains=q) | Q(phone__icontains=q) | Q(email__icontains=q) | Q(organization_name__icontains=q) | Q(code__icontains=q))
 
-    customers_qs = base.annotate(
-        recent_orders_count=Count('orders', filter=Q(orders__created_at__date__gte=start_date)),
-        last_order_date=Max('orders__created_at'),
-        service_orders=Count('orders', filter=Q(orders__type='service', orders__created_at__date__gte=start_date)),
-        sales_orders=Count('orders', filter=Q(orders__type='sales', orders__created_at__date__gte=start_date)),
-        inquiry_orders=Count('orders', filter=Q(orders__type='inquiry', orders__created_at__date__gte=start_date)),
-        completed_orders=Count('orders', filter=Q(orders__status='completed', orders__created_at__date__gte=start_date)),
-        cancelled_orders=Count('orders', filter=Q(orders__status='cancelled', orders__created_at__date__gte=start_date)),
-        vehicles_count=Count('vehicles', distinct=True)
-    )
+    from .services import CustomerStatsService
+    customers_qs = CustomerStatsService.with_stats(base, since=start_date)
 
     if status == 'returning':
         customers_qs = customers_qs.filter(total_visits__gt=1)
@@ -5439,7 +5437,7 @@ def organization_management(request: HttpRequest):
     total_org = sum(counts.values()) if counts else 0
 
     # Charts
-    orders_scope = scope_queryset(Order.objects.filter(customer__in=base, created_at__date__gte=start_date), request.user, request)
+    orders_scope = scope_queryset(Order.objects.filter(in_date_range('created_at', start_date), customer__in=base), request.user, request)
     if status == 'returning':
         orders_scope = orders_scope.filter(customer__total_visits__gt=1)
     type_dist = {r['type']: r['c'] for r in orders_scope.values('type').annotate(c=Count('id'))}
@@ -5470,6 +5468,7 @@ def organization_management(request: HttpRequest):
 
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
+@read_replica
 def organization_export(request: HttpRequest):
     org_types = ['government','ngo','company']
     q = request.GET.get('q','').strip()
@@ -5484,19 +5483,12 @@ def organization_export(request: HttpRequest):
         start_date = today - timezone.timedelta(days=365)
     else:
         start_date = today - timezone.timedelta(days=180)
+    from .services import CustomerStatsService
 
     base = scope_queryset(Customer.objects.filter(customer_type__in=org_types), request.user, request)
     if q:
         base = base.filter(Q(full_name__icontains=q) | Q(phone__icontains=q) | Q(email__icontains=q) | Q(organization_name__icontains=q) | Q(code__icontains=q))
-    qs = base.annotate(
-        recent_orders_count=Count('orders', filter=Q(orders__created_at__date__gte=start_date)),
-        last_order_date=Max('orders__created_at'),
-        service_orders=Count('orders', filter=Q(orders__type='service', orders__created_at__date__gte=start_date)),
-        sales_orders=Count('orders', filter=Q(orders__type='sales', orders__created_at__date__gte=start_date)),
-        inquiry_orders=Count('orders', filter=Q(orders__type='inquiry', orders__created_at__date__gte=start_date)),
-        completed_orders=Count('orders', filter=Q(orders__status='completed', orders__created_at__date__gte=start_date)),
-        vehicles_count=Count('vehicles', distinct=True),
-    )
+    qs = CustomerStatsService.with_stats(base, since=start_date)
     if status == 'returning':
         qs = qs.filter(total_visits__gt=1)
 
@@ -5719,10 +5711,8 @@ def inquiries(request: HttpRequest):
             status__in=['created', 'in_progress']
         )
 
-    # Pagination
-    paginator = Paginator(queryset, 12)  # Show 12 inquiries per page
-    page = request.GET.get('page')
-    inquiries = paginator.get_page(page)
+    # Pagination (12 inquiries per page, by (created_at, id) cursor)
+    inquiries = paginate(request, queryset, 12)
 
     # Statistics
     base_queryset = scope_queryset(Order.objects.filter(type='inquiry'), request.user, request)
@@ -6252,25 +6242,18 @@ def api_save_delay_reason(request: HttpRequest, pk: int):
 
 @login_required
 def system_settings(request: HttpRequest):
-    def defaults():
-        return {
-            'company_name': '',
-            'default_priority': 'medium',
-            'enable_unbranded_alias': True,
-            'allow_order_without_vehicle': True,
-            'sms_provider': 'none',
-        }
-    data = cache.get('system_settings', None) or defaults()
+    from .utils.system_settings import DEFAULTS, get_settings, update_settings
+    data = get_settings().as_dict()
     if request.method == 'POST':
         form = SystemSettingsForm(request.POST)
         if form.is_valid():
-            new_data = {**defaults(), **form.cleaned_data}
+            new_data = {**DEFAULTS, **form.cleaned_data}
             changes = []
             for k, old_val in (data or {}).items():
                 new_val = new_data.get(k)
                 if new_val != old_val:
                     changes.append(f"{k}: '{old_val}' -> '{new_val}'")
-            cache.set('system_settings', new_data, None)
+            update_settings(new_data, user=request.user)
             add_audit_log(request.user, 'system_settings_update', '; '.join(changes) if changes else 'No changes')
             messages.success(request, 'Settings updated')
             return redirect('tracker:system_settings')
@@ -6344,10 +6327,11 @@ def audit_logs(request: HttpRequest):
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def backup_restore(request: HttpRequest):
+    import json
+    from .utils.system_settings import export_settings, replace_settings, reset_settings
     if request.GET.get('download'):
-        import json
         payload = {
-            'system_settings': cache.get('system_settings', {}),
+            'system_settings': export_settings(),
         }
         add_audit_log(request.user, 'backup_download', 'Downloaded system settings backup')
         resp = HttpResponse(json.dumps(payload, indent=2), content_type='application/json')
@@ -6356,7 +6340,7 @@ def backup_restore(request: HttpRequest):
     if request.method == 'POST':
         action = request.POST.get('action')
         if action == 'reset_settings':
-            cache.delete('system_settings')
+            reset_settings()
             add_audit_log(request.user, 'settings_reset', 'Reset system settings to defaults')
             messages.success(request, 'System settings have been reset to defaults')
             return redirect('tracker:backup_restore')
@@ -6366,7 +6350,7 @@ def backup_restore(request: HttpRequest):
                 data = json.load(f)
                 settings_data = data.get('system_settings') or {}
                 if isinstance(settings_data, dict):
-                    cache.set('system_settings', settings_data, None)
+                    replace_settings(settings_data, user=request.user)
                     add_audit_log(request.user, 'settings_restored', 'Restored system settings from uploaded backup')
                     messages.success(request, 'Settings restored from backup')
                 else:
@@ -6376,6 +6360,38 @@ def backup_restore(request: HttpRequest):
             return redirect('tracker:backup_restore')
     return render(request, 'tracker/backup_restore.html')
 
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def request_metrics_report(request: HttpRequest):
+    """Hot-path report: endpoints ranked by p95 latency and by queries per request."""
+    from django.conf import settings
+    from .utils import request_metrics
+    if request.method == 'POST' and request.POST.get('action') == 'reset':
+        request_metrics.reset()
+        shared_cache.reset_stats()
+        add_audit_log(request.user, 'request_metrics_reset', 'Cleared request performance metrics')
+        messages.success(request, 'Performance metrics cleared')
+        return redirect('tracker:request_metrics_report')
+
+    try:
+        limit = max(1, min(200, int(request.GET.get('limit') or 25)))
+    except (TypeError, ValueError):
+        limit = 25
+    by_p95 = request_metrics.get_report(sort='p95', limit=limit)
+    by_queries = request_metrics.get_report(sort='queries', limit=limit)
+    cache_stats = shared_cache.get_stats()
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'by_p95': by_p95, 'by_queries': by_queries, 'cache': cache_stats})
+    context = {
+        'by_p95': by_p95,
+        'by_queries': by_queries,
+        'cache_stats': cache_stats,
+        'limit': limit,
+        'sample_rate': getattr(settings, 'REQUEST_METRICS_SAMPLE_RATE', 1.0),
+        'shared_store': bool(getattr(settings, 'REQUEST_METRICS_DB_PATH', None)),
+    }
+    return render(request, 'tracker/request_metrics.html', context)
+
 
 # ---------------------------
 # Reports System
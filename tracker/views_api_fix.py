@@ -1,13 +1,15 @@
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.db.models import Count, Sum, Avg, Q, F, Max, Min
-from datetime import datetime, timedelta, time
+from datetime import timedelta
 from django.utils import timezone
 from .models import Customer, Order
-from .db_compat import is_mysql, date_filter, period_filter
+from .db_compat import in_date_range
+from .db_router import read_replica
 from .utils import scope_queryset
 
 @login_required
+@read_replica
 def api_customer_groups_data_fixed(request):
     """Fixed API endpoint with clear time filtering and additional filters"""
     
@@ -33,15 +35,9 @@ def api_customer_groups_data_fixed(request):
         start_date = today - timedelta(days=180)
         period_label = "Last 6 Months"
     
-    # Use database-compatible date filtering
-    if is_mysql():
-        start_datetime = timezone.make_aware(datetime.combine(start_date, time.min))
-        end_datetime = timezone.make_aware(datetime.combine(today, time.max))
-    else:
-        # For SQLite, we can use the date directly
-        start_datetime = start_date
-        end_datetime = today
-    
+    # Index-friendly datetime range covering start_date..today (see db_compat)
+    period_q = in_date_range('created_at', start_date, today)
+
     # Get customer types
     customer_types = dict(Customer.TYPE_CHOICES)
     
@@ -57,15 +53,7 @@ def api_customer_groups_data_fixed(request):
 
         # Active customer ids determined from branch-scoped orders within period
         orders_base = scope_queryset(Order.objects.all(), request.user, request)
-        if is_mysql():
-            active_customer_ids = orders_base.filter(
-                created_at__gte=start_datetime,
-                created_at__lte=end_datetime
-            ).values_list('customer_id', flat=True).distinct()
-        else:
-            active_customer_ids = orders_base.filter(
-                created_at__date__gte=start_datetime
-            ).values_list('customer_id', flat=True).distinct()
+        active_customer_ids = orders_base.filter(period_q).values_list('customer_id', flat=True).distinct()
 
         # Apply activity filter
         if activity_filter == 'active':
@@ -77,17 +65,7 @@ def api_customer_groups_data_fixed(request):
         customer_count = customers_qs.count()
 
         # Orders for this customer type within period (scoped)
-        if is_mysql():
-            orders_qs = orders_base.filter(
-                customer__customer_type=customer_type,
-                created_at__gte=start_datetime,
-                created_at__lte=end_datetime
-            )
-        else:
-            orders_qs = orders_base.filter(
-                customer__customer_type=customer_type,
-                created_at__date__gte=start_datetime
-            )
+        orders_qs = orders_base.filter(period_q, customer__customer_type=customer_type)
 
         # Apply order type filter
         if order_type_filter != 'all':
@@ -130,31 +108,13 @@ def api_customer_groups_data_fixed(request):
     # If specific group requested, get detailed data
     group_details = None
     if group != 'all' and group in customer_types:
+        orders_period_q = in_date_range('orders__created_at', start_date, today)
         customers = scope_queryset(Customer.objects.filter(customer_type=group), request.user, request).annotate(
-            recent_orders=Count('orders', filter=Q(
-                orders__created_at__gte=start_datetime,
-                orders__created_at__lte=end_datetime
-            )),
-            service_orders=Count('orders', filter=Q(
-                orders__type='service',
-                orders__created_at__gte=start_datetime,
-                orders__created_at__lte=end_datetime
-            )),
-            sales_orders=Count('orders', filter=Q(
-                orders__type='sales',
-                orders__created_at__gte=start_datetime,
-                orders__created_at__lte=end_datetime
-            )),
-            consultation_orders=Count('orders', filter=Q(
-                orders__type='consultation',
-                orders__created_at__gte=start_datetime,
-                orders__created_at__lte=end_datetime
-            )),
-            completed_orders=Count('orders', filter=Q(
-                orders__status='completed',
-                orders__created_at__gte=start_datetime,
-                orders__created_at__lte=end_datetime
-            )),
+            recent_orders=Count('orders', filter=orders_period_q),
+            service_orders=Count('orders', filter=Q(orders__type='service') & orders_period_q),
+            sales_orders=Count('orders', filter=Q(orders__type='sales') & orders_period_q),
+            consultation_orders=Count('orders', filter=Q(orders__type='consultation') & orders_period_q),
+            completed_orders=Count('orders', filter=Q(orders__status='completed') & orders_period_q),
             last_order_date=Max('orders__created_at'),
             vehicles_count=Count('vehicles', distinct=True)
         ).order_by('-total_spent')
@@ -18,6 +18,7 @@ from django.contrib import messages
 
 from .models import Order, DelayReason, DelayReasonCategory, User, Branch
 from .utils import get_user_branch
+from .db_router import read_replica
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +31,7 @@ def _get_category_display(category_code):
 
 @login_required
 @permission_required('tracker.view_order', raise_exception=True)
+@read_replica
 def delay_analytics_dashboard(request):
     """Main delay analytics dashboard with overview and filters"""
     user_branch = get_user_branch(request.user)
@@ -101,6 +103,7 @@ def delay_analytics_dashboard(request):
 
 @login_required
 @require_http_methods(["GET"])
+@read_replica
 def api_delay_analytics_summary(request):
     """API endpoint for delay analytics summary statistics"""
     user_branch = get_user_branch(request.user)
@@ -194,6 +197,7 @@ def api_delay_analytics_summary(request):
 
 @login_required
 @require_http_methods(["GET"])
+@read_replica
 def api_delay_reasons_breakdown(request):
     """API endpoint for delay reasons breakdown by category"""
     user_branch = get_user_branch(request.user)
@@ -237,6 +241,7 @@ def api_delay_reasons_breakdown(request):
 
 @login_required
 @require_http_methods(["GET"])
+@read_replica
 def api_delay_trends(request):
     """API endpoint for delay trends over time"""
     user_branch = get_user_branch(request.user)
@@ -302,6 +307,7 @@ def api_delay_trends(request):
 
 @login_required
 @require_http_methods(["GET"])
+@read_replica
 def api_delay_by_order_type(request):
     """API endpoint for delay breakdown by order type"""
     user_branch = get_user_branch(request.user)
@@ -342,6 +348,7 @@ def api_delay_by_order_type(request):
 
 @login_required
 @require_http_methods(["GET"])
+@read_replica
 def api_delay_by_user(request):
     """API endpoint for delay breakdown by user/team member"""
     user_branch = get_user_branch(request.user)
@@ -392,6 +399,7 @@ def api_delay_by_user(request):
 
 @login_required
 @require_http_methods(["GET"])
+@read_replica
 def api_delay_impact_analysis(request):
     """API endpoint for delay impact analysis (revenue, time, customer impact)"""
     user_branch = get_user_branch(request.user)
@@ -461,6 +469,7 @@ def api_delay_impact_analysis(request):
 
 @login_required
 @require_http_methods(["GET"])
+@read_replica
 def api_delay_recommendations(request):
     """API endpoint for AI-generated recommendations based on delay patterns"""
     user_branch = get_user_branch(request.user)
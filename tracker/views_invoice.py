@@ -11,7 +11,7 @@ from django.utils import timezone
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, FileResponse
 from django.views.decorators.http import require_http_methods
 from django.db import transaction
 
@@ -108,15 +108,16 @@ def api_upload_extract_invoice(request):
         return JsonResponse({'success': False, 'message': 'No file uploaded'})
 
     try:
-        file_bytes = uploaded.read()
+        from tracker.utils.upload_spool import spool_upload
+        upload = spool_upload(uploaded)
     except Exception as e:
         logger.error(f"Failed to read uploaded file: {e}")
         return JsonResponse({'success': False, 'message': 'Failed to read uploaded file'})
 
-    # Run PDF text extractor (no OCR required)
+    # Run PDF text extractor on the spooled file in place (no in-memory copy)
     try:
-        from tracker.utils.pdf_text_extractor import extract_from_bytes as extract_pdf_text
-        extracted = extract_pdf_text(file_bytes, uploaded.name if uploaded else 'document.pdf')
+        from tracker.utils.pdf_text_extractor import extract_from_path
+        extracted = extract_from_path(upload.path, uploaded.name if uploaded else 'document.pdf')
     except Exception as e:
         logger.error(f"PDF extraction error: {e}\n{traceback.format_exc()}")
         return JsonResponse({
@@ -267,10 +268,7 @@ def api_upload_extract_invoice(request):
     # Priority 4: Try to find customer by plate number (via vehicles)
     if not customer_obj and plate:
         try:
-            vehicle = Vehicle.objects.filter(
-                plate_number__iexact=plate,
-                customer__branch=user_branch
-            ).select_related('customer').first()
+            vehicle = VehicleService.find_by_plate(user_branch, plate)
             if vehicle and vehicle.customer:
                 customer_obj = vehicle.customer
         except Exception as e:
@@ -441,12 +439,13 @@ def api_upload_extract_invoice(request):
             inv.generate_invoice_number()
         inv.save()
 
-        # Persist uploaded document into invoice.document for traceability
+        # Persist uploaded document into invoice.document for traceability (the spooled
+        # temp file is moved into storage, not rewritten)
         try:
-            from django.core.files.base import ContentFile
             filename = (uploaded.name if uploaded and getattr(uploaded, 'name', None) else f"invoice_{inv.invoice_number}.pdf")
-            if 'file_bytes' in locals() and file_bytes:
-                inv.document.save(filename, ContentFile(file_bytes), save=True)
+            if upload.size:
+                with upload:
+                    inv.document.save(filename, upload, save=True)
         except Exception:
             # Non-fatal: continue without blocking invoice creation
             pass
@@ -781,30 +780,15 @@ def invoice_print(request, pk):
 @require_http_methods(["GET","POST"])
 def invoice_pdf(request, pk):
     """Generate and download invoice as PDF"""
-    invoice = get_object_or_404(Invoice, pk=pk)
+    invoice = get_object_or_404(Invoice.objects.select_related('customer', 'vehicle', 'created_by'), pk=pk)
 
     try:
-        from django.template.loader import render_to_string
-        from weasyprint import HTML, CSS
-        import io
-        import os
-
-        logo_left_path = os.path.join(os.path.dirname(__file__), '..', 'tracker', 'static', 'assets', 'images', 'logo', 'stm_logo.png')
-        logo_right_path = os.path.join(os.path.dirname(__file__), '..', 'tracker', 'static', 'assets', 'images', 'logo', 'wecare.png')
-
-        context = {
-            'invoice': invoice,
-            'logo_left_url': f'file://{os.path.abspath(logo_left_path)}',
-            'logo_right_url': f'file://{os.path.abspath(logo_right_path)}',
-        }
-
-        html_string = render_to_string('tracker/invoice_print.html', context)
-        html = HTML(string=html_string, base_url=request.build_absolute_uri('/'))
-        pdf = html.write_pdf()
-
-        response = HttpResponse(pdf, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="Invoice_{invoice.invoice_number}.pdf"'
-        return response
+        from .utils.invoice_pdf_cache import get_or_render
+
+        # Rendered once per invoice revision; repeat downloads stream the cached file
+        path = get_or_render(invoice, base_url=request.build_absolute_uri('/'))
+        return FileResponse(open(path, 'rb'), content_type='application/pdf',
+                            as_attachment=True, filename=f'Invoice_{invoice.invoice_number}.pdf')
     except ImportError:
         messages.error(request, 'PDF generation not available. Please install weasyprint.')
         return redirect('tracker:invoice_print', pk=pk)
@@ -886,6 +870,8 @@ def invoice_finalize(request, pk):
 
         invoice.status = 'issued'
         invoice.save()
+        from .utils.invoice_pdf_cache import prerender_async
+        prerender_async(invoice.pk)
         messages.success(request, f'Invoice {invoice.invoice_number} finalized.')
 
     return redirect('tracker:invoice_detail', pk=pk)
@@ -25,6 +25,14 @@ from .services import OrderService, CustomerService, VehicleService
 
 logger = logging.getLogger(__name__)
 
+# Badge class per line-item order type in the extraction previews
+ORDER_TYPE_BADGES = {
+    'labour': 'badge-labour',
+    'service': 'badge-service',
+    'sales': 'badge-sales',
+    'unspecified': 'badge-unspecified',
+}
+
 
 @login_required
 @require_http_methods(["GET"])
@@ -146,18 +154,10 @@ def _get_item_code_categories(item_codes):
         category = row['category']
         order_type = _normalize_category_to_order_type(category)
 
-        # Assign color based on order type
-        color_map = {
-            'labour': 'badge-labour',
-            'service': 'badge-service',
-            'sales': 'badge-sales',
-            'unspecified': 'badge-unspecified',
-        }
-
         result[code] = {
             'category': category,
             'order_type': order_type,
-            'color_class': color_map.get(order_type, 'badge-secondary')
+            'color_class': ORDER_TYPE_BADGES.get(order_type, 'badge-secondary')
         }
         found_code_set.add(code)
 
@@ -204,7 +204,8 @@ def api_extract_invoice_preview(request):
         })
 
     try:
-        file_bytes = uploaded.read()
+        from tracker.utils.upload_spool import spool_upload
+        upload = spool_upload(uploaded)
     except Exception as e:
         logger.error(f"Failed to read uploaded file: {e}")
         return JsonResponse({
@@ -212,10 +213,11 @@ def api_extract_invoice_preview(request):
             'message': 'Failed to read uploaded file'
         })
 
-    # Extract text from PDF (non-OCR extractor with filename)
+    # Extract text from the spooled file in place (no in-memory copy of the document)
     try:
-        from tracker.utils.pdf_text_extractor import extract_from_bytes as extract_pdf_text
-        extracted = extract_pdf_text(file_bytes, uploaded.name)
+        from tracker.utils.pdf_text_extractor import extract_from_path
+        with upload:
+            extracted = extract_from_path(upload.path, uploaded.name)
     except Exception as e:
         logger.error(f"PDF extraction error: {e}")
         return JsonResponse({
@@ -659,7 +661,6 @@ def api_create_invoice_from_upload(request):
                 # IMPORTANT: Update customer visit tracking when reusing an existing order
                 # This ensures visit count is incremented even when linking to an existing order on a new day
                 try:
-                    from .services import CustomerService
                     CustomerService.update_customer_visit(customer_obj)
                 except Exception as e:
                     logger.warning(f"Failed to update customer visit when reusing order: {e}")
@@ -810,19 +811,15 @@ def api_create_invoice_from_upload(request):
             # Save invoice (function-level retry will handle database locks)
             _save_with_retry(inv)
 
-            # Save uploaded document if provided (optional in two-step flow)
+            # Save uploaded document if provided (optional in two-step flow); the spooled
+            # temp file is moved into storage rather than rewritten
             try:
                 uploaded_file = request.FILES.get('file')
-                if uploaded_file:
-                    from django.core.files.base import ContentFile
-                    try:
-                        uploaded_file.seek(0)
-                        bytes_ = uploaded_file.read()
-                    except Exception:
-                        bytes_ = None
-                    if bytes_:
+                if uploaded_file and uploaded_file.size:
+                    from .utils.upload_spool import spool_upload
+                    with spool_upload(uploaded_file) as upload:
                         filename = uploaded_file.name or f"invoice_{inv.invoice_number}.pdf"
-                        inv.document.save(filename, ContentFile(bytes_), save=True)
+                        inv.document.save(filename, upload, save=True)
             except Exception:
                 # Non-fatal
                 pass
@@ -1167,6 +1164,10 @@ def api_create_invoice_from_upload(request):
             except Exception as e:
                 logger.warning(f"Failed to create order components: {e}")
 
+            # Pre-render the printable PDF in the background once this transaction commits
+            from .utils.invoice_pdf_cache import prerender_async
+            prerender_async(inv.id)
+
             # Redirect to orders list after successful invoice creation
             redirect_url = '/tracker/orders/'
 
@@ -1188,3 +1189,105 @@ def api_create_invoice_from_upload(request):
             'success': False,
             'message': f'Error: {str(e)}'
         })
+
+
+@login_required
+@require_http_methods(["POST"])
+def api_invoice_batch_preview(request):
+    """
+    Batch step 1: extract many invoice documents and match them to started orders.
+    Documents are stored, but no invoice is created until the batch is confirmed.
+
+    POST fields:
+      - files: One or more PDF/image files
+
+    Returns:
+      - success: true/false
+      - batch: Token to confirm the batch with
+      - entries: Per file {index, filename, status (matched|unmatched|duplicate|failed),
+        message, header, items, subtotal, tax, total, plate, order_id, order_number, customer}
+    """
+    from django.conf import settings
+    from .services import InvoiceBatchService
+
+    uploads = request.FILES.getlist('files')
+    if not uploads:
+        return JsonResponse({'success': False, 'message': 'No files uploaded'})
+    max_files = getattr(settings, 'INVOICE_BATCH_MAX_FILES', 100)
+    if len(uploads) > max_files:
+        return JsonResponse({'success': False, 'message': f'Upload at most {max_files} files per batch'})
+
+    try:
+        from .utils.upload_spool import spool_upload
+        files = [spool_upload(uploaded) for uploaded in uploads]
+        try:
+            batch = InvoiceBatchService.prepare(files, get_user_branch(request.user), request.user)
+        finally:
+            for upload in files:
+                upload.close()
+    except Exception as e:
+        logger.error(f"Batch invoice extraction failed: {e}", exc_info=True)
+        return JsonResponse({'success': False, 'message': f'Failed to process batch: {str(e)}'})
+
+    entries = []
+    for entry in batch['entries']:
+        entry = {k: v for k, v in entry.items() if k != 'document'}
+        entry['items'] = [
+            dict(item, color_class=ORDER_TYPE_BADGES.get(item['order_type'], 'badge-secondary'))
+            for item in entry['items']
+        ]
+        entries.append(entry)
+    counts = {}
+    for entry in entries:
+        counts[entry['status']] = counts.get(entry['status'], 0) + 1
+
+    return JsonResponse({
+        'success': True,
+        'message': f"Extracted {len(entries)} documents",
+        'batch': batch['token'],
+        'counts': counts,
+        'entries': entries,
+    })
+
+
+@login_required
+@require_http_methods(["POST"])
+def api_invoice_batch_confirm(request):
+    """
+    Batch step 2: create invoices for the reviewed entries of a batch.
+
+    JSON body:
+      - batch: Token from api_invoice_batch_preview
+      - orders (optional): {entry index: order id to link to, or null to skip}; entries
+        not listed use the order matched in the preview
+
+    Returns:
+      - success: true/false
+      - created: [{index, invoice_id, invoice_number, order_id}]
+      - skipped: [{index, reason}]
+    """
+    from .services import InvoiceBatchService
+
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid JSON'}, status=400)
+
+    batch = InvoiceBatchService.get(data.get('batch'), request.user)
+    if not batch:
+        return JsonResponse({'success': False, 'message': 'Batch not found or expired'}, status=404)
+
+    is_admin = getattr(request.user, 'is_superuser', False) or getattr(request.user, 'is_staff', False)
+    try:
+        result = InvoiceBatchService.confirm(batch, request.user, data.get('orders') or {}, restrict_branch=not is_admin)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=409)
+    except Exception as e:
+        logger.error(f"Batch invoice confirm failed: {e}", exc_info=True)
+        return JsonResponse({'success': False, 'message': f'Error: {str(e)}'})
+
+    return JsonResponse({
+        'success': True,
+        'message': f"Created {len(result['created'])} invoices, skipped {len(result['skipped'])}",
+        **result,
+    })
@@ -17,6 +17,7 @@ from django.db import transaction
 
 from .models import Order, Customer, Vehicle, Branch, ServiceType, ServiceAddon, InventoryItem, Invoice, InvoiceLineItem
 from .utils import get_user_branch, scope_queryset
+from .db_compat import on_date
 from .services import OrderService
 
 logger = logging.getLogger(__name__)
@@ -81,7 +82,7 @@ def api_start_order(request):
             # (if customer is pre-selected or force_new_order is True, allow creating new order with same plate)
             existing_vehicle = None
             if plate_number and not existing_customer_id and not force_new_order:
-                existing_vehicle = Vehicle.objects.filter(plate_number__iexact=plate_number, customer__branch=user_branch).select_related('customer').first()
+                existing_vehicle = VehicleService.find_by_plate(user_branch, plate_number)
                 if existing_vehicle:
                     # Check if there's already a started (in_progress) order for this vehicle
                     existing_order = Order.objects.filter(
@@ -241,7 +242,8 @@ def api_check_plate(request):
             return JsonResponse({'found': False})
 
         user_branch = get_user_branch(request.user)
-        vehicle = Vehicle.objects.filter(plate_number__iexact=plate_number, customer__branch=user_branch).select_related('customer').first()
+        from .services import VehicleService
+        vehicle = VehicleService.find_by_plate(user_branch, plate_number)
         if not vehicle:
             return JsonResponse({'found': False})
 
@@ -302,7 +304,7 @@ def started_orders_dashboard(request):
     - sort_by: Sort orders by 'started_at', 'plate_number', 'order_type' (default: '-started_at')
     - search: Search by plate number or customer name
     """
-    from django.db.models import Q, Count
+    from django.db.models import Q
 
     status_filter = request.GET.get('status', '')
     sort_by = request.GET.get('sort_by', '-started_at')
@@ -320,7 +322,7 @@ def started_orders_dashboard(request):
         today = timezone.now().date()
         orders = base_orders.filter(
             Q(status__in=['created', 'in_progress', 'overdue']) |  # All active orders (including overdue)
-            Q(status='completed', completed_at__date=today)  # Completed today
+            (Q(status='completed') & on_date('completed_at', today))  # Completed today
         ).select_related('customer', 'vehicle')
 
     # Apply search filter
@@ -351,32 +353,17 @@ def started_orders_dashboard(request):
             orders_by_plate[plate] = []
         orders_by_plate[plate].append(order)
 
-    # Calculate statistics
-    # Total started orders: all active statuses (created, in_progress, overdue)
-    total_started = base_orders.filter(
-        status__in=['created', 'in_progress', 'overdue']
-    ).count()
-
-    # Orders started today: those created today (before or after auto-progression)
-    today = timezone.now().date()
-    today_started = base_orders.filter(
-        status__in=['created', 'in_progress', 'overdue'],
-        created_at__date=today
-    ).count()
-
-    # Calculate repeated vehicles today (vehicles with 2+ orders created today)
-    today_orders = base_orders.filter(
-        created_at__date=today,
-        vehicle__isnull=False
-    ).values('vehicle__plate_number').annotate(order_count=Count('id')).filter(order_count__gte=2)
-    repeated_vehicles_today = today_orders.count()
+    # Statistics: active orders (created, in_progress, overdue), those created today and
+    # vehicles with 2+ orders today, from the shared KPI cache
+    from .services import OrderKpiService
+    kpis = OrderKpiService.get_kpis(request.user, request)
 
     context = {
         'orders': orders,
         'orders_by_plate': orders_by_plate,
-        'total_started': total_started,
-        'today_started': today_started,
-        'repeated_vehicles_today': repeated_vehicles_today,
+        'total_started': kpis['started_total'],
+        'today_started': kpis['today_started'],
+        'repeated_vehicles_today': kpis['repeated_vehicles_today'],
         'search_query': search_query,
         'status_filter': status_filter,
         'sort_by': sort_by,
@@ -1053,36 +1040,15 @@ def api_record_overrun_reason(request, order_id):
 def api_started_orders_kpis(request):
     """API endpoint to get KPI stats for started orders dashboard (for AJAX updates)."""
     try:
-        from django.db.models import Count
-        user_branch = get_user_branch(request.user)
-
-        # Total started orders: both 'created' (just initiated) and 'in_progress' (being worked on)
-        total_started = Order.objects.filter(
-            branch=user_branch,
-            status__in=['created', 'in_progress']
-        ).count()
-
-        # Orders started today: those created today
-        today = timezone.now().date()
-        today_started = Order.objects.filter(
-            branch=user_branch,
-            created_at__date=today,
-            status__in=['created', 'in_progress']
-        ).count()
-
-        # Calculate repeated vehicles today (vehicles with 2+ orders created today)
-        today_orders = Order.objects.filter(
-            branch=user_branch,
-            created_at__date=today,
-            vehicle__isnull=False
-        ).values('vehicle__plate_number').annotate(order_count=Count('id')).filter(order_count__gte=2)
-        repeated_vehicles_today = today_orders.count()
+        # Same figures as the dashboard render, so AJAX refreshes do not jump
+        from .services import OrderKpiService
+        kpis = OrderKpiService.get_kpis(request.user, request)
 
         return JsonResponse({
             'success': True,
-            'total_started': total_started,
-            'today_started': today_started,
-            'repeated_vehicles_today': repeated_vehicles_today
+            'total_started': kpis['started_total'],
+            'today_started': kpis['today_started'],
+            'repeated_vehicles_today': kpis['repeated_vehicles_today']
         })
     except Exception as e:
         logger.error(f"Error fetching started orders KPIs: {e}")
@@ -20,7 +20,10 @@ from django.utils import timezone
 
 from tracker.models import Vehicle, Order, Invoice, InvoiceLineItem, LabourCode, Customer
 from tracker.utils.order_type_detector import _normalize_category_to_order_type
-from .utils import get_user_branch
+from .utils import get_user_branch, normalize_plate
+from .db_compat import in_date_range
+from .db_router import read_replica
+from .services import VehicleService
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +78,7 @@ def vehicle_tracking_dashboard(request):
 
 @login_required
 @require_http_methods(["GET"])
+@read_replica
 def api_vehicle_tracking_data(request):
     user_branch = get_user_branch(request.user)
     try:
@@ -98,7 +102,7 @@ def api_vehicle_tracking_data(request):
 
         logger.info(f"Vehicle tracking query - Period: {period}, Date range: {start_date} to {end_date}, Search: '{search_query}', User branch: {user_branch}")
 
-        invoices_qs_all = Invoice.objects.select_related('customer', 'vehicle', 'order')
+        invoices_qs_all = Invoice.objects.select_related('customer', 'vehicle__customer', 'order')
         invoices_qs = invoices_qs_all
         if user_branch:
             invoices_qs = invoices_qs.filter(branch=user_branch)
@@ -129,13 +133,23 @@ def api_vehicle_tracking_data(request):
                 return s.replace('-', '').replace(' ', '')
             return None
 
-        buckets = {}
-        # Build buckets per vehicle/plate, merging additional-only invoices into real vehicle buckets
+        plate_refs = {}
         for inv in invoices:
             try:
-                plate_ref = _plate_from_reference(inv.reference)
+                plate_refs[inv.id] = _plate_from_reference(inv.reference)
             except Exception:
-                plate_ref = None
+                plate_refs[inv.id] = None
+        # Resolve plates of invoices without a linked vehicle in one query.
+        # IMPORTANT: Scope vehicle lookup by branch to prevent cross-branch data leakage
+        vehicles_by_plate = VehicleService.resolve_plates(
+            user_branch,
+            [plate_refs[inv.id] for inv in invoices if not inv.vehicle_id and plate_refs[inv.id]],
+        )
+
+        buckets = {}
+        # Build buckets per vehicle/plate, merging additional-only invoices into real vehicle buckets
+        for inv in invoices:
+            plate_ref = plate_refs[inv.id]
 
             if search_query:
                 if not (
@@ -150,20 +164,13 @@ def api_vehicle_tracking_data(request):
 
             # If invoice has no linked vehicle but has a plate reference, try to merge into real vehicle bucket
             if not veh_id and plate_ref:
-                try:
-                    # IMPORTANT: Scope vehicle lookup by branch to prevent cross-branch data leakage
-                    vehicle_query = Vehicle.objects.filter(plate_number__iexact=plate_ref)
-                    if user_branch:
-                        vehicle_query = vehicle_query.filter(customer__branch=user_branch)
-                    matched_vehicle = vehicle_query.first()
-                    if matched_vehicle:
-                        veh_id = matched_vehicle.id
-                        plate_val = matched_vehicle.plate_number or plate_ref
-                        # Prefer matched vehicle object for bucket
-                        inv_vehicle_obj = matched_vehicle
-                    else:
-                        inv_vehicle_obj = inv.vehicle
-                except Exception:
+                matched_vehicle = vehicles_by_plate.get(normalize_plate(plate_ref))
+                if matched_vehicle:
+                    veh_id = matched_vehicle.id
+                    plate_val = matched_vehicle.plate_number or plate_ref
+                    # Prefer matched vehicle object for bucket
+                    inv_vehicle_obj = matched_vehicle
+                else:
                     inv_vehicle_obj = inv.vehicle
             else:
                 inv_vehicle_obj = inv.vehicle
@@ -188,8 +195,8 @@ def api_vehicle_tracking_data(request):
 
         logger.info(f"Buckets built from invoices: {len(buckets)}")
 
-        orders_qs_all = Order.objects.select_related('customer', 'vehicle')
-        orders_qs = orders_qs_all.filter(created_at__date__range=[start_date, end_date])
+        orders_qs_all = Order.objects.select_related('customer', 'vehicle__customer')
+        orders_qs = orders_qs_all.filter(in_date_range('created_at', start_date, end_date))
         if user_branch:
             orders_qs = orders_qs.filter(branch=user_branch)
 
@@ -219,32 +226,43 @@ def api_vehicle_tracking_data(request):
 
         vehicle_data = []
         if buckets:
+            # Load the orders, invoices, line items and labour codes of every bucket up
+            # front, so the number of queries does not grow with the number of vehicles
+            vehicle_ids = {b['vehicle'].id for b in buckets.values() if b['vehicle']}
+            range_orders = Order.objects.filter(in_date_range('created_at', start_date, end_date), vehicle_id__in=vehicle_ids)
+            if user_branch:
+                range_orders = range_orders.filter(branch=user_branch)
+            orders_by_vehicle = defaultdict(list)
+            for order in range_orders:
+                orders_by_vehicle[order.vehicle_id].append(order)
+
+            linked_ids = set()
+            for b in buckets.values():
+                linked_ids.update(inv.order_id for inv in b['invoices'] if inv.order_id)
+                linked_ids.update(b.get('orders', set()))
+            orders_by_id = Order.objects.filter(id__in=linked_ids)
+            if user_branch:
+                orders_by_id = orders_by_id.filter(branch=user_branch)
+            orders_by_id = orders_by_id.in_bulk() if linked_ids else {}
+
+            def _count_by_status(orders):
+                statuses = [o.status for o in orders]
+                return {
+                    'completed': statuses.count('completed'),
+                    'in_progress': statuses.count('in_progress'),
+                    'pending': statuses.count('created'),
+                    'overdue': statuses.count('overdue'),
+                    'cancelled': statuses.count('cancelled'),
+                }
+
+            prepared = []
             for key, b in buckets.items():
                 vehicle = b['vehicle']
                 inv_qs = b['invoices']
-
-                orders = Order.objects.none()
-                if vehicle:
-                    try:
-                        orders = vehicle.orders.filter(created_at__date__range=[start_date, end_date])
-                    except Exception:
-                        orders = Order.objects.none()
-                if user_branch:
-                    orders = orders.filter(branch=user_branch)
-
-                order_links_via_invoices = Order.objects.filter(id__in=[inv.order_id for inv in inv_qs if inv.order_id]).distinct()
-                if user_branch:
-                    order_links_via_invoices = order_links_via_invoices.filter(branch=user_branch)
-
-                def _count_by_status(qs):
-                    return {
-                        'completed': qs.filter(status='completed').count(),
-                        'in_progress': qs.filter(status='in_progress').count(),
-                        'pending': qs.filter(status='created').count(),
-                        'overdue': qs.filter(status='overdue').count(),
-                        'cancelled': qs.filter(status='cancelled').count(),
-                    }
-
+                orders = orders_by_vehicle.get(vehicle.id, []) if vehicle else []
+                order_links_via_invoices = [
+                    orders_by_id[oid] for oid in {inv.order_id for inv in inv_qs if inv.order_id} if oid in orders_by_id
+                ]
                 orders_stats = _count_by_status(orders)
                 invoice_links_stats = _count_by_status(order_links_via_invoices)
                 order_stats = {
@@ -255,16 +273,63 @@ def api_vehicle_tracking_data(request):
                     'cancelled': orders_stats['cancelled'] + invoice_links_stats['cancelled'],
                 }
 
-                extra_order_ids = list(b.get('orders', set()))
-                extra_orders = Order.objects.filter(id__in=extra_order_ids) if extra_order_ids else Order.objects.none()
-                if user_branch:
-                    extra_orders = extra_orders.filter(branch=user_branch)
-                all_orders = orders.union(order_links_via_invoices, extra_orders).order_by('-created_at')
-                if not inv_qs and not all_orders.exists():
+                extra_orders = [orders_by_id[oid] for oid in b.get('orders', set()) if oid in orders_by_id]
+                all_orders = {o.id: o for o in [*orders, *order_links_via_invoices, *extra_orders]}
+                all_orders = sorted(all_orders.values(), key=lambda o: o.created_at, reverse=True)
+                if not inv_qs and not all_orders:
                     continue
-
-                total_spent = sum((inv.total_amount or Decimal('0')) for inv in inv_qs)
-                invoice_count = len(inv_qs)
+                prepared.append((b, order_stats, all_orders))
+
+            order_ids = {o.id for _, _, all_orders in prepared for o in all_orders}
+            inv_by_orders = Invoice.objects.select_related('order').filter(order_id__in=order_ids)
+            inv_by_vehicle = Invoice.objects.select_related('order').filter(vehicle_id__in=vehicle_ids)
+            if user_branch:
+                inv_by_orders = inv_by_orders.filter(branch=user_branch)
+                inv_by_vehicle = inv_by_vehicle.filter(branch=user_branch)
+            invoices_by_order = defaultdict(list)
+            for inv in (inv_by_orders if order_ids else []):
+                invoices_by_order[inv.order_id].append(inv)
+            invoices_by_vehicle = defaultdict(list)
+            for inv in (inv_by_vehicle if vehicle_ids else []):
+                invoices_by_vehicle[inv.vehicle_id].append(inv)
+
+            display = []
+            for b, order_stats, all_orders in prepared:
+                vehicle = b['vehicle']
+                combined_map = {}
+                for inv in b['invoices']:
+                    combined_map[inv.id] = inv
+                for order in all_orders:
+                    for inv in invoices_by_order.get(order.id, []):
+                        combined_map[inv.id] = inv
+                for inv in (invoices_by_vehicle.get(vehicle.id, []) if vehicle else []):
+                    combined_map[inv.id] = inv
+                # Ensure invoice list is unique by id
+                display_invoices = list(combined_map.values())
+                display_invoices.sort(key=lambda x: (x.invoice_date or datetime.min, x.id))
+                valid_display_invoices = [inv for inv in display_invoices if _plate_from_reference(inv.reference)]
+                # If there are no valid reference invoices, skip this vehicle entirely
+                if not valid_display_invoices:
+                    continue
+                display.append((b, order_stats, all_orders, valid_display_invoices))
+
+            line_items_by_invoice = defaultdict(list)
+            display_invoice_ids = {inv.id for *_, invs in display for inv in invs}
+            if display_invoice_ids:
+                for item in InvoiceLineItem.objects.filter(invoice_id__in=display_invoice_ids):
+                    line_items_by_invoice[item.invoice_id].append(item)
+
+            # Classify item codes using LabourCode and normalize to order types
+            codes = {str(li.code).strip() for items in line_items_by_invoice.values() for li in items if li.code}
+            code_map = {}
+            if codes:
+                for row in LabourCode.objects.filter(code__in=codes, is_active=True).values('code', 'category'):
+                    otype = _normalize_category_to_order_type(row['category'])
+                    color = 'badge-labour' if otype == 'labour' else ('badge-service' if otype == 'service' else 'badge-sales')
+                    code_map[row['code']] = {'category': row['category'], 'order_type': otype, 'color_class': color}
+
+            for b, order_stats, all_orders, valid_display_invoices in display:
+                vehicle = b['vehicle']
 
                 order_types = set()
                 service_types = set()
@@ -278,59 +343,13 @@ def api_vehicle_tracking_data(request):
                         except Exception:
                             pass
 
-                # Helper: classify item codes using LabourCode and normalize to order types
-                def _classify_codes(codes):
-                    if not codes:
-                        return {}
-                    cleaned = [str(c).strip() for c in codes if c]
-                    if not cleaned:
-                        return {}
-                    found = LabourCode.objects.filter(code__in=cleaned, is_active=True).values('code', 'category')
-                    mapping = {}
-                    for row in found:
-                        code = row['code']
-                        cat = row['category']
-                        otype = _normalize_category_to_order_type(cat)
-                        color = 'badge-labour' if otype == 'labour' else ('badge-service' if otype == 'service' else 'badge-sales')
-                        mapping[code] = {'category': cat, 'order_type': otype, 'color_class': color}
-                    for c in cleaned:
-                        if c not in mapping:
-                            mapping[c] = {'category': 'Sales', 'order_type': 'sales', 'color_class': 'badge-sales'}
-                    return mapping
-
-                order_ids_for_union = list(all_orders.values_list('id', flat=True)) if all_orders.exists() else []
-                inv_by_orders = Invoice.objects.filter(order_id__in=order_ids_for_union) if order_ids_for_union else Invoice.objects.none()
-                if user_branch:
-                    inv_by_orders = inv_by_orders.filter(branch=user_branch)
-                inv_by_vehicle = Invoice.objects.filter(vehicle_id=vehicle.id) if vehicle else Invoice.objects.none()
-                if user_branch:
-                    inv_by_vehicle = inv_by_vehicle.filter(branch=user_branch)
-                combined_map = {}
-                for inv in inv_qs:
-                    combined_map[inv.id] = inv
-                for inv in inv_by_orders:
-                    combined_map[inv.id] = inv
-                for inv in inv_by_vehicle:
-                    combined_map[inv.id] = inv
-                # Ensure invoice list is unique by id
-                display_invoices = list(combined_map.values())
-                display_invoices.sort(key=lambda x: (x.invoice_date or datetime.min, x.id))
-                seen_ids = set()
-                display_invoices = [inv for inv in display_invoices if not (getattr(inv, 'id', None) in seen_ids or seen_ids.add(getattr(inv, 'id', None)))]
-                valid_display_invoices = [inv for inv in display_invoices if _plate_from_reference(inv.reference)]
-                # If there are no valid reference invoices, skip this vehicle entirely
-                if not valid_display_invoices:
-                    continue
-
                 invoice_list = []
                 for invoice in valid_display_invoices:
-                    line_items = InvoiceLineItem.objects.filter(invoice=invoice)
-                    item_codes = [li.code for li in line_items if li.code]
-                    code_map = _classify_codes(item_codes)
+                    line_items = line_items_by_invoice.get(invoice.id, [])
                     categories = set()
                     line_items_data = []
                     for item in line_items:
-                        info = code_map.get(item.code or '', {'category': 'Sales', 'order_type': 'sales', 'color_class': 'badge-sales'})
+                        info = code_map.get(str(item.code or '').strip(), {'category': 'Sales', 'order_type': 'sales', 'color_class': 'badge-sales'})
                         order_type = info['order_type']
                         category_label = 'Labour' if order_type == 'labour' else ('Service' if order_type == 'service' else 'Sales')
                         categories.add(category_label)
@@ -368,7 +387,7 @@ def api_vehicle_tracking_data(request):
                         'status': invoice.status,
                         'order_id': invoice.order_id,
                         'order_number': invoice.order.order_number if invoice.order else '',
-                        'line_items_count': line_items.count(),
+                        'line_items_count': len(line_items),
                         'categories': sorted(list(categories)) if categories else ['Service'],
                         'line_items': line_items_data
                     }
@@ -419,7 +438,7 @@ def api_vehicle_tracking_data(request):
                     'order_types': sorted(list(order_types)),
                     'service_types': sorted(list(service_types)) if service_types else [],
                     'invoices': invoice_list,
-                    'order_count': all_orders.count(),
+                    'order_count': len(all_orders),
                 }
                 vehicle_data.append(vehicle_dict)
 
@@ -496,6 +515,7 @@ def api_vehicle_tracking_data(request):
 
 @login_required
 @require_http_methods(["GET"])
+@read_replica
 def api_vehicle_analytics(request):
     """
     API endpoint for vehicle analytics and trends.